@@ -0,0 +1,51 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class TokenBucket:                             # 依 API 配額限制每分鐘的請求數
+    def __init__(self, requests_per_minute: float, burst: Optional[int] = None):
+        # 桶子容量也算在配額內：補充速率扣掉容量，任何 60 秒內最多 requests_per_minute 次
+        burst = burst if burst is not None else requests_per_minute // 60
+        self.capacity = float(max(1, min(burst, requests_per_minute - 1)))
+        if requests_per_minute > self.capacity:
+            self.rate = (requests_per_minute - self.capacity) / 60.0  # 每秒補充的 token
+        else:                                  # 每分鐘不到 2 次：桶子只放 1 個，補滿要 60 / rpm 秒
+            self.rate = requests_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, tokens: float = 1.0):
+        async with self._lock:                 # 排隊依序取得，先到先用
+            while True:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+async def run_ordered(items: Sequence[T], worker: Callable[[int, T], Awaitable[R]], concurrency: int,
+                      on_error: Optional[Callable[[T, Exception], R]] = None) -> List[R]:
+    # 最多 concurrency 個同時執行，結果依輸入順序回傳
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(idx: int, item: T) -> R:
+        async with semaphore:
+            try:
+                return await worker(idx, item)
+            except Exception as e:
+                if on_error is None:
+                    raise
+                return on_error(item, e)
+
+    return list(await asyncio.gather(*(run(idx, item) for idx, item in enumerate(items))))
@@ -0,0 +1,103 @@
+"""以假的 LLM 比較循序與並行批次審查的耗時（不需要 API key 與向量模型）
+
+    python bench_batch_review.py --contracts 40 --latency 0.5 --concurrency 8 --rpm 0
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.fake import FakeListLLM
+
+from law_main import Config, LaborContractReviewSystem
+
+FAKE_ANSWER = """【違規項目 1】
+1.違法條款原文：雇主得保管勞工護照
+2.違反法規：違反《就業服務法》第57條第8款
+3.違法原因：雇主不得扣留受僱人之護照或居留證
+4.修改建議：應直接刪除
+"""
+
+
+class LatencyFakeLLM(FakeListLLM):             # 每次呼叫固定延遲，模擬等待 Gemini 回應
+    latency: float = 0.5
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return super()._call(prompt, stop, run_manager, **kwargs)
+
+    async def _acall(self, prompt, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return await super()._acall(prompt, stop, run_manager, **kwargs)
+
+
+def _make_config(workdir: str) -> Config:
+    config = Config()
+    config.DOCUMENTS_DIR = os.path.join(workdir, "documents")
+    config.CONTRACTS_DIR = os.path.join(workdir, "contracts")
+    config.VECTOR_DB_DIR = os.path.join(workdir, "lawvector_db")
+    config.NUMPY_INDEX_DIR = os.path.join(config.VECTOR_DB_DIR, "numpy_index")
+    config.LEXICAL_INDEX_PATH = os.path.join(config.VECTOR_DB_DIR, "lexical_index.json")
+    config.USE_EMBEDDING_CACHE = False
+    return config
+
+
+def _write_fixtures(config: Config, contracts: int):
+    laws = [
+        {"法規名稱": "就業服務法", "條號": "57", "條文內容": "雇主聘僱外國人不得有扣留其護照、居留證件或財物之情事。"},
+        {"法規名稱": "勞動基準法", "條號": "21", "條文內容": "工資由勞雇雙方議定之。但不得低於基本工資。"},
+        {"法規名稱": "勞動基準法", "條號": "30", "條文內容": "勞工正常工作時間，每日不得超過八小時。"},
+        {"法規名稱": "勞動基準法", "條號": "22", "條文內容": "工資應全額直接給付勞工。"},
+    ]
+    Path(config.DOCUMENTS_DIR).mkdir(parents=True, exist_ok=True)
+    with open(os.path.join(config.DOCUMENTS_DIR, "laws.json"), "w", encoding="utf-8") as f:
+        json.dump(laws, f, ensure_ascii=False)
+    Path(config.CONTRACTS_DIR).mkdir(parents=True, exist_ok=True)
+    for i in range(contracts):
+        text = (f"第一條 契約編號 {i}，期間三年。\n"
+                "第二條 雇主得保管勞工護照及居留證。\n"
+                f"第三條 每月工資新台幣 {20000 + i} 元，每日工作十二小時。\n")
+        Path(config.CONTRACTS_DIR, f"contract_{i:04d}.txt").write_text(text, encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contracts", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.5, help="每次 LLM 呼叫的模擬延遲（秒）")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rpm", type=float, default=0, help="每分鐘 LLM 呼叫上限，0 表示不限制")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        config = _make_config(workdir)
+        _write_fixtures(config, args.contracts)
+        llm = LatencyFakeLLM(responses=[FAKE_ANSWER], latency=args.latency)
+        system = LaborContractReviewSystem(config, llm=llm, embeddings=DeterministicFakeEmbedding(size=64))
+        system.build_law_knowledge_base()
+        contract_files = sorted(Path(config.CONTRACTS_DIR).glob("*.txt"))
+
+        config.BATCH_CONCURRENCY = 1
+        start = time.perf_counter()
+        sequential = system.batch_review_contracts()
+        sequential_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        concurrent = asyncio.run(system.abatch_review_contracts(
+            contract_files, concurrency=args.concurrency, requests_per_minute=args.rpm
+        ))
+        concurrent_time = time.perf_counter() - start
+
+        ordered = [r.contract_path for r in concurrent] == [str(p) for p in contract_files]
+        print(f"\n{args.contracts} 份契約，LLM 延遲 {args.latency}s")
+        print(f"循序: {sequential_time:.2f}s")
+        print(f"並行 (concurrency={args.concurrency}): {concurrent_time:.2f}s, "
+              f"加速 {sequential_time / concurrent_time:.1f}x, 結果順序一致: {ordered}")
+        assert len(sequential) == len(concurrent)
+
+
+if __name__ == "__main__":
+    main()
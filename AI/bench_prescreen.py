@@ -0,0 +1,70 @@
+"""比較規則初篩的關鍵字自動機與逐一 `in` 比對的耗時，並列出範例契約的初篩結果
+
+    python bench_prescreen.py --clauses 2000 --repeat 20
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import Callable, List
+
+from clause_segmenter import split_clauses
+from prescreen import Prescreener
+
+SAMPLE_CLAUSES = [
+    "雇主得代為保管勞工之護照及居留證，契約期滿後返還。",
+    "勞工每月工資為新台幣 20,000 元，於次月十日發給。",
+    "時薪 150 元，依實際工作時數計算。",
+    "每日工作時間 14 小時，例假日另行通知。",
+    "勞工如有遲到，每次罰款 500 元，自當月工資扣除。",
+    "勞工應繳交保證金 10,000 元，契約期滿無違約者退還。",
+    "工作期間全年無休，不得請假。",
+    "雇主得視需要指派至許可以外之工作場所。",
+    "雇主應依法為勞工投保勞工保險及全民健康保險。",
+    "本契約一式兩份，雙方各執一份為憑。",
+]
+
+
+def _timed(fn: Callable[[], object], repeat: int) -> List[float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, default=2000, help="合成契約的條款數")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    prescreener = Prescreener()
+    sample = "\n".join(f"第{idx}條 {clause}" for idx, clause in enumerate(SAMPLE_CLAUSES, 1))
+    result = prescreener.screen(sample)
+    print(f"範例契約：{len(result.clauses)} 個條款，{len(result.findings)} 項初篩結果（{result.elapsed_ms:.2f} ms）")
+    for finding in result.findings:
+        print(f"  [{finding.severity}] {finding.rule}: {finding.reason}")
+
+    random.seed(0)
+    text = "\n".join(f"第{idx}條 {random.choice(SAMPLE_CLAUSES)}" for idx in range(1, args.clauses + 1))
+    clauses = split_clauses(text)
+    keywords = list(prescreener._groups)
+
+    def automaton():
+        for clause in clauses:
+            list(prescreener._automaton.iter_matches(clause))
+
+    def naive():                               # 每個關鍵字各掃描一次條款
+        for clause in clauses:
+            [keyword for keyword in keywords if keyword in clause]
+
+    print(f"\n合成契約：{len(clauses)} 個條款，{len(keywords)} 個關鍵字")
+    for label, fn in [("Aho-Corasick", automaton), ("逐一 in 比對", naive), ("完整初篩", lambda: prescreener.screen(text))]:
+        times = _timed(fn, args.repeat)
+        print(f"  {label:<14} 中位數 {statistics.median(times):8.2f} ms  最慢 {max(times):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""比較 Chroma 與 NumPy 檢索的延遲與召回率
+
+    python bench_retriever.py                 # 使用現有的 lawvector_db
+    python bench_retriever.py --synthetic     # 不需要模型，隨機向量測 NumPy 檢索本身
+"""
+import argparse
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+
+from numpy_retriever import NumpyVectorIndex
+
+SAMPLE_QUERIES = [
+    "雇主得任意扣留外籍勞工之護照及居留證",
+    "每日工作時間超過八小時且未給付加班費",
+    "勞工每七日中應有二日之休息",
+    "仲介費由工資中按月扣除",
+    "契約期間未滿即解僱不發給資遣費",
+    "雇主應為勞工投保勞工保險及全民健康保險",
+    "工資低於基本工資",
+    "膳宿費用自薪資扣除之上限",
+    "勞工懷孕時雇主得終止契約",
+    "特別休假未休之工資應予發給",
+]
+
+
+def _timed(fn: Callable[[], object], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _report(name: str, samples: List[float], queries: int):
+    per_query = [s / queries for s in samples]
+    p95 = sorted(per_query)[int(len(per_query) * 0.95) - 1] if len(per_query) > 1 else per_query[0]
+    print(f"{name:<24} 每筆查詢 平均 {statistics.mean(per_query):.3f} ms  p95 {p95:.3f} ms")
+
+
+def _load_queries(contracts_dir: str) -> List[str]:
+    queries = list(SAMPLE_QUERIES)
+    for path in sorted(Path(contracts_dir).glob("*.txt")):
+        for line in path.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if len(line) >= 10:
+                queries.append(line)
+    return queries
+
+
+def bench_synthetic(rows: int, dim: int, queries: int, k: int, repeat: int):
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((rows, dim)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    index = NumpyVectorIndex(matrix, [str(i) for i in range(rows)], [""] * rows, [{}] * rows)
+    query_vectors = rng.standard_normal((queries, dim)).astype(np.float32)
+
+    expected = np.argsort(-(query_vectors @ matrix.T), axis=1)[:, :k]   # 全排序當作標準答案
+    got = index.search(query_vectors, k)
+    recall = np.mean([len(set(e) & {row for row, _ in g}) / k for e, g in zip(expected, got)])
+    print(f"合成資料: {rows} x {dim}, {queries} 筆查詢, top-{k}")
+    _report("numpy 批次", _timed(lambda: index.search(query_vectors, k), repeat), queries)
+    _report("numpy 逐筆", _timed(lambda: [index.search(q, k) for q in query_vectors], repeat), queries)
+    print(f"召回率（相對全排序）: {recall:.3f}")
+
+
+def bench_chroma(k: int, repeat: int):
+    from law_main import Config
+    from langchain_chroma import Chroma
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    config = Config()
+    embeddings = HuggingFaceEmbeddings(
+        model_name=config.EMBEDDING_MODEL_NAME,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': True}
+    )
+    vector_db = Chroma(
+        persist_directory=config.VECTOR_DB_DIR,
+        embedding_function=embeddings,
+        collection_name="law_collection"
+    )
+    index = NumpyVectorIndex.from_chroma(vector_db)
+    if not len(index):
+        raise SystemExit("知識庫是空的，請先執行 law_main.py 建立")
+    queries = _load_queries(config.CONTRACTS_DIR)
+    query_vectors = np.asarray(embeddings.embed_documents(queries), dtype=np.float32)  # 嵌入時間不計入
+    print(f"知識庫 {len(index)} 個切塊, {len(queries)} 筆查詢, top-{k}")
+
+    def run_chroma():
+        return [vector_db.similarity_search_by_vector(vector.tolist(), k=k) for vector in query_vectors]
+
+    _report("chroma", _timed(run_chroma, repeat), len(queries))
+    _report("numpy 逐筆", _timed(lambda: [index.search(q, k) for q in query_vectors], repeat), len(queries))
+    _report("numpy 批次", _timed(lambda: index.search(query_vectors, k), repeat), len(queries))
+
+    chroma_hits = run_chroma()
+    numpy_hits = index.search(query_vectors, k)
+    recalls = []
+    for docs, hits in zip(chroma_hits, numpy_hits):
+        chroma_ids = {doc.id for doc in docs}
+        numpy_ids = {index.ids[row] for row, _ in hits}
+        recalls.append(len(chroma_ids & numpy_ids) / max(len(chroma_ids), 1))
+    print(f"召回率（相對 Chroma）: {statistics.mean(recalls):.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", action="store_true", help="使用隨機向量，不需要向量庫與模型")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=32)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    if args.synthetic:
+        bench_synthetic(args.rows, args.dim, args.queries, args.k, args.repeat)
+    else:
+        bench_chroma(args.k, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
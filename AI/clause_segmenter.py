@@ -0,0 +1,131 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from lexical_index import LexicalIndex, reciprocal_rank_fusion
+from numpy_retriever import NumpyVectorIndex
+
+# 條款開頭：第一條、第 3 條、一、（一）、(1)、1.、1、
+_CLAUSE_HEAD_RE = re.compile(
+    r"^\s*(?:第\s*[0-9一二三四五六七八九十百]+\s*[條项項款]|[一二三四五六七八九十]+\s*[、.．]"
+    r"|[（(]\s*[0-9一二三四五六七八九十]+\s*[)）]|[0-9]+\s*[、.．)](?!\d))"
+)
+_SENTENCE_END_RE = re.compile(r"(?<=[。；;！!？?])")
+_CLAUSE_ENDINGS = ("。", "；", ";", "！", "!", "？", "?", "：", ":")
+
+
+def _split_long(text: str, max_length: int) -> List[str]:  # 太長的條款依句號再切開
+    pieces, current = [], ""
+    for sentence in _SENTENCE_END_RE.split(text):
+        if current and len(current) + len(sentence) > max_length:
+            pieces.append(current)
+            current = ""
+        current += sentence
+    if current:
+        pieces.append(current)
+    return [piece[i:i + max_length] for piece in pieces for i in range(0, len(piece), max_length)]
+
+
+def split_clauses(text: str, min_length: int = 8, max_length: int = 300) -> List[str]:
+    # 條款編號開頭就另起一條；前一行沒有句末標點（OCR 斷行）或本行太短時併入前一條
+    clauses: List[str] = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        starts_new = (
+            not clauses
+            or _CLAUSE_HEAD_RE.match(line)
+            or (clauses[-1].endswith(_CLAUSE_ENDINGS) and len(line) >= min_length)
+        )
+        if starts_new:
+            clauses.append(line)
+        else:
+            clauses[-1] += line
+    result = []
+    for clause in clauses:
+        result.extend(_split_long(clause, max_length) if len(clause) > max_length else [clause])
+    return [clause for clause in result if len(clause) >= min_length]
+
+
+class ClauseHitCache:                          # 條款 -> 命中的法規切塊 ID（LRU）
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()          # 批次審查時多份契約會在不同執行緒檢索
+
+    @staticmethod
+    def key(clause: str, index_signature: str) -> str:
+        return hashlib.sha256(f"{index_signature}|{clause}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        with self._lock:
+            chunk_ids = self._entries.get(key)
+            if chunk_ids is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return chunk_ids
+
+    def put(self, key: str, chunk_ids: List[str]):
+        with self._lock:
+            self._entries[key] = chunk_ids
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def retrieve_clause_hits(clauses: List[str], index: NumpyVectorIndex, embeddings: Embeddings, k: int,
+                         lexical: Optional[LexicalIndex] = None, rrf_k: int = 60,
+                         cache: Optional[ClauseHitCache] = None) -> List[List[str]]:
+    # 沒有快取的條款一次批次嵌入，再以一次矩陣乘法取得每條的 top-k
+    hits: List[Optional[List[str]]] = [None] * len(clauses)
+    keys = [ClauseHitCache.key(clause, index.signature) for clause in clauses]
+    if cache is not None:
+        for i, key in enumerate(keys):
+            hits[i] = cache.get(key)
+    pending = [i for i, chunk_ids in enumerate(hits) if chunk_ids is None]
+    if pending:
+        candidate_k = k * 4 if lexical is not None else k
+        vectors = np.asarray(embeddings.embed_documents([clauses[i] for i in pending]), dtype=np.float32)
+        dense_hits = index.search(vectors, candidate_k)
+        for i, row_hits in zip(pending, dense_hits):
+            ranking = [index.ids[row] for row, _ in row_hits]
+            if lexical is not None:
+                lexical_ranking = [chunk_id for chunk_id, _ in lexical.search(clauses[i], candidate_k)]
+                ranking = [chunk_id for chunk_id, _ in reciprocal_rank_fusion([ranking, lexical_ranking], rrf_k)]
+            hits[i] = ranking[:k]
+            if cache is not None:
+                cache.put(keys[i], hits[i])
+    return hits
+
+
+def merge_clause_hits(clause_hits: List[List[str]], max_chunks: int) -> List[str]:
+    # 合併各條款的命中並去除重複：名次越前、被越多條款命中的排越前面
+    best_rank: Dict[str, int] = {}
+    counts: Dict[str, int] = {}
+    first_seen: Dict[str, Tuple[int, int]] = {}
+    for clause_idx, chunk_ids in enumerate(clause_hits):
+        for rank, chunk_id in enumerate(chunk_ids):
+            best_rank[chunk_id] = min(best_rank.get(chunk_id, rank), rank)
+            counts[chunk_id] = counts.get(chunk_id, 0) + 1
+            first_seen.setdefault(chunk_id, (clause_idx, rank))
+    ordered = sorted(best_rank, key=lambda cid: (best_rank[cid], -counts[cid], first_seen[cid]))
+    return ordered[:max_chunks]
@@ -0,0 +1,123 @@
+import math
+import re
+from typing import Any, Dict, List, Set, Tuple
+
+from langchain_core.documents import Document
+
+from lexical_index import document_key
+
+_CJK_RE = re.compile(r"[\u3001-\u9fff\uf900-\ufaff\uff00-\uffef]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:         # 粗估：中日韓字元約 1 token，其餘約 4 個字元 1 token
+    cjk = len(_CJK_RE.findall(text))
+    rest = len(_SPACE_RE.sub("", text)) - cjk
+    return cjk + math.ceil(rest / 4)
+
+
+# 切塊從同一份文件切出時這些欄位相同；score 等檢索時才加上的欄位每個切塊都不同，不能拿來分組
+_GROUP_FIELDS = ("source", "law_name", "instruction", "input")
+
+
+def _group_key(doc: Document) -> Tuple:        # 同一份法規、同一條的切塊才可能互相重疊
+    return tuple(str(doc.metadata.get(key, "")) for key in _GROUP_FIELDS)
+
+
+def overlap_length(a: str, b: str, max_overlap: int, min_overlap: int = 20) -> int:
+    # a 的結尾與 b 的開頭重疊的長度（切塊時的 CHUNK_OVERLAP），沒有重疊回傳 0
+    probe = b[:min_overlap]
+    if len(probe) < min_overlap:
+        return 0
+    pos = a.find(probe, max(0, len(a) - max_overlap))
+    while pos != -1:
+        if b.startswith(a[pos:]):
+            return len(a) - pos
+        pos = a.find(probe, pos + 1)
+    return 0
+
+
+def _shingles(text: str, size: int = 3) -> Set[str]:
+    text = _SPACE_RE.sub("", text)
+    return {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+
+
+class _Unit:                                   # 合併後的一段法規內容，名次取成員中最好的
+    def __init__(self, rank: int, doc: Document):
+        self.rank = rank
+        self.docs = [doc]
+        self.text = doc.page_content
+
+    def to_document(self) -> Document:
+        if len(self.docs) == 1:
+            return self.docs[0]
+        metadata = dict(self.docs[0].metadata)
+        metadata["chunk_id"] = "+".join(document_key(doc) for doc in self.docs)
+        return Document(page_content=self.text, metadata=metadata)
+
+
+def _merge_overlapping(units: List[_Unit], max_overlap: int) -> Tuple[List[_Unit], int]:
+    merged = 0
+    changed = True
+    while changed:                             # 切塊數很少（十幾個），直接兩兩比對到不能再合併
+        changed = False
+        for first in units:
+            for second in units:
+                if first is second:
+                    continue
+                overlap = overlap_length(first.text, second.text, max_overlap)
+                if overlap:
+                    first.text += second.text[overlap:]
+                    first.docs += second.docs
+                    first.rank = min(first.rank, second.rank)
+                    units.remove(second)
+                    merged += 1
+                    changed = True
+                    break
+            if changed:
+                break
+    return units, merged
+
+
+def pack_context(documents: List[Document], token_budget: int, max_overlap: int,
+                 duplicate_threshold: float = 0.9) -> Tuple[List[Document], Dict[str, Any]]:
+    # 合併同一條文的重疊切塊、去掉近似重複，再依名次放進 token 預算；回傳新的文件列表與統計
+    groups: Dict[Tuple, List[_Unit]] = {}
+    for rank, doc in enumerate(documents):
+        groups.setdefault(_group_key(doc), []).append(_Unit(rank, doc))
+    units: List[_Unit] = []
+    merged = 0
+    for group in groups.values():
+        group, count = _merge_overlapping(group, max_overlap)
+        units.extend(group)
+        merged += count
+    units.sort(key=lambda unit: unit.rank)
+
+    kept: List[Tuple[_Unit, Set[str]]] = []
+    duplicates = 0
+    for unit in units:                         # 內容幾乎都被名次較前的段落涵蓋時捨棄
+        shingles = _shingles(unit.text)
+        if any(len(shingles & other) / len(shingles) >= duplicate_threshold for _, other in kept):
+            duplicates += 1
+            continue
+        kept.append((unit, shingles))
+
+    packed: List[Document] = []
+    used = 0
+    over_budget = 0
+    for unit, _ in kept:
+        tokens = estimate_tokens(unit.text)
+        if packed and used + tokens > token_budget:  # 至少保留名次最前的一段
+            over_budget += 1
+            continue
+        packed.append(unit.to_document())
+        used += tokens
+    return packed, {
+        "chunks_in": len(documents),
+        "chunks_out": len(packed),
+        "merged": merged,
+        "duplicates": duplicates,
+        "over_budget": over_budget,
+        "tokens_before": sum(estimate_tokens(doc.page_content) for doc in documents),
+        "tokens_after": used,
+    }
@@ -0,0 +1,224 @@
+import atexit
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+INDEX_FILENAME = "index.db"
+VECTORS_FILENAME = "vectors.bin"
+LEGACY_INDEX_FILENAME = "index.json"
+_LOOKUP_BATCH = 500                            # SQLite 單一查詢的參數數量有上限
+
+
+class EmbeddingCache:                          # 以 memmap 矩陣存放已算過的向量，SQLite 記錄 key 與列號（多個行程可共用）
+    def __init__(self, cache_dir: str, dimension: Optional[int] = None,
+                 max_entries: int = 200000, dtype: str = "float16"):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.dtype = np.dtype(dtype)
+        self.dimension = dimension
+        self.capacity = 0                      # 目前映射的列數
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._vectors: Optional[np.memmap] = None
+        self._lock = threading.Lock()          # 保護計數器與 memmap
+        os.makedirs(cache_dir, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    row INTEGER NOT NULL UNIQUE,
+                    last_used REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_used ON entries (last_used)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value NOT NULL)")
+            with self._lock:
+                self._transaction(conn, lambda: self._sync(conn))
+        atexit.register(self.flush)
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.cache_dir, INDEX_FILENAME)
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.cache_dir, VECTORS_FILENAME)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+
+    @staticmethod
+    def _transaction(conn: sqlite3.Connection, body):
+        # BEGIN IMMEDIATE 取得寫入鎖：列號分配與讀取向量期間，其他行程不能改派列號
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = body()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def _map(self, capacity: int):
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        if capacity and self.dimension:
+            self._vectors = np.memmap(self.vectors_path, dtype=self.dtype, mode="r+",
+                                      shape=(capacity, self.dimension))
+        self.capacity = capacity
+
+    def _set_meta(self, conn: sqlite3.Connection, **values):
+        conn.executemany("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", values.items())
+
+    def _sync(self, conn: sqlite3.Connection, dimension: Optional[int] = None) -> Dict[str, int]:
+        # 在交易內讀取共用的格式與容量：格式不同就清空重建，其他行程擴充過檔案就重新映射
+        meta = dict(conn.execute("SELECT name, value FROM meta").fetchall())
+        dimension = dimension or self.dimension
+        if meta.get("dtype") != self.dtype.name or (dimension and meta.get("dimension") not in (None, dimension)):
+            if meta:
+                print("向量快取格式不同，重新建立")
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM meta")
+            self._map(0)
+            open(self.vectors_path, "wb").close()
+            legacy_path = os.path.join(self.cache_dir, LEGACY_INDEX_FILENAME)
+            if os.path.exists(legacy_path):    # 舊版的 JSON 索引
+                os.remove(legacy_path)
+            meta = {"dtype": self.dtype.name, "capacity": 0, "next_row": 0}
+            self._set_meta(conn, **meta)
+        if meta.get("dimension") is None and dimension:
+            meta["dimension"] = dimension
+            self._set_meta(conn, dimension=dimension)
+        self.dimension = meta.get("dimension")
+        if meta["capacity"] != self.capacity or (self._vectors is None and self.capacity):
+            self._map(meta["capacity"])
+        return meta
+
+    def _lookup(self, conn: sqlite3.Connection, keys: List[str]) -> Dict[str, int]:
+        rows = {}
+        for start in range(0, len(keys), _LOOKUP_BATCH):
+            batch = keys[start:start + _LOOKUP_BATCH]
+            rows.update(conn.execute(
+                f"SELECT key, row FROM entries WHERE key IN ({','.join('?' * len(batch))})", batch
+            ).fetchall())
+        return rows
+
+    def _allocate(self, conn: sqlite3.Connection, meta: Dict[str, int], count: int, keep: Dict[str, int]) -> List[int]:
+        next_row, capacity = meta["next_row"], meta["capacity"]
+        if capacity - next_row < count:       # 容量不足時倍增檔案大小（不超過上限）
+            new_capacity = min(self.max_entries, max(1024, capacity * 2, next_row + count))
+            if new_capacity > capacity:
+                with open(self.vectors_path, "ab") as f:
+                    f.truncate(new_capacity * self.dimension * self.dtype.itemsize)
+                self._map(new_capacity)
+                capacity = new_capacity
+        rows = list(range(next_row, min(capacity, next_row + count)))
+        self._set_meta(conn, next_row=next_row + len(rows), capacity=capacity)
+        if len(rows) < count:                  # 淘汰最久沒用到的向量（同一批要寫入的不算）
+            victims = conn.execute(
+                "SELECT key, row FROM entries ORDER BY last_used LIMIT ?", (count - len(rows) + len(keep),)
+            ).fetchall()
+            victims = [(key, row) for key, row in victims if key not in keep][:count - len(rows)]
+            conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in victims])
+            rows += [row for _, row in victims]
+            self.evictions += len(victims)
+        return rows
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        if not keys:
+            return found
+        now = time.time()
+
+        def read():
+            rows = self._lookup(conn, keys)
+            if rows:
+                self._sync(conn)
+                for key, row in rows.items():
+                    found[key] = np.array(self._vectors[row], dtype=np.float32)
+                conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?",
+                                 [(now, key) for key in rows])
+
+        with self._lock, closing(self._connect()) as conn:
+            self._transaction(conn, read)
+            self.hits += sum(key in found for key in keys)
+            self.misses += sum(key not in found for key in keys)
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        if not items:
+            return
+        now = time.time()
+        dimension = len(next(iter(items.values())))
+
+        def write():
+            meta = self._sync(conn, dimension)
+            assigned = self._lookup(conn, list(items))
+            new_keys = [key for key in items if key not in assigned]
+            rows = self._allocate(conn, meta, len(new_keys), assigned)
+            assigned.update(zip(new_keys, rows))   # 單批超過上限時只保留能放下的部分
+            for key, row in assigned.items():
+                self._vectors[row] = np.asarray(items[key], dtype=self.dtype)
+            conn.executemany("INSERT OR REPLACE INTO entries (key, row, last_used) VALUES (?, ?, ?)",
+                             [(key, row, now) for key, row in assigned.items()])
+
+        with self._lock, closing(self._connect()) as conn:
+            self._transaction(conn, write)
+
+    def flush(self):
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+
+    def stats(self) -> Dict[str, float]:
+        with closing(self._connect()) as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "capacity": self.capacity,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class CachedEmbeddings(Embeddings):            # 放在 HuggingFaceEmbeddings 前面的快取層
+    def __init__(self, base: Embeddings, cache: EmbeddingCache, model_name: str, normalize: bool):
+        self.base = base
+        self.cache = cache
+        self.namespace = f"{model_name}|normalize={normalize}"
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}|{text}".encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+        cached = self.cache.get_many(keys)
+        missing = {}                           # key -> 原文（同一批重複的文字只算一次）
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        if missing:
+            vectors = self.base.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(computed)
+            cached.update({key: np.asarray(vector, dtype=np.float32) for key, vector in computed.items()})
+        return [cached[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
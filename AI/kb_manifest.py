@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Tuple
+
+MANIFEST_VERSION = 1
+MANIFEST_FILENAME = "manifest.json"
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_chunk_ids(source: str, chunk_texts: List[str]) -> List[str]:
+    # 以「來源 + 內容雜湊 + 同內容出現次數」產生穩定 ID，內容不變 ID 就不變
+    seen: Dict[str, int] = {}
+    ids = []
+    for text in chunk_texts:
+        content_hash = hash_text(text)
+        occurrence = seen.get(content_hash, 0)
+        seen[content_hash] = occurrence + 1
+        ids.append(hashlib.sha1(f"{source}|{content_hash}|{occurrence}".encode("utf-8")).hexdigest())
+    return ids
+
+
+class KnowledgeBaseManifest:                   # 記錄每個法規來源與切塊的雜湊，用於增量重建
+    def __init__(self, path: str, signature: Dict):
+        self.path = path
+        self.signature = {"version": MANIFEST_VERSION, **signature}
+        self.sources: Dict[str, Dict] = {}     # source -> {"hash": 檔案雜湊, "chunks": [chunk id]}
+        self.compatible = False                # 既有 manifest 是否與目前設定相符
+
+    @classmethod
+    def load(cls, vector_db_dir: str, signature: Dict) -> "KnowledgeBaseManifest":
+        manifest = cls(os.path.join(vector_db_dir, MANIFEST_FILENAME), signature)
+        if not os.path.exists(manifest.path):
+            return manifest
+        try:
+            with open(manifest.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"讀取 manifest 失敗: {e}")
+            return manifest
+        if data.get("signature") == manifest.signature:
+            manifest.sources = data.get("sources", {})
+            manifest.compatible = True
+        return manifest
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"signature": self.signature, "sources": self.sources}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)             # 寫入完成才替換，避免中斷時損毀
+
+    def changed_sources(self, source_hashes: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        # 回傳 (新增或內容變動的來源, 已刪除的來源)
+        changed = [
+            source for source, file_hash in source_hashes.items()
+            if self.sources.get(source, {}).get("hash") != file_hash
+        ]
+        removed = [source for source in self.sources if source not in source_hashes]
+        return changed, removed
+
+    def chunk_ids(self, source: str) -> List[str]:
+        return list(self.sources.get(source, {}).get("chunks", []))
+
+    def all_chunk_ids(self) -> List[str]:
+        return [chunk_id for entry in self.sources.values() for chunk_id in entry.get("chunks", [])]
+
+    def set_source(self, source: str, file_hash: str, chunk_ids: List[str]):
+        self.sources[source] = {"hash": file_hash, "chunks": chunk_ids}
+
+    def remove_source(self, source: str):
+        self.sources.pop(source, None)
@@ -1,28 +1,62 @@
 import os
 import json
 import sys
+import asyncio
+import hashlib
+import threading
 import time
-import torch  
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional, TYPE_CHECKING
 from pathlib import Path
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
-from langchain_chroma import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.llms import HuggingFacePipeline  
-from langchain_classic.chains import RetrievalQA
-from langchain_core.documents import Document
-from transformers import ( 
-    AutoTokenizer,
-    AutoModelForCausalLM,
-    pipeline
-)
-from langchain_google_genai import ChatGoogleGenerativeAI
+from startup_profile import profiler       # 重量級套件（torch、Chroma、Gemini SDK）在用到時才 import
+with profiler.timed("import langchain_core"):
+    from langchain_core.documents import Document
+    from langchain_core.callbacks import BaseCallbackHandler
+    from langchain_core.prompts import format_document
 from dotenv import load_dotenv
+from kb_manifest import KnowledgeBaseManifest, hash_file, make_chunk_ids
+from embedding_cache import CachedEmbeddings, EmbeddingCache
+from file_lock import file_lock
+from numpy_retriever import NumpyRetriever, NumpyVectorIndex, ids_signature
+from lexical_index import HybridRetriever, LexicalIndex, document_key
+from response_cache import ResponseCache, make_cache_key, normalize_contract_text
+from near_duplicate import NO_VIOLATION_ANSWER, MinHasher, NearDuplicateIndex, ReusePlan, plan_reuse
+from review_stream import ViolationStream, chunk_text
+from review_schema import ReviewResult, render_text_report, review_payload
+from async_batch import TokenBucket, run_ordered
+from context_packer import estimate_tokens, pack_context
+from prescreen import PRESCREEN_RULES_VERSION, Prescreener, PrescreenResult
+from clause_segmenter import ClauseHitCache, merge_clause_hits, retrieve_clause_hits, split_clauses
+if TYPE_CHECKING:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
 load_dotenv()
 os.environ["HF_HUB_DOWNLOAD_TIMEOUT"] = "7200"  
 os.environ["CURL_CA_BUNDLE"] = ""              # 測試時使用
 os.environ["TOKENIZERS_PARALLELISM"] = "false" # 單執行緒
+EVENT_PREFIX = "@@FLAS_EVENT "                 # 後端從 stdout 辨識進度事件的前綴
+
+def emit_stdout_event(event: Dict[str, Any]):  # 以單行 JSON 輸出進度事件給後端
+    print(EVENT_PREFIX + json.dumps(event, ensure_ascii=False), flush=True)
+
+class ReviewEventHandler(BaseCallbackHandler):  # 把檢索與生成的階段轉成進度事件
+    def __init__(self, on_event: Callable[[Dict[str, Any]], None]):
+        self.on_event = on_event
+
+    def on_retriever_end(self, documents, **kwargs):
+        self.on_event({"stage": "retrieval_done", "documents": len(documents)})
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.on_event({"stage": "llm_started"})
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.on_event({"stage": "llm_started"})
+
+    def on_llm_new_token(self, token: str, **kwargs):
+        if token:
+            self.on_event({"stage": "llm_token", "text": token})
+
+    def on_llm_end(self, response, **kwargs):
+        self.on_event({"stage": "llm_done"})
+
 class Config:
     DOCUMENTS_DIR = "documents"                # 法規知識庫
     CONTRACTS_DIR = "contracts"                # 契約文件
@@ -33,24 +67,103 @@ class Config:
     LLM_MODEL_NAME = "yentinglin/Taiwan-LLM-7B-v2.1-chat"  
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-2.5-flash")  
+    LLM_TEMPERATURE = 0.5
+    LLM_MAX_OUTPUT_TOKENS = 2048
+    STREAM_LLM_OUTPUT = os.getenv("STREAM_LLM_OUTPUT", "true").lower() == "true"  # 邊生成邊回報 token 與違規項目
+    PROMPT_TEMPLATE_VERSION = "1"              # 修改審查提示詞時請遞增，讓舊的快取結果失效
     VECTOR_DB_DIR = "lawvector_db"             # 向量庫位置
     TOP_K = 5                                  # 找出幾條相關的
+    RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "chroma")  # chroma 或 numpy（行程內暴力內積）
+    NUMPY_INDEX_DIR = os.path.join(VECTOR_DB_DIR, "numpy_index")
+    USE_HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "true").lower() == "true"  # 向量 + BM25 關鍵字檢索
+    HYBRID_CANDIDATE_K = 20                    # 兩種檢索各取幾筆候選再合併
+    RRF_K = 60                                 # reciprocal rank fusion 的平滑常數
+    LEXICAL_INDEX_PATH = os.path.join(VECTOR_DB_DIR, "lexical_index.json")
+    USE_CLAUSE_RETRIEVAL = os.getenv("CLAUSE_RETRIEVAL", "true").lower() == "true"  # 逐條款檢索，而非整份契約當一個查詢
+    CLAUSE_TOP_K = 3                           # 每個條款取幾條法規
+    CLAUSE_CONTEXT_MAX_CHUNKS = 10             # 合併去重後最多放進 prompt 的切塊數
+    CLAUSE_CACHE_MAX_ENTRIES = 5000
+    USE_CONTEXT_PACKING = os.getenv("CONTEXT_PACKING", "true").lower() == "true"  # 合併重疊切塊、去重並限制 prompt 長度
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "8000"))          # 契約 + 法規的 token 預算（粗估）
+    CONTEXT_MIN_LAW_TOKENS = 1500              # 契約很長時仍保留給法規的 token 數
+    CONTEXT_DUPLICATE_THRESHOLD = 0.9          # 內容有九成被前面段落涵蓋就捨棄
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))                  # 批次審查同時進行的契約數
+    LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "10"))   # 依 API 配額設定，0 表示不限制
+    USE_RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "true").lower() == "true"     # 同一份契約重送時直接回傳上次結果
+    RESPONSE_CACHE_PATH = "response_cache.db"
+    RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    RESPONSE_CACHE_MAX_MB = 64
+    USE_NEAR_DUPLICATE_REUSE = os.getenv("NEAR_DUPLICATE_REUSE", "true").lower() == "true"  # 相近契約只重審變動條款
+    NEAR_DUPLICATE_INDEX_PATH = "review_history.jsonl"
+    NEAR_DUPLICATE_THRESHOLD = 0.6             # MinHash 估計的 Jaccard 相似度門檻
+    NEAR_DUPLICATE_MAX_ENTRIES = 2000
+    USE_PRESCREEN = os.getenv("PRESCREEN", "true").lower() == "true"      # 規則初篩：立即回報疑似違規並提示 LLM 重點條款
+    PRESCREEN_SKIP_LLM = os.getenv("PRESCREEN_SKIP_LLM", "never")         # never 或 clean（完全沒有相關關鍵字時不呼叫 LLM）
+    MIN_MONTHLY_WAGE = 28590                   # 基本工資（月薪）
+    MIN_HOURLY_WAGE = 190                      # 基本工資（時薪）
+    KB_UPSERT_BATCH_SIZE = 500                 # 每批寫入向量庫的切塊數
+    USE_EMBEDDING_CACHE = True                 # 已算過的向量存到磁碟，避免重複嵌入
+    EMBEDDING_CACHE_DIR = "embedding_cache"
+    EMBEDDING_CACHE_MAX_ENTRIES = 200000       # 超過上限時淘汰最久沒用到的
+    EMBEDDING_CACHE_DTYPE = "float16"          # float16 省一半空間，float32 較精確
     USE_4BIT_QUANTIZATION = False            # 註解掉，API 不需要量化
+    WORKER_HOST = os.getenv("REVIEW_WORKER_HOST", "127.0.0.1")   # 常駐審查服務位址
+    WORKER_PORT = int(os.getenv("REVIEW_WORKER_PORT", "8765"))
 
 class LaborContractReviewSystem:               # 外籍勞工契約審查
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, llm=None, embeddings=None):
         self.config = config
         self.embeddings = None
         self.llm = None
-        self.vector_db = None
+        self._vector_db = None
         self.qa_chain = None
+        self.embedding_cache = None
+        self.numpy_index = None
+        self.lexical_index = None
+        self._index_lock = threading.RLock()   # 批次審查時多個執行緒會同時第一次載入索引
+        self.clause_cache = ClauseHitCache(config.CLAUSE_CACHE_MAX_ENTRIES)
+        self.context_stats = {"requests": 0, "tokens_before": 0, "tokens_after": 0}
+        self.prescreener = None
+        if config.USE_PRESCREEN:
+            self.prescreener = Prescreener(config.MIN_MONTHLY_WAGE, config.MIN_HOURLY_WAGE)
+        self.review_history = None
+        if config.USE_NEAR_DUPLICATE_REUSE:
+            self.review_history = NearDuplicateIndex(
+                config.NEAR_DUPLICATE_INDEX_PATH,
+                MinHasher(),
+                max_entries=config.NEAR_DUPLICATE_MAX_ENTRIES
+            )
+        self.response_cache = None
+        if config.USE_RESPONSE_CACHE:
+            self.response_cache = ResponseCache(
+                config.RESPONSE_CACHE_PATH,
+                ttl_seconds=config.RESPONSE_CACHE_TTL_SECONDS,
+                max_bytes=config.RESPONSE_CACHE_MAX_MB * 1024 * 1024
+            )
         os.makedirs(config.DOCUMENTS_DIR, exist_ok=True)
         os.makedirs(config.CONTRACTS_DIR, exist_ok=True)
-        self._init_embeddings()
-        self._init_llm()
+        if embeddings is not None:             # 測試或壓測時可注入假的向量模型與 LLM
+            self.embeddings = embeddings
+        else:
+            with profiler.timed("初始化向量模型"):
+                self._init_embeddings()
+        if llm is not None:
+            self.llm = llm
+        else:
+            with profiler.timed("初始化 LLM 客戶端"):
+                self._init_llm()
+
+    @property
+    def vector_db(self):                       # 用到 Chroma 時才開啟；NumPy 索引為最新時完全不載入 Chroma
+        if self._vector_db is None:
+            with self._index_lock:
+                if self._vector_db is None:
+                    self._open_vector_db()
+        return self._vector_db
     
     def _init_embeddings(self):
         print(f"載入向量模型")
+        HuggingFaceEmbeddings = profiler.lazy_import("langchain_community.embeddings", "HuggingFaceEmbeddings")
         max_retries = 3
         for attempt in range(max_retries):
             try:
@@ -72,7 +185,25 @@ class LaborContractReviewSystem:               # 外籍勞工契約審查
                     time.sleep(5)
                 else:
                     raise
+        if self.config.USE_EMBEDDING_CACHE:
+            self.embedding_cache = EmbeddingCache(
+                self.config.EMBEDDING_CACHE_DIR,
+                max_entries=self.config.EMBEDDING_CACHE_MAX_ENTRIES,
+                dtype=self.config.EMBEDDING_CACHE_DTYPE
+            )
+            self.embeddings = CachedEmbeddings(
+                self.embeddings,
+                self.embedding_cache,
+                model_name=self.config.EMBEDDING_MODEL_NAME,
+                normalize=True
+            )
+            print(f"向量快取: {self.embedding_cache.stats()['entries']} 筆")
         print("Successful\n")
+
+    def embedding_cache_stats(self) -> Dict[str, Any]:
+        if self.embedding_cache is None:
+            return {}
+        return self.embedding_cache.stats()
     
     def _init_llm(self):
         print(f"載入 Gemini LLM API")
@@ -80,11 +211,12 @@ class LaborContractReviewSystem:               # 外籍勞工契約審查
             if not self.config.GEMINI_API_KEY:
                 raise ValueError("請在 .env 檔案中設定 GEMINI_API_KEY")
             
+            ChatGoogleGenerativeAI = profiler.lazy_import("langchain_google_genai", "ChatGoogleGenerativeAI")
             self.llm = ChatGoogleGenerativeAI(
                 model=self.config.GEMINI_MODEL_NAME,
                 google_api_key=self.config.GEMINI_API_KEY,
-                temperature=0.5,
-                max_output_tokens=2048,
+                temperature=self.config.LLM_TEMPERATURE,
+                max_output_tokens=self.config.LLM_MAX_OUTPUT_TOKENS,
                 convert_system_message_to_human=True  
             )
             print(f"Gemini API 連接成功 (模型: {self.config.GEMINI_MODEL_NAME})\n")
@@ -95,6 +227,9 @@ class LaborContractReviewSystem:               # 外籍勞工契約審查
     
     """def _init_llm(self):
         print(f"載入LLM")
+        import torch
+        from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
+        from langchain_community.llms import HuggingFacePipeline
         max_retries = 3
         for attempt in range(max_retries):
             try:
@@ -141,46 +276,60 @@ class LaborContractReviewSystem:               # 外籍勞工契約審查
     def load_law_json(self) -> List[Document]:
         print(f"載入JSON")
         documents = []
-        json_files = list(Path(self.config.DOCUMENTS_DIR).glob('*.json'))
+        json_files = self._list_json_sources()
         if not json_files:
             print(f"在 {self.config.DOCUMENTS_DIR} 中找不到任何 JSON 檔案")
             return []
         print(f"找到 {len(json_files)} 個 JSON 檔案")
 
         for json_path in json_files:
-            try:
-                print(f"正在讀取:  {json_path.name}")
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    law_data = json.load(f)
-                if isinstance(law_data, list):
-                    for item in law_data:
+            documents.extend(self._load_json_file(json_path))
+        return documents
+
+    def _list_json_sources(self) -> List[Path]:
+        return sorted(Path(self.config.DOCUMENTS_DIR).glob('*.json'))
+
+    def _list_text_sources(self) -> List[Path]:
+        return sorted(Path(self.config.DOCUMENTS_DIR).glob('**/*.txt'))
+
+    def _load_json_file(self, json_path: Path) -> List[Document]:
+        try:
+            return self._read_json_file(json_path)
+        except Exception as e:
+            print(f"讀取 {json_path.name} 失敗: {e}")
+            return []
+
+    def _read_json_file(self, json_path: Path) -> List[Document]:  # 讀取失敗時拋出例外
+        documents = []
+        print(f"正在讀取:  {json_path.name}")
+        with open(json_path, 'r', encoding='utf-8') as f:
+            law_data = json.load(f)
+        if isinstance(law_data, list):
+            for item in law_data:
+                content = self._format_law_item(item)
+                doc = Document(
+                    page_content=content,
+                    metadata={
+                        "source": json_path.name, 
+                        "type": "labor_law",
+                        **item  
+                    }
+                )
+                documents.append(doc)
+        elif isinstance(law_data, dict):
+            for law_name, law_content in law_data.items():
+                if isinstance(law_content, list):
+                    for item in law_content:
                         content = self._format_law_item(item)
                         doc = Document(
                             page_content=content,
                             metadata={
-                                "source": json_path.name, 
-                                "type": "labor_law",
-                                **item  
+                                "source":  json_path.name, 
+                                "law_name": law_name,
+                                "type": "labor_law"
                             }
                         )
                         documents.append(doc)
-                elif isinstance(law_data, dict):
-                    for law_name, law_content in law_data.items():
-                        if isinstance(law_content, list):
-                            for item in law_content:
-                                content = self._format_law_item(item)
-                                doc = Document(
-                                    page_content=content,
-                                    metadata={
-                                        "source":  json_path.name, 
-                                        "law_name": law_name,
-                                        "type": "labor_law"
-                                    }
-                                )
-                                documents.append(doc)
-            except Exception as e:
-                print(f"讀取 {json_path.name} 失敗: {e}")
-                continue 
         return documents
     
     def _format_law_item(self, item: Dict) -> str:  # 格式化法規條文
@@ -206,62 +355,340 @@ class LaborContractReviewSystem:               # 外籍勞工契約審查
             parts.append(text)
         return '\n'.join(parts)
     
-    def build_law_knowledge_base(self):
-        print("建立法規知識庫")
-        law_documents = self.load_law_json()
-        if os.path.exists(self.config.DOCUMENTS_DIR):
-            print(f"查詢其他法規文件")
-            loader = DirectoryLoader(
-                self.config.DOCUMENTS_DIR,
-                glob="**/*.txt",
-                loader_cls=TextLoader,
-                loader_kwargs={"encoding": "utf-8"}
-            )
-            text_documents = loader.load()
-            print(f"總共 {len(text_documents)} 份其它文本文件")
-            law_documents.extend(text_documents)
-        if not law_documents:
-            raise ValueError("沒有找到任何法規")
-        print(f"\n總共 {len(law_documents)} 份法規文件")
-        text_splitter = RecursiveCharacterTextSplitter(   # 分割文本
+    def _create_text_splitter(self) -> "RecursiveCharacterTextSplitter":
+        RecursiveCharacterTextSplitter = profiler.lazy_import("langchain_text_splitters", "RecursiveCharacterTextSplitter")
+        return RecursiveCharacterTextSplitter(   # 分割文本
             chunk_size=self.config.CHUNK_SIZE,
             chunk_overlap=self.config.CHUNK_OVERLAP,
             separators=["\n\n", "\n", "。", "；", "，", " ", ""],
             length_function=len,
             is_separator_regex=False
         )
-        texts = text_splitter.split_documents(law_documents)
-        self.vector_db = Chroma.from_documents(          # 4.創建向量庫
-            documents=texts,
-            embedding=self.embeddings,
-            persist_directory=self.config.VECTOR_DB_DIR,
-            collection_name="law_collection"
-        )
+
+    def _manifest_signature(self) -> Dict[str, Any]:  # 這些設定改變時必須整個重建
+        return {
+            "embedding_model": self.config.EMBEDDING_MODEL_NAME,
+            "chunk_size": self.config.CHUNK_SIZE,
+            "chunk_overlap": self.config.CHUNK_OVERLAP,
+        }
+
+    def _collect_law_sources(self) -> Dict[str, Path]:
+        sources = {}
+        for path in self._list_json_sources() + self._list_text_sources():
+            sources[path.as_posix()] = path
+        return sources
+
+    def _load_source_documents(self, path: Path) -> List[Document]:  # 讀取失敗時拋出例外，由呼叫端決定是否略過
+        if path.suffix == '.json':
+            return self._read_json_file(path)
+        TextLoader = profiler.lazy_import("langchain_community.document_loaders", "TextLoader")
+        return TextLoader(str(path), encoding="utf-8").load()
+
+    def _open_vector_db(self):
+        Chroma = profiler.lazy_import("langchain_chroma", "Chroma")
+        with profiler.timed("開啟 Chroma 向量庫"):
+            self._vector_db = Chroma(
+                persist_directory=self.config.VECTOR_DB_DIR,
+                embedding_function=self.embeddings,
+                collection_name="law_collection"
+            )
+
+    def build_law_knowledge_base(self):        # 增量重建：只嵌入新增或變動的切塊
+        print("建立法規知識庫")
+        sources = self._collect_law_sources()
+        if not sources:
+            raise ValueError("沒有找到任何法規")
+        source_hashes = {source: hash_file(str(path)) for source, path in sources.items()}
+
+        manifest = KnowledgeBaseManifest.load(self.config.VECTOR_DB_DIR, self._manifest_signature())
+        previous_signature = ids_signature(manifest.all_chunk_ids()) if manifest.compatible else None
+        self._open_vector_db()
+        if not manifest.compatible:            # 沒有 manifest 或設定改變：清空後完整重建，避免重複向量
+            print("知識庫設定不同或缺少 manifest，完整重建")
+            self.vector_db.delete_collection()
+            self._open_vector_db()
+
+        changed, removed = manifest.changed_sources(source_hashes)
+        print(f"總共 {len(sources)} 份法規文件，{len(changed)} 份新增或變動，{len(removed)} 份已刪除")
+
+        text_splitter = self._create_text_splitter()
+        ids_to_delete: List[str] = []
+        docs_to_add: List[Document] = []
+        ids_to_add: List[str] = []
+        unchanged_chunks = 0
+        for source in removed:
+            ids_to_delete.extend(manifest.chunk_ids(source))
+            manifest.remove_source(source)
+        failed = 0
+        for source in changed:
+            try:
+                documents = self._load_source_documents(sources[source])
+            except Exception as e:             # 保留舊的切塊與 manifest 紀錄，下次重建時再試
+                print(f"讀取 {source} 失敗，沿用知識庫中的舊內容: {e}")
+                failed += 1
+                continue
+            chunks = text_splitter.split_documents(documents)
+            chunk_ids = make_chunk_ids(source, [chunk.page_content for chunk in chunks])
+            old_ids = set(manifest.chunk_ids(source))
+            new_ids = set(chunk_ids)
+            ids_to_delete.extend(old_ids - new_ids)
+            for chunk, chunk_id in zip(chunks, chunk_ids):
+                if chunk_id in old_ids:
+                    unchanged_chunks += 1
+                    continue
+                chunk.metadata["chunk_id"] = chunk_id
+                docs_to_add.append(chunk)
+                ids_to_add.append(chunk_id)
+            manifest.set_source(source, source_hashes[source], chunk_ids)
+
+        if ids_to_delete:
+            self.vector_db.delete(ids=ids_to_delete)
+        batch_size = self.config.KB_UPSERT_BATCH_SIZE
+        for start in range(0, len(docs_to_add), batch_size):  # 4.寫入向量庫（相同 ID 會覆寫）
+            self.vector_db.add_documents(
+                documents=docs_to_add[start:start + batch_size],
+                ids=ids_to_add[start:start + batch_size]
+            )
+        manifest.save()
+        self._sync_lexical_index(previous_signature, ids_signature(manifest.all_chunk_ids()),
+                                 ids_to_delete, ids_to_add, docs_to_add)
+        print(f"新增 {len(ids_to_add)} 個切塊，刪除 {len(ids_to_delete)} 個，沿用 {unchanged_chunks} 個"
+              + (f"，{failed} 份法規讀取失敗" if failed else ""))
+        if self.embedding_cache is not None:
+            self.embedding_cache.flush()
+            stats = self.embedding_cache.stats()
+            print(f"向量快取命中率: {stats['hit_rate']:.1%} ({stats['hits']}/{stats['hits'] + stats['misses']})")
         self._create_qa_chain()
         print(f"\n知識庫建立完成")
+
+    def knowledge_base_is_stale(self) -> bool:  # 法規文件或設定是否與 manifest 不同
+        manifest = KnowledgeBaseManifest.load(self.config.VECTOR_DB_DIR, self._manifest_signature())
+        if not manifest.compatible:
+            return True
+        source_hashes = {
+            source: hash_file(str(path)) for source, path in self._collect_law_sources().items()
+        }
+        changed, removed = manifest.changed_sources(source_hashes)
+        return bool(changed or removed)
     
-    def _create_qa_chain(self):                         # 問答檢索鏈
-        self.qa_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            chain_type="stuff",
-            retriever=self.vector_db.as_retriever(
+    def _load_numpy_index(self) -> NumpyVectorIndex:  # 從 Chroma 匯出矩陣，切塊有變動時重新匯出
+        manifest = KnowledgeBaseManifest.load(self.config.VECTOR_DB_DIR, self._manifest_signature())
+        expected = ids_signature(manifest.all_chunk_ids())
+        index = NumpyVectorIndex.load(self.config.NUMPY_INDEX_DIR)
+        if index is None or index.signature != expected:
+            with file_lock(self.config.NUMPY_INDEX_DIR):  # 其他 law_main.py 可能同時在匯出，取得鎖後再確認一次
+                index = NumpyVectorIndex.load(self.config.NUMPY_INDEX_DIR)
+                if index is None or index.signature != expected:
+                    print("匯出 NumPy 檢索索引")
+                    NumpyVectorIndex.from_chroma(self.vector_db).save(self.config.NUMPY_INDEX_DIR)
+                    index = NumpyVectorIndex.load(self.config.NUMPY_INDEX_DIR)
+        print(f"NumPy 檢索索引: {len(index)} 個切塊")
+        return index
+
+    def _sync_lexical_index(self, previous_signature: Optional[str], signature: str,
+                            ids_to_delete: List[str], ids_to_add: List[str], docs_to_add: List[Document]):
+        # 與向量庫同步更新關鍵字索引；舊索引不存在或對不上時整個從 Chroma 重建
+        with file_lock(self.config.LEXICAL_INDEX_PATH):
+            index = LexicalIndex.load(self.config.LEXICAL_INDEX_PATH) if previous_signature else None
+            if index is None or index.signature != previous_signature:
+                self.lexical_index = self._rebuild_lexical_index(signature)
+                return
+            index.remove(ids_to_delete)
+            for chunk_id, doc in zip(ids_to_add, docs_to_add):
+                index.add(chunk_id, doc.page_content, doc.metadata)
+            index.signature = signature
+            index.save(self.config.LEXICAL_INDEX_PATH)
+            self.lexical_index = index
+
+    def _rebuild_lexical_index(self, signature: str) -> LexicalIndex:  # 呼叫端需持有 LEXICAL_INDEX_PATH 的檔案鎖
+        print("建立關鍵字索引")
+        data = self.vector_db.get(include=["documents", "metadatas"])
+        index = LexicalIndex()
+        for chunk_id, text, metadata in zip(data["ids"], data["documents"], data["metadatas"]):
+            index.add(chunk_id, text or "", metadata or {})
+        index.signature = signature
+        index.save(self.config.LEXICAL_INDEX_PATH)
+        return index
+
+    def _load_lexical_index(self) -> LexicalIndex:
+        with self._index_lock:
+            if self.lexical_index is None:
+                manifest = KnowledgeBaseManifest.load(self.config.VECTOR_DB_DIR, self._manifest_signature())
+                expected = ids_signature(manifest.all_chunk_ids())
+                index = LexicalIndex.load(self.config.LEXICAL_INDEX_PATH)
+                if index is None or index.signature != expected:
+                    with file_lock(self.config.LEXICAL_INDEX_PATH):
+                        index = LexicalIndex.load(self.config.LEXICAL_INDEX_PATH)
+                        if index is None or index.signature != expected:
+                            index = self._rebuild_lexical_index(expected)
+                print(f"關鍵字索引: {len(index)} 個切塊")
+                self.lexical_index = index
+            return self.lexical_index
+
+    def _load_clause_indexes(self):            # 條款檢索用的索引只載入一次（多個執行緒同時呼叫也安全）
+        with self._index_lock:
+            if self.numpy_index is None:
+                self.numpy_index = self._load_numpy_index()
+            if self.config.USE_HYBRID_RETRIEVAL:
+                self._load_lexical_index()
+
+    def _create_retriever(self):
+        k = self.config.HYBRID_CANDIDATE_K if self.config.USE_HYBRID_RETRIEVAL else self.config.TOP_K
+        if self.config.RETRIEVER_BACKEND == "numpy":
+            with self._index_lock:
+                self.numpy_index = self._load_numpy_index()
+            dense = NumpyRetriever(index=self.numpy_index, embeddings=self.embeddings, k=k)
+        else:
+            dense = self.vector_db.as_retriever(
                 search_type="similarity",
-                search_kwargs={"k": self.config.TOP_K}
-            ),
-            return_source_documents=True,
-            verbose=False
+                search_kwargs={"k": k}
+            )
+        if not self.config.USE_HYBRID_RETRIEVAL:
+            return dense
+        return HybridRetriever(
+            dense=dense,
+            lexical_loader=self._load_lexical_index,  # 第一次檢索時才載入
+            k=self.config.TOP_K,
+            candidate_k=self.config.HYBRID_CANDIDATE_K,
+            rrf_k=self.config.RRF_K
+        )
+
+    def retrieve_for_contract(self, contract_content: str) -> List[Document]:
+        # 契約切成條款，一次批次嵌入並對整個法規矩陣做一次內積，再合併各條款命中的法規
+        clauses = split_clauses(contract_content)
+        if not clauses:
+            return []
+        self._load_clause_indexes()
+        lexical = self.lexical_index if self.config.USE_HYBRID_RETRIEVAL else None
+        clause_hits = retrieve_clause_hits(
+            clauses, self.numpy_index, self.embeddings, self.config.CLAUSE_TOP_K,
+            lexical=lexical, rrf_k=self.config.RRF_K, cache=self.clause_cache
         )
+        documents = []
+        for chunk_id in merge_clause_hits(clause_hits, self.config.CLAUSE_CONTEXT_MAX_CHUNKS):
+            doc = self.numpy_index.document_by_id(chunk_id)
+            if doc is None and lexical is not None:
+                doc = lexical.to_document(chunk_id)
+            if doc is not None:
+                documents.append(doc)
+        stats = self.clause_cache.stats()
+        print(f"{len(clauses)} 個條款，檢索到 {len(documents)} 條法規（條款快取命中率 {stats['hit_rate']:.1%}）")
+        return documents
+
+    def _llm_signature(self) -> Dict[str, Any]:  # 模型與生成參數，任一項改變就不沿用快取
+        return {
+            "model": getattr(self.llm, "model", None) or getattr(self.llm, "model_name", None) or type(self.llm).__name__,
+            "temperature": getattr(self.llm, "temperature", None),
+            "max_output_tokens": getattr(self.llm, "max_output_tokens", None),
+        }
+
+    def _response_cache_key(self, contract_content: str, question_index: int,
+                            documents: List[Document]) -> Optional[str]:
+        if self.response_cache is None:
+            return None
+        signature = self._llm_signature()
+        if self.prescreener is not None:       # 初篩規則會改變提示詞中的重點條款
+            signature["prescreen"] = PRESCREEN_RULES_VERSION
+        return make_cache_key(
+            contract_content,
+            self.config.PROMPT_TEMPLATE_VERSION,
+            question_index,
+            str(signature.pop("model")),
+            signature,
+            [document_key(doc) for doc in documents]
+        )
+
+    def _cached_answer(self, cache_key: Optional[str], documents: List[Document]) -> Optional[Dict[str, Any]]:
+        if cache_key is None:
+            return None
+        answer = self.response_cache.get(cache_key)
+        if answer is None:
+            return None
+        print("使用快取的審查結果")
+        return {"result": answer, "source_documents": documents}
+
+    def _store_answer(self, cache_key: Optional[str], result: Dict[str, Any]):
+        if cache_key is not None and result.get("result"):
+            self.response_cache.put(cache_key, result["result"])
+
+    def _pack_context(self, question: str, documents: List[Document]) -> List[Document]:
+        # 問題裡已含整份契約，剩下的預算才給法規
+        if not self.config.USE_CONTEXT_PACKING or not documents:
+            return documents
+        budget = max(self.config.CONTEXT_MIN_LAW_TOKENS, self.config.CONTEXT_TOKEN_BUDGET - estimate_tokens(question))
+        packed, stats = pack_context(documents, budget, self.config.CHUNK_OVERLAP * 2,
+                                     self.config.CONTEXT_DUPLICATE_THRESHOLD)
+        self.context_stats["requests"] += 1
+        self.context_stats["tokens_before"] += stats["tokens_before"]
+        self.context_stats["tokens_after"] += stats["tokens_after"]
+        print(f"法規內容 {stats['tokens_before']} → {stats['tokens_after']} tokens "
+              f"(省下 {stats['tokens_before'] - stats['tokens_after']}；切塊 {stats['chunks_in']} → {stats['chunks_out']}，"
+              f"合併 {stats['merged']}、重複 {stats['duplicates']}、超出預算 {stats['over_budget']})")
+        return packed
+
+    def response_cache_stats(self) -> Dict[str, Any]:
+        if self.response_cache is None:
+            return {}
+        return self.response_cache.stats()
+
+    def _answer_with_documents(self, question: str, documents: List[Document], callbacks,
+                               on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        # 直接把已檢索的法規交給 stuff chain，跳過 RetrievalQA 內建的檢索
+        if self.config.STREAM_LLM_OUTPUT and on_event:
+            stream = ViolationStream(on_event)
+            for chunk in self.llm.stream(self._format_stuff_prompt(question, documents),
+                                         config={"callbacks": callbacks}):  # token 事件由 ReviewEventHandler 送出
+                stream.feed(chunk_text(chunk))
+            return {"result": stream.close(), "source_documents": documents}
+        output = self.qa_chain.combine_documents_chain.invoke(
+            {"input_documents": documents, "question": question},
+            config={"callbacks": callbacks}
+        )
+        return {"result": output["output_text"], "source_documents": documents}
+
+    async def _aanswer_with_documents(self, question: str, documents: List[Document], callbacks,
+                                      on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        if self.config.STREAM_LLM_OUTPUT and on_event:
+            stream = ViolationStream(on_event)
+            async for chunk in self.llm.astream(self._format_stuff_prompt(question, documents),
+                                                config={"callbacks": callbacks}):
+                stream.feed(chunk_text(chunk))
+            return {"result": stream.close(), "source_documents": documents}
+        output = await self.qa_chain.combine_documents_chain.ainvoke(
+            {"input_documents": documents, "question": question},
+            config={"callbacks": callbacks}
+        )
+        return {"result": output["output_text"], "source_documents": documents}
+
+    def _format_stuff_prompt(self, question: str, documents: List[Document]):
+        # 與 stuff chain 組出相同的 prompt，才能直接對 LLM 串流
+        combine = self.qa_chain.combine_documents_chain
+        context = combine.document_separator.join(
+            format_document(doc, combine.document_prompt) for doc in documents
+        )
+        return combine.llm_chain.prompt.format_prompt(
+            **{combine.document_variable_name: context, "question": question}
+        )
+
+    def _create_qa_chain(self):                         # 問答檢索鏈
+        RetrievalQA = profiler.lazy_import("langchain_classic.chains", "RetrievalQA")
+        with profiler.timed("建立檢索器與問答鏈"):
+            self.qa_chain = RetrievalQA.from_chain_type(
+                llm=self.llm,
+                chain_type="stuff",
+                retriever=self._create_retriever(),
+                return_source_documents=True,
+                verbose=False
+            )
     
     def load_existing_knowledge_base(self) -> bool:
         if os.path.exists(self.config.VECTOR_DB_DIR):
             print(f"\n已經有現有知識庫")
             try:
-                self.vector_db = Chroma(
-                    persist_directory=self.config.VECTOR_DB_DIR,
-                    embedding_function=self.embeddings,
-                    collection_name="law_collection"
-                )
-                self._create_qa_chain()
+                if self.knowledge_base_is_stale():  # 法規有更新時交給增量重建
+                    print("法規文件已更新，需要同步知識庫\n")
+                    return False
+                self._create_qa_chain()             # Chroma 由 vector_db 在需要時開啟
                 print("Successful\n")
                 return True
             except Exception as e:
@@ -269,15 +696,115 @@ class LaborContractReviewSystem:               # 外籍勞工契約審查
                 return False
         return False
     
-    def review_contract(self, contract_path: str) -> Dict[str, Any]:
+    def review_contract(self, contract_path: str,
+                        on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> ReviewResult:
         print(f"審查契約")
         try:  # 讀取契約內容
             with open(contract_path, 'r', encoding='utf-8') as f:
                 contract_content = f.read()
         except Exception as e:
-            return {"Failed ": f"{e}"}
+            return ReviewResult(contract_path=contract_path, errors=[str(e)])
         
-        review_questions = [          # 構造審查問題(可新增更多角度最多五個)
+        prescreen = self._prescreen(contract_content, on_event)
+        skip_llm = self._should_skip_llm(prescreen)
+        plan = self._plan_near_duplicate_reuse(contract_content)
+        review_text = plan.review_text if plan and not plan.fully_reused else contract_content
+        review_questions = self._build_review_questions(review_text, prescreen.focus_hint(review_text) if prescreen else "")
+        results = self._new_review_results(contract_path, contract_content)
+        clause_documents = None if skip_llm else self._retrieve_clause_documents(review_text, on_event)
+
+        for idx, question in enumerate(review_questions, 1):        # 執行多角度審查
+            print(f"執行審查")
+            try:
+                start_time = time.time()
+                callbacks = [ReviewEventHandler(on_event)] if on_event else []
+                if plan and plan.fully_reused:                      # 條款都審查過，直接沿用
+                    result = {"result": plan.merge(idx, None), "source_documents": clause_documents or []}
+                elif skip_llm:                                      # 規則初篩沒有任何相關條款，依設定不呼叫 LLM
+                    result = {"result": NO_VIOLATION_ANSWER, "source_documents": []}
+                else:
+                    documents = clause_documents or self.qa_chain.retriever.invoke(  # RAG：找法條
+                        question, config={"callbacks": callbacks}
+                    )
+                    documents = self._pack_context(question, documents)
+                    cache_key = self._response_cache_key(review_text, idx, documents)
+                    result = self._cached_answer(cache_key, documents)
+                    if result is None:
+                        result = self._answer_with_documents(question, documents, callbacks, on_event)  # LLM：寫法律分析
+                        self._store_answer(cache_key, result)
+                    if plan:
+                        result = {**result, "result": plan.merge(idx, result["result"])}
+                self._record_review(results, idx, result, time.time() - start_time)
+                print(f"Successful\n")
+            except Exception as e:
+                self._record_review_error(results, idx, e)
+        self._remember_review(contract_content, results)
+        return ReviewResult.from_reviews(results)       # 驗證每個回答並轉成結構化結果
+
+    async def areview_contract(self, contract_path: str,
+                               on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                               limiter: Optional[TokenBucket] = None) -> ReviewResult:
+        # 與 review_contract 相同，但 LLM 以非同步呼叫，等待網路時可以同時處理其他契約
+        try:
+            with open(contract_path, 'r', encoding='utf-8') as f:
+                contract_content = f.read()
+        except Exception as e:
+            return ReviewResult(contract_path=contract_path, errors=[str(e)])
+
+        prescreen = self._prescreen(contract_content, on_event)
+        skip_llm = self._should_skip_llm(prescreen)
+        # 嵌入、檢索與快取讀寫會占住 CPU 或磁碟，放到執行緒裡，其他契約的 LLM 呼叫才不會被卡住
+        plan = await asyncio.to_thread(self._plan_near_duplicate_reuse, contract_content)
+        review_text = plan.review_text if plan and not plan.fully_reused else contract_content
+        review_questions = self._build_review_questions(review_text, prescreen.focus_hint(review_text) if prescreen else "")
+        results = self._new_review_results(contract_path, contract_content)
+        clause_documents = None if skip_llm else await asyncio.to_thread(
+            self._retrieve_clause_documents, review_text, on_event
+        )
+
+        for idx, question in enumerate(review_questions, 1):
+            try:
+                start_time = time.time()
+                callbacks = [ReviewEventHandler(on_event)] if on_event else []
+                if plan and plan.fully_reused:
+                    result = {"result": plan.merge(idx, None), "source_documents": clause_documents or []}
+                elif skip_llm:
+                    result = {"result": NO_VIOLATION_ANSWER, "source_documents": []}
+                else:
+                    documents = clause_documents or await self.qa_chain.retriever.ainvoke(
+                        question, config={"callbacks": callbacks}
+                    )
+                    documents = self._pack_context(question, documents)
+                    cache_key = self._response_cache_key(review_text, idx, documents)
+                    result = await asyncio.to_thread(self._cached_answer, cache_key, documents)
+                    if result is None:
+                        if limiter is not None:
+                            await limiter.acquire()
+                        result = await self._aanswer_with_documents(question, documents, callbacks, on_event)
+                        await asyncio.to_thread(self._store_answer, cache_key, result)
+                    if plan:
+                        result = {**result, "result": plan.merge(idx, result["result"])}
+                self._record_review(results, idx, result, time.time() - start_time)
+            except Exception as e:
+                self._record_review_error(results, idx, e)
+        await asyncio.to_thread(self._remember_review, contract_content, results)
+        return ReviewResult.from_reviews(results)       # 驗證每個回答並轉成結構化結果
+
+    def _prescreen(self, contract_content: str,
+                   on_event: Optional[Callable[[Dict[str, Any]], None]]) -> Optional[PrescreenResult]:
+        if self.prescreener is None:
+            return None
+        result = self.prescreener.screen(contract_content)
+        print(f"規則初篩: {len(result.findings)} 項疑似違規 ({result.elapsed_ms:.2f} ms)")
+        if on_event:
+            on_event(result.to_event())        # 初步結果先送給使用者，不必等 LLM
+        return result
+
+    def _should_skip_llm(self, prescreen: Optional[PrescreenResult]) -> bool:
+        return prescreen is not None and self.config.PRESCREEN_SKIP_LLM == "clean" and prescreen.is_clean
+
+    def _build_review_questions(self, contract_content: str, focus_hint: str = "") -> List[str]:
+        return [                      # 構造審查問題(可新增更多角度最多五個)
             f"""
                 角色設定：
                 你是一位精通台灣《勞動基準法》與《就業服務法》的專業律師，專門負責審查外籍勞工聘僱契約。
@@ -288,6 +815,8 @@ class LaborContractReviewSystem:               # 外籍勞工契約審查
                 待審查契約：
                 {contract_content}
 
+                {focus_hint}
+
                 請依照以下格式輸出（若無違法項目，請回答「本合約符合現行法規」）：
 
                 ---
@@ -310,50 +839,91 @@ class LaborContractReviewSystem:               # 外籍勞工契約審查
                 3.修改建議必須符合台灣現行法律標準。
             """
         ]
-        results = {
+
+    def _history_signature(self) -> Dict[str, Any]:  # 提示詞或模型改變時不沿用舊的審查結果
+        return {"template": self.config.PROMPT_TEMPLATE_VERSION, **self._llm_signature()}
+
+    def _plan_near_duplicate_reuse(self, contract_content: str) -> Optional[ReusePlan]:
+        if self.review_history is None:
+            return None
+        signature = self.review_history.hasher.signature(contract_content)
+        match = self.review_history.query(signature, self.config.NEAR_DUPLICATE_THRESHOLD)
+        if match is None:
+            return None
+        entry_id, similarity, prior = match
+        if prior.get("llm") != self._history_signature():
+            return None
+        plan = plan_reuse(split_clauses(contract_content), prior, entry_id, similarity)
+        if plan is not None:
+            print(f"與先前審查過的契約相似度 {similarity:.0%}，只重審 {len(plan.changed_clauses)} 個變動條款")
+        return plan
+
+    def _remember_review(self, contract_content: str, results: Dict[str, Any]):
+        if self.review_history is None or any("error" in review for review in results["reviews"]):
+            return
+        normalized = normalize_contract_text(contract_content)
+        self.review_history.add(
+            hashlib.sha256(normalized.encode("utf-8")).hexdigest(),
+            self.review_history.hasher.signature(contract_content),
+            {
+                "clauses": [normalize_contract_text(clause) for clause in split_clauses(contract_content)],
+                "answers": [review["answer"] for review in results["reviews"]],
+                "llm": self._history_signature(),
+            }
+        )
+
+    def _new_review_results(self, contract_path: str, contract_content: str) -> Dict[str, Any]:
+        return {
             "contract_path": contract_path,
             "contract_length": len(contract_content),
             "reviews": [],
             "related_laws": []
         }
+
+    def _retrieve_clause_documents(self, contract_content: str,
+                                   on_event: Optional[Callable[[Dict[str, Any]], None]]) -> Optional[List[Document]]:
+        if not self.config.USE_CLAUSE_RETRIEVAL:
+            return None
+        try:
+            clause_documents = self.retrieve_for_contract(contract_content)
+        except Exception as e:
+            print(f"條款檢索失敗，改用整份契約檢索: {e}")
+            return None
+        if on_event:
+            on_event({"stage": "retrieval_done", "documents": len(clause_documents)})
+        return clause_documents
+
+    def _record_review(self, results: Dict[str, Any], idx: int, result: Dict[str, Any], elapsed: float):
+        answer = result.get("result", "")                   # LLM 回答
+        answer = self._clean_answer(answer)
         
-        for idx, question in enumerate(review_questions, 1):        # 執行多角度審查
-            print(f"執行審查")
-            try:
-                start_time = time.time()
-                result = self.qa_chain.invoke({"query": question})  # RAG：找法條  LLM：寫法律分析
-                end_time = time.time()
-                answer = result.get("result", "")                   # LLM 回答
-                answer = self._clean_answer(answer)
-                
-                review_item = {
-                    "question_type": f"審查角度 {idx}",
-                    "answer": answer,
-                    "processing_time": end_time - start_time,
-                    "source_laws": []
-                }
-                
-                unique_law_set = set() 
-                for doc in result.get("source_documents", []):
-                    law_info = {
-                        "content": doc.page_content[: 300],
-                        "source": doc.metadata.get("source", "Unknown"),
-                        "metadata": doc.metadata
-                    }
-                    review_item["source_laws"].append(law_info)  # 每一個審查角度自己參考的法規文件
-                    unique_key = f"{law_info['source']}:{id(doc)}"
-                    if unique_key not in unique_law_set:         # 所有審查角度用到的法規，但不重複
-                        unique_law_set.add(unique_key)
-                        results["related_laws"].append(law_info)
-                results["reviews"].append(review_item)
-                print(f"Successful\n")
-            except Exception as e:
-                print(f"Failed: {e}\n")
-                results["reviews"].append({
-                    "question_type":  f"審查角度 {idx}",
-                    "error": str(e)
-                })
-        return results
+        review_item = {
+            "question_type": f"審查角度 {idx}",
+            "answer": answer,
+            "processing_time": elapsed,
+            "source_laws": []
+        }
+        
+        unique_law_set = set() 
+        for doc in result.get("source_documents", []):
+            law_info = {
+                "content": doc.page_content[: 300],
+                "source": doc.metadata.get("source", "Unknown"),
+                "metadata": doc.metadata
+            }
+            review_item["source_laws"].append(law_info)  # 每一個審查角度自己參考的法規文件
+            unique_key = f"{law_info['source']}:{id(doc)}"
+            if unique_key not in unique_law_set:         # 所有審查角度用到的法規，但不重複
+                unique_law_set.add(unique_key)
+                results["related_laws"].append(law_info)
+        results["reviews"].append(review_item)
+
+    def _record_review_error(self, results: Dict[str, Any], idx: int, error: Exception):
+        print(f"Failed: {error}\n")
+        results["reviews"].append({
+            "question_type":  f"審查角度 {idx}",
+            "error": str(error)
+        })
     
     def _clean_answer(self, answer: str) -> str:
         if "Use the following pieces of context" in answer:
@@ -381,6 +951,9 @@ class LaborContractReviewSystem:               # 外籍勞工契約審查
             return []
         print(f"找到 {len(contract_files)} 份契約\n")
 
+        if self.config.BATCH_CONCURRENCY > 1:  # Gemini 呼叫大多在等網路，同時送出多份契約
+            return asyncio.run(self.abatch_review_contracts(contract_files))
+
         all_results = []
         for idx, contract_file in enumerate(contract_files, 1):
             print(f"審查進度:  {idx}/{len(contract_files)}")            
@@ -388,60 +961,81 @@ class LaborContractReviewSystem:               # 外籍勞工契約審查
             all_results.append(result)
 
         return all_results
+
+    async def abatch_review_contracts(self, contract_files: List[Path], concurrency: int = None,
+                                      requests_per_minute: float = None) -> List[ReviewResult]:
+        if concurrency is None:
+            concurrency = self.config.BATCH_CONCURRENCY
+        if requests_per_minute is None:        # 0 表示不限制
+            requests_per_minute = self.config.LLM_REQUESTS_PER_MINUTE
+        # 容量等於同時審查的份數，開始時每份契約都能立刻送出第一個請求
+        limiter = TokenBucket(requests_per_minute, burst=concurrency) if requests_per_minute > 0 else None
+        if limiter is None:
+            print(f"同時審查 {concurrency} 份，不限制 LLM 呼叫次數")
+        else:
+            print(f"同時審查 {concurrency} 份，每分鐘最多 {requests_per_minute:g} 次 LLM 呼叫")
+        if self.config.USE_CLAUSE_RETRIEVAL:
+            self._load_clause_indexes()        # 先載入索引，各契約的檢索執行緒不必搶著初始化
+        done = 0
+
+        async def review(idx: int, contract_file: Path) -> ReviewResult:
+            nonlocal done
+            result = await self.areview_contract(str(contract_file), limiter=limiter)
+            done += 1
+            print(f"審查進度:  {done}/{len(contract_files)} ({contract_file.name})")
+            return result
+
+        def on_error(contract_file: Path, error: Exception) -> ReviewResult:
+            print(f"Failed: {contract_file.name}: {error}")
+            return ReviewResult(contract_path=str(contract_file), errors=[str(error)])
+
+        return await run_ordered(contract_files, review, concurrency, on_error)  # 結果順序與輸入相同
     
-    def generate_review_report(self, results: List[Dict], output_path: str = "report.txt"):
+    def generate_review_report(self, results: List[ReviewResult], output_path: str = "report.txt"):
         print(f"生成審查報告")
         with open(output_path, 'w', encoding='utf-8') as f:
-            f.write("="*80 + "\n")
-            f.write("外籍勞工聘僱契約審查報告\n")
-            f.write(f"審查日期：{time.strftime('%Y年%m月%d日')}\n")
-            f.write("="*80 + "\n\n")
-            for contract_idx, result in enumerate(results, 1):
-                if 'error' in result:
-                    f.write(f"契約 {contract_idx} 分析失敗: {result['error']}\n\n")
-                    continue
-                f.write(f"契約檔案：{result.get('contract_path', '未知')}\n")
-                f.write(f"契約字數：{result.get('contract_length', 0)} 字\n")
-                f.write("-"*80 + "\n\n")
-                for review in result.get('reviews', []):
-                    if 'error' in review:
-                        f.write(f"{review['question_type']} 分析失敗: {review['error']}\n\n")
-                        continue
-                    answer = review.get('answer', '')
-                    if answer:
-                        f.write(answer)
-                        f.write("\n\n")
-                if result.get('related_laws'):
-                    f.write("\n" + "="*80 + "\n")
-                    f.write("本次審查參考法規條文\n")
-                    f.write("="*80 + "\n\n")
-                    for law_idx, law in enumerate(result.get('related_laws', [])[:10], 1):  # 顯示前10條
-                        content = law['content']
-                        if len(content) > 300:
-                            content = content[:300] + "..."
-                        f.write(f"{law_idx}.{content}\n")
-                        f.write(f"來源: {law['source']}\n\n")
+            f.write(render_text_report(results))
         print(f"報告已保存至: {output_path}\n")
+
+    def write_review_result(self, result: ReviewResult, output_path: str):  # 後端讀取的結構化結果
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(review_payload(result), f, ensure_ascii=False)
+        print(f"審查結果已保存至: {output_path}\n")
         
 def main():
     os.environ["TOKENIZERS_PARALLELISM"] = "false"
     print("外籍勞工契約審查系統")
     config = Config()
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":  # 常駐服務模式
+        from review_worker import serve
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        serve(config, port=port)
+        return
     try:
+        on_event = emit_stdout_event if os.getenv("FLAS_EVENTS") == "1" else None  # 由後端啟動時輸出進度事件
         system = LaborContractReviewSystem(config)
         if not system.load_existing_knowledge_base():  # 建立法規知識庫
             system.build_law_knowledge_base()
+        if on_event:
+            on_event({"stage": "kb_loaded"})
+        profiler.report()
         print("開始審查契約")
 
         if len(sys.argv) > 1:   # 單一檔案模式
             contract_file = sys.argv[1]
             language = sys.argv[2] if len(sys.argv) > 2 else 'zh-TW'  # 🎯 接收語言參數
+            report_path = sys.argv[3] if len(sys.argv) > 3 else "report.txt"  # 每個工作各自的報告路徑
             print(f"處理單一契約: {contract_file}, 語言: {language}")
             if not os.path.exists(contract_file):
                 print(f"Failed:  {contract_file}")
                 sys.exit(1)
-            result = system.review_contract(contract_file)
-            system.generate_review_report([result], "report.txt")  # 目前仍為中文，後續可擴展
+            result = system.review_contract(contract_file, on_event=on_event)
+            if report_path.endswith(".json"):      # 後端呼叫時直接輸出結構化結果
+                system.write_review_result(result, report_path)
+            else:
+                system.generate_review_report([result], report_path)  # 目前仍為中文，後續可擴展
+            if on_event:
+                on_event({"stage": "report_written"})
             print("Successful！")
             
         else:  # 批次處理模式
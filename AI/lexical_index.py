@@ -0,0 +1,165 @@
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict, PrivateAttr
+
+LEXICAL_INDEX_VERSION = 1
+_ARTICLE_RE = re.compile(r"第\s*(\d+(?:\s*-\s*\d+)?)\s*條")   # 「第57條」、「第 57-1 條」
+_CJK_RE = re.compile(r"[\u3400-\u9fff\uf900-\ufaff]+")
+_LATIN_RE = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    # 中文切字元 bigram（單字就保留單字），英數字整段當一個詞，條號另外成為一個詞
+    text = text.lower()
+    tokens = [f"art:{m.group(1).replace(' ', '')}" for m in _ARTICLE_RE.finditer(text)]
+    for run in _CJK_RE.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    tokens.extend(_LATIN_RE.findall(text))
+    return tokens
+
+
+class LexicalIndex:                            # 法規切塊的 BM25 倒排索引
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.signature = ""
+        self.docs: Dict[str, Dict[str, Any]] = {}  # chunk id -> {"text", "metadata", "tf", "length"}
+        self._postings: Optional[Dict[str, List[Tuple[str, int]]]] = None
+        self._avg_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, chunk_id: str, text: str, metadata: Dict[str, Any]):
+        tf = Counter(tokenize(text))
+        self.docs[chunk_id] = {
+            "text": text,
+            "metadata": metadata,
+            "tf": dict(tf),
+            "length": sum(tf.values()),
+        }
+        self._postings = None
+
+    def remove(self, chunk_ids: List[str]):
+        for chunk_id in chunk_ids:
+            self.docs.pop(chunk_id, None)
+        self._postings = None
+
+    def _build_postings(self):                 # 倒排表只存在記憶體，第一次查詢時才建立
+        postings: Dict[str, List[Tuple[str, int]]] = defaultdict(list)
+        total_length = 0
+        for chunk_id, doc in self.docs.items():
+            total_length += doc["length"]
+            for term, count in doc["tf"].items():
+                postings[term].append((chunk_id, count))
+        self._postings = dict(postings)
+        self._avg_length = total_length / len(self.docs) if self.docs else 0.0
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        if self._postings is None:
+            self._build_postings()
+        if not self.docs:
+            return []
+        scores: Dict[str, float] = defaultdict(float)
+        n_docs = len(self.docs)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, count in postings:
+                length = self.docs[chunk_id]["length"]
+                norm = self.k1 * (1 - self.b + self.b * length / self._avg_length)
+                scores[chunk_id] += idf * count * (self.k1 + 1) / (count + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def to_document(self, chunk_id: str) -> Document:
+        doc = self.docs[chunk_id]
+        return Document(page_content=doc["text"], metadata=dict(doc["metadata"]), id=chunk_id)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": LEXICAL_INDEX_VERSION,
+                "signature": self.signature,
+                "k1": self.k1,
+                "b": self.b,
+                "docs": self.docs,
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["LexicalIndex"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"讀取關鍵字索引失敗: {e}")
+            return None
+        if data.get("version") != LEXICAL_INDEX_VERSION:
+            return None
+        index = cls(data["k1"], data["b"])
+        index.signature = data.get("signature", "")
+        index.docs = data["docs"]
+        return index
+
+
+def document_key(doc: Document) -> str:
+    return doc.metadata.get("chunk_id") or doc.id or doc.page_content
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            scores[key] += 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class HybridRetriever(BaseRetriever):          # 向量檢索 + BM25，以 RRF 合併排名
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    dense: BaseRetriever                       # 需設定成回傳 candidate_k 筆
+    lexical_loader: Callable[[], LexicalIndex]
+    k: int = 5
+    candidate_k: int = 20
+    rrf_k: int = 60
+    _lexical: Optional[LexicalIndex] = PrivateAttr(default=None)
+
+    @property
+    def lexical(self) -> LexicalIndex:         # 第一次查詢時才載入索引
+        if self._lexical is None:
+            self._lexical = self.lexical_loader()
+        return self._lexical
+
+    def fuse(self, query: str, dense_docs: List[Document]) -> List[Document]:
+        lexical_hits = self.lexical.search(query, self.candidate_k)
+        docs = {document_key(doc): doc for doc in dense_docs}
+        fused = reciprocal_rank_fusion(
+            [[document_key(doc) for doc in dense_docs], [chunk_id for chunk_id, _ in lexical_hits]],
+            self.rrf_k
+        )
+        results = []
+        for key, _ in fused[:self.k]:
+            results.append(docs[key] if key in docs else self.lexical.to_document(key))
+        return results
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        dense_docs = self.dense.invoke(query, config={"callbacks": run_manager.get_child()})
+        return self.fuse(query, dense_docs)
@@ -0,0 +1,244 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from file_lock import file_lock
+from response_cache import normalize_contract_text
+
+VIOLATION_HEAD_RE = re.compile(r"【違規項目\s*\d+】")
+_VIOLATION_QUOTE_RE = re.compile(r"1\s*[.．、]\s*違法條款原文\s*[：:]\s*(.+)")
+NO_VIOLATION_ANSWER = "本合約符合現行法規"
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:  # splitmix64 的最後混合步驟，uint64 乘法自然取 2^64 餘數
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+class MinHasher:                               # 字元 shingle 的 MinHash 簽章
+    HASH_VERSION = 2                           # 雜湊方式改變時遞增，舊的審查紀錄不再比對
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # 每個雜湊函數以不同的 64 位元 salt 與 shingle 雜湊做 XOR 後再混合，彼此近似獨立
+        self._salts = rng.integers(0, 1 << 64, num_perm, dtype=np.uint64, endpoint=False)
+
+    def shingles(self, text: str) -> set:
+        text = normalize_contract_text(text).replace(" ", "")
+        size = self.shingle_size
+        return {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+                  for shingle in self.shingles(text)]
+        values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+        with np.errstate(over="ignore"):
+            return _mix64(values[:, None] ^ self._salts[None, :]).min(axis=0)
+
+    @staticmethod
+    def similarity(a: np.ndarray, b: np.ndarray) -> float:  # 估計的 Jaccard 相似度
+        return float(np.mean(a == b))
+
+
+class NearDuplicateIndex:                      # 已審查契約的 MinHash LSH 索引
+    # 紀錄檔為 JSON Lines：第一行是雜湊設定，之後每行一筆審查紀錄，新增時只附加一行。
+    # 多個 law_main.py 同時執行時以檔案鎖互斥，並在寫入前讀入其他行程附加的紀錄。
+    def __init__(self, path: str, hasher: MinHasher, bands: int = 16, max_entries: int = 2000):
+        if hasher.num_perm % bands:
+            raise ValueError("num_perm 必須能被 bands 整除")
+        self.path = path
+        self.hasher = hasher
+        self.bands = bands
+        self.rows = hasher.num_perm // bands
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._reset()
+        with self._lock:
+            self._refresh()
+
+    def _reset(self):
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, bytes], set] = defaultdict(set)
+        self._offset = 0                       # 已讀到紀錄檔的哪個位置
+        self._inode = None                     # 壓縮後檔案會被換掉，需要從頭讀
+        self._lines = 0
+        self._compatible = True
+
+    def _header(self) -> Dict[str, Any]:
+        return {"num_perm": self.hasher.num_perm, "shingle_size": self.hasher.shingle_size,
+                "hash_version": self.hasher.HASH_VERSION}
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def _index(self, entry_id: str, signature: np.ndarray):
+        self._signatures[entry_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets[key].add(entry_id)
+
+    def _unindex(self, entry_id: str):
+        signature = self._signatures.pop(entry_id)
+        for key in self._band_keys(signature):
+            self._buckets[key].discard(entry_id)
+            if not self._buckets[key]:
+                del self._buckets[key]
+
+    def _apply(self, record: Dict[str, Any]):
+        if "num_perm" in record:               # 檔頭：雜湊設定不同的紀錄無法比對
+            self._compatible = record == self._header()
+            return
+        if not self._compatible:
+            return
+        entry_id, entry = record["id"], record["entry"]
+        if entry_id in self.entries:
+            self._unindex(entry_id)
+        self.entries[entry_id] = entry
+        self._index(entry_id, np.asarray(entry["signature"], dtype=np.uint64))
+        while len(self.entries) > self.max_entries:  # 淘汰最舊的紀錄（檔案在壓縮時才刪除）
+            oldest = min(self.entries, key=lambda key: self.entries[key]["created_at"])
+            self._unindex(oldest)
+            del self.entries[oldest]
+
+    def _refresh(self):                        # 讀入其他行程新附加的紀錄；呼叫前需持有 self._lock
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._inode is not None:
+                self._reset()
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._reset()
+            self._inode = stat.st_ino
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                for line in f:
+                    if not line.endswith(b"\n"):  # 其他行程寫到一半
+                        break
+                    self._offset += len(line)
+                    self._lines += 1
+                    self._apply(json.loads(line))
+        except (OSError, ValueError) as e:
+            print(f"讀取審查紀錄索引失敗: {e}")
+
+    def _compact(self):                        # 只保留目前的紀錄，重寫整個檔案；呼叫前需持有檔案鎖
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self._header()) + "\n")
+            for entry_id, entry in self.entries.items():
+                f.write(json.dumps({"id": entry_id, "entry": entry}, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+        stat = os.stat(self.path)
+        self._inode, self._offset, self._lines = stat.st_ino, stat.st_size, len(self.entries) + 1
+        self._compatible = True
+
+    def add(self, entry_id: str, signature: np.ndarray, payload: Dict[str, Any]):
+        record = {"id": entry_id,
+                  "entry": {**payload, "signature": signature.tolist(), "created_at": time.time()}}
+        with self._lock, file_lock(self.path):
+            self._refresh()
+            if self._inode is None or not self._compatible:
+                self._apply(self._header())
+                self._apply(record)
+                self._compact()
+                return
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._refresh()                    # 讀回剛附加的一行，同時更新位置
+            if self._lines > 2 * self.max_entries + 1:
+                self._compact()
+
+    def query(self, signature: np.ndarray, threshold: float) -> Optional[Tuple[str, float, Dict[str, Any]]]:
+        # 只比對至少一個 band 完全相同的候選，回傳相似度最高且超過門檻的一筆
+        with self._lock:
+            self._refresh()
+            candidates = set()
+            for key in self._band_keys(signature):
+                candidates |= self._buckets.get(key, set())
+            best = None
+            for entry_id in candidates:
+                score = MinHasher.similarity(signature, self._signatures[entry_id])
+                if score >= threshold and (best is None or score > best[1]):
+                    best = (entry_id, score, self.entries[entry_id])
+            return best
+
+
+def split_violations(answer: str) -> List[str]:  # 把 LLM 回答切成各個【違規項目】
+    heads = list(VIOLATION_HEAD_RE.finditer(answer))
+    blocks = []
+    for i, head in enumerate(heads):
+        end = heads[i + 1].start() if i + 1 < len(heads) else len(answer)
+        block = answer[head.end():end].strip().strip("-").strip()
+        if block:
+            blocks.append(block)
+    return blocks
+
+
+def violation_quote(block: str) -> Optional[str]:
+    match = _VIOLATION_QUOTE_RE.search(block)
+    if not match:
+        return None
+    quote = match.group(1).strip().strip("「」\"'()（）")
+    return normalize_contract_text(quote) or None
+
+
+def merge_violations(blocks: List[str]) -> str:
+    if not blocks:
+        return NO_VIOLATION_ANSWER
+    return "\n\n".join(f"【違規項目 {idx}】\n{block}" for idx, block in enumerate(blocks, 1))
+
+
+class ReusePlan:                               # 與先前審查過的契約比對後，決定哪些條款要重審
+    def __init__(self, entry_id: str, similarity: float, changed_clauses: List[str],
+                 reused_violations: List[List[str]]):
+        self.entry_id = entry_id
+        self.similarity = similarity
+        self.changed_clauses = changed_clauses
+        self.reused_violations = reused_violations  # 每個審查角度可沿用的違規項目
+
+    @property
+    def fully_reused(self) -> bool:
+        return not self.changed_clauses
+
+    @property
+    def review_text(self) -> str:              # 只把有變動的條款交給 LLM
+        return "\n".join(self.changed_clauses)
+
+    def merge(self, question_index: int, new_answer: Optional[str]) -> str:
+        reused = self.reused_violations[question_index - 1] if question_index <= len(self.reused_violations) else []
+        fresh = split_violations(new_answer) if new_answer else []
+        return merge_violations(reused + fresh)
+
+
+def plan_reuse(clauses: List[str], prior: Dict[str, Any], entry_id: str, similarity: float,
+               max_changed_ratio: float = 0.5) -> Optional[ReusePlan]:
+    # 找出新契約中先前沒出現過的條款；先前的違規項目若引用的條款仍在且未變動就沿用
+    prior_clauses = set(prior["clauses"])
+    normalized = [normalize_contract_text(clause) for clause in clauses]
+    changed = [clause for clause, norm in zip(clauses, normalized) if norm not in prior_clauses]
+    if not clauses or len(changed) / len(clauses) > max_changed_ratio:
+        return None
+    unchanged_text = "\n".join(norm for norm in normalized if norm in prior_clauses)
+    prior_text = "\n".join(prior["clauses"])
+    reused_per_question = []
+    for answer in prior["answers"]:
+        reused = []
+        for block in split_violations(answer):
+            quote = violation_quote(block)
+            if quote is None or quote not in prior_text:  # 無法對應到原條款，保守起見整份重審
+                return None
+            if quote in unchanged_text:        # 引用的條款已變動時丟棄，交給重審
+                reused.append(block)
+        reused_per_question.append(reused)
+    return ReusePlan(entry_id, similarity, changed, reused_per_question)
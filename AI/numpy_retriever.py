@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+MATRIX_FILENAME = "embeddings.npy"
+META_FILENAME = "metadata.json"
+
+
+def ids_signature(chunk_ids: Sequence[str]) -> str:  # 切塊 ID 集合的雜湊，用來判斷索引是否過期
+    digest = hashlib.sha256()
+    for chunk_id in sorted(chunk_ids):
+        digest.update(chunk_id.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _match_filter(metadata: Dict[str, Any], where: Dict[str, Any]) -> bool:
+    # 支援 Chroma 常用的寫法：{"key": value}、{"key": {"$eq"/"$ne"/"$in"/"$nin": ...}}
+    for key, condition in where.items():
+        value = metadata.get(key)
+        if isinstance(condition, dict):
+            for op, expected in condition.items():
+                if op == "$eq" and value != expected:
+                    return False
+                if op == "$ne" and value == expected:
+                    return False
+                if op == "$in" and value not in expected:
+                    return False
+                if op == "$nin" and value in expected:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+class NumpyVectorIndex:                        # 整個法規庫的正規化向量放在一個連續矩陣，暴力內積取 top-k
+    def __init__(self, matrix: np.ndarray, ids: List[str], texts: List[str],
+                 metadatas: List[Dict[str, Any]], signature: str = ""):
+        self.matrix = matrix                   # (N, D) float32，每列已做 L2 正規化
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.signature = signature
+        self._row_by_id: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_chroma(cls, vector_db) -> "NumpyVectorIndex":
+        data = vector_db.get(include=["embeddings", "documents", "metadatas"])
+        order = sorted(range(len(data["ids"])), key=lambda i: data["ids"][i])
+        ids = [data["ids"][i] for i in order]
+        embeddings = data["embeddings"]
+        if len(ids):
+            matrix = np.asarray([embeddings[i] for i in order], dtype=np.float32)
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        return cls(
+            _normalize_rows(matrix) if len(ids) else matrix,
+            ids,
+            [data["documents"][i] or "" for i in order],
+            [data["metadatas"][i] or {} for i in order],
+            ids_signature(ids),
+        )
+
+    def save(self, index_dir: str):
+        os.makedirs(index_dir, exist_ok=True)
+        matrix_path = os.path.join(index_dir, MATRIX_FILENAME)
+        meta_path = os.path.join(index_dir, META_FILENAME)
+        np.save(matrix_path + ".tmp.npy", np.ascontiguousarray(self.matrix, dtype=np.float32))
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "signature": self.signature,
+                "ids": self.ids,
+                "texts": self.texts,
+                "metadatas": self.metadatas,
+            }, f, ensure_ascii=False)
+        os.replace(matrix_path + ".tmp.npy", matrix_path)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    @classmethod
+    def load(cls, index_dir: str) -> Optional["NumpyVectorIndex"]:
+        matrix_path = os.path.join(index_dir, MATRIX_FILENAME)
+        meta_path = os.path.join(index_dir, META_FILENAME)
+        if not os.path.exists(matrix_path) or not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            matrix = np.load(matrix_path, mmap_mode="r")  # 以 memmap 載入，多個 process 共用 page cache
+        except (OSError, ValueError) as e:
+            print(f"讀取 NumPy 索引失敗: {e}")
+            return None
+        if matrix.shape[0] != len(meta["ids"]):
+            print("NumPy 索引與 metadata 筆數不符")
+            return None
+        return cls(matrix, meta["ids"], meta["texts"], meta["metadatas"], meta.get("signature", ""))
+
+    def _filter_mask(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        if not where:
+            return None
+        return np.fromiter((_match_filter(m, where) for m in self.metadatas), dtype=bool, count=len(self))
+
+    def search(self, query_vectors: np.ndarray, k: int,
+               where: Optional[Dict[str, Any]] = None) -> List[List[Tuple[int, float]]]:
+        # 一次算完整批查詢：(Q, D) @ (D, N)，每列用 argpartition 取 top-k 再排序
+        queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        if len(self) == 0 or k <= 0:
+            return [[] for _ in range(len(queries))]
+        scores = _normalize_rows(queries) @ self.matrix.T
+        mask = self._filter_mask(where)
+        if mask is not None:
+            candidates = int(mask.sum())
+            scores[:, ~mask] = -np.inf
+        else:
+            candidates = len(self)
+        k = min(k, candidates)
+        if k == 0:
+            return [[] for _ in range(len(queries))]
+        if k < scores.shape[1]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(scores.shape[1]), (len(queries), 1))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return [
+            [(int(i), float(s)) for i, s in zip(row_idx, row_scores)]
+            for row_idx, row_scores in zip(top, top_scores)
+        ]
+
+    def to_document(self, row: int, score: Optional[float] = None) -> Document:
+        metadata = dict(self.metadatas[row])
+        if score is not None:
+            metadata["score"] = score
+        return Document(page_content=self.texts[row], metadata=metadata, id=self.ids[row])
+
+    def document_by_id(self, chunk_id: str) -> Optional[Document]:
+        if self._row_by_id is None:
+            self._row_by_id = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+        row = self._row_by_id.get(chunk_id)
+        return None if row is None else self.to_document(row)
+
+
+class NumpyRetriever(BaseRetriever):           # 取代 Chroma 檢索的行程內檢索器
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    index: NumpyVectorIndex
+    embeddings: Embeddings
+    k: int = 5
+    filter: Optional[Dict[str, Any]] = None
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.search_many([query])[0]
+
+    def search_many(self, queries: List[str]) -> List[List[Document]]:  # 多個查詢共用一次矩陣乘法
+        if not queries:
+            return []
+        # 一次嵌入所有查詢（模型批次編碼，快取也只查一次）；HuggingFaceEmbeddings 的查詢與文件嵌入方式相同
+        query_vectors = np.asarray(self.embeddings.embed_documents(queries), dtype=np.float32)
+        hits = self.index.search(query_vectors, self.k, self.filter)
+        return [[self.index.to_document(row, score) for row, score in row_hits] for row_hits in hits]
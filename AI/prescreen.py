@@ -0,0 +1,208 @@
+import re
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from clause_segmenter import split_clauses
+
+PRESCREEN_RULES_VERSION = "2"                  # 修改規則時請遞增，提示詞中的重點條款會跟著改變
+
+
+class AhoCorasick:                             # 多關鍵字自動機：一次掃描找出所有關鍵字
+    def __init__(self, keywords: List[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        for keyword in keywords:
+            self._add(keyword)
+        self._build()
+
+    def _add(self, keyword: str):
+        state = 0
+        for char in keyword:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._output[state].append(keyword)
+
+    def _build(self):                          # BFS 建立失敗連結，並合併後綴的輸出
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:  # (結束位置, 關鍵字)
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for keyword in self._output[state]:
+                yield position + 1, keyword
+
+
+@dataclass
+class Finding:                                 # 規則找到的疑似違規（初步結果，仍待 LLM 確認）
+    rule: str
+    clause_index: int
+    clause: str
+    law: str
+    reason: str
+    severity: str                              # violation：幾乎確定違法；warning：請 LLM 重點確認
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class PrescreenResult:
+    clauses: List[str]
+    findings: List[Finding] = field(default_factory=list)
+    keyword_clauses: Set[int] = field(default_factory=set)  # 出現任何規則關鍵字的條款
+    elapsed_ms: float = 0.0
+
+    @property
+    def is_clean(self) -> bool:                # 沒有任何規則關鍵字，才可能在設定允許時略過 LLM
+        return not self.keyword_clauses
+
+    def to_event(self) -> Dict[str, Any]:
+        return {
+            "stage": "prescreen",
+            "findings": [finding.to_dict() for finding in self.findings],
+            "elapsed_ms": round(self.elapsed_ms, 3),
+        }
+
+    def focus_hint(self, within: Optional[str] = None) -> str:
+        # 給 LLM 的重點提示；within 為實際送審的文字（相似契約只重審部分條款時）
+        findings = [f for f in self.findings if within is None or f.clause in within]
+        if not findings:
+            return ""
+        lines = ["初步規則檢查發現下列條款可能違法，請優先確認（仍須自行判斷，並檢查其他條款）："]
+        for finding in findings:
+            lines.append(f"- 「{finding.clause}」：{finding.reason}（{finding.law}）")
+        return "\n".join(lines)
+
+
+# 薪資關鍵字後面（同一分句內）的金額才算工資，例如「月薪新臺幣30,000元」、「每月工資為 2.5 萬元」
+_WAGE_AMOUNT_RE = re.compile(r"(時薪|日薪|月薪|底薪|工資|薪資|薪水)([^，,；;。、]{0,12}?)(\d[\d,]*(?:\.\d+)?)\s*(萬)?\s*元")
+_NOT_WAGE_RE = re.compile(r"費|扣|津貼|獎金|加給|補助|保險|押金|保證金|罰|違約金|加班")  # 「工資中扣除膳宿費 2,500 元」
+_DAILY_HOURS_RE = re.compile(r"(?:每日|每天|一日|1日|日工作|每班)[^。；\d]{0,8}?(\d+(?:\.\d+)?)\s*(?:個)?小時")
+_WEEKLY_HOURS_RE = re.compile(r"(?:每週|每周|一週|1週)[^。；\d]{0,8}?(\d+(?:\.\d+)?)\s*(?:個)?小時")
+
+_DOCUMENT_WORDS = ["護照", "居留證", "居留證件", "身分證件", "工作證"]
+_RETENTION_WORDS = ["保管", "扣留", "代為保管", "收存", "收押", "留置"]
+_WAGE_WORDS = ["工資", "薪資", "月薪", "底薪", "薪水", "時薪", "日薪"]
+_HOUR_WORDS = ["小時", "工時", "工作時間"]
+_OVERTIME_WORDS = ["加班", "延長工時", "延長工作時間"]
+_DEDUCTION_WORDS = ["扣款", "扣除", "扣薪", "罰款", "罰金", "違約金", "押金", "保證金", "預扣"]
+_ILLEGAL_DEDUCTION_WORDS = ["罰款", "罰金", "押金", "保證金", "預扣", "扣薪"]
+_REST_WORDS = ["全年無休", "不得休假", "無休假", "不休假", "不得請假"]
+_OFF_PERMIT_WORDS = ["許可以外", "其他工作", "指派至", "轉派", "外派至"]
+
+
+class Prescreener:                             # 以關鍵字自動機 + 數值規則做的快速初篩
+    def __init__(self, min_monthly_wage: int = 28590, min_hourly_wage: int = 190,
+                 max_daily_hours: float = 12, normal_daily_hours: float = 8, normal_weekly_hours: float = 40):
+        self.min_monthly_wage = min_monthly_wage
+        self.min_hourly_wage = min_hourly_wage
+        self.max_daily_hours = max_daily_hours
+        self.normal_daily_hours = normal_daily_hours
+        self.normal_weekly_hours = normal_weekly_hours
+        self._groups: Dict[str, str] = {}
+        for group, words in [("document", _DOCUMENT_WORDS), ("retention", _RETENTION_WORDS),
+                             ("wage", _WAGE_WORDS), ("hours", _HOUR_WORDS), ("overtime", _OVERTIME_WORDS),
+                             ("deduction", _DEDUCTION_WORDS), ("rest", _REST_WORDS), ("off_permit", _OFF_PERMIT_WORDS)]:
+            for word in words:
+                self._groups[word] = group
+        self._automaton = AhoCorasick(list(self._groups))
+
+    def screen(self, contract_text: str) -> PrescreenResult:
+        start = time.perf_counter()
+        clauses = split_clauses(contract_text)
+        result = PrescreenResult(clauses=clauses)
+        for idx, clause in enumerate(clauses):
+            words = {keyword for _, keyword in self._automaton.iter_matches(clause)}
+            if not words:
+                continue
+            result.keyword_clauses.add(idx)
+            groups = {self._groups[word] for word in words}
+            for finding in self._check_clause(idx, clause, words, groups):
+                result.findings.append(finding)
+        result.elapsed_ms = (time.perf_counter() - start) * 1000
+        return result
+
+    def _check_clause(self, idx: int, clause: str, words: Set[str], groups: Set[str]) -> Iterator[Finding]:
+        if "document" in groups and "retention" in groups:
+            yield Finding("document_retention", idx, clause, "就業服務法第57條第8款",
+                          "雇主不得扣留或保管外國人之護照、居留證件", "violation")
+        if "wage" in groups:
+            finding = self._check_wage(idx, clause)
+            if finding:
+                yield finding
+        if "hours" in groups:
+            yield from self._check_hours(idx, clause, "overtime" in groups)
+        if "deduction" in groups:
+            illegal = words & set(_ILLEGAL_DEDUCTION_WORDS)
+            if illegal:
+                yield Finding("illegal_deduction", idx, clause, "勞動基準法第22條、第26條",
+                              f"工資應全額直接給付，不得預扣或以「{'、'.join(sorted(illegal))}」名義扣款", "violation")
+            else:
+                yield Finding("deduction", idx, clause, "勞動基準法第22條",
+                              "扣除工資的項目與金額需有法令依據或勞工同意", "warning")
+        if "rest" in groups:
+            yield Finding("no_rest_days", idx, clause, "勞動基準法第36條",
+                          "勞工每七日中應有二日休息，其中一日為例假", "violation")
+        if "off_permit" in groups:
+            yield Finding("off_permit_work", idx, clause, "就業服務法第57條第3款",
+                          "不得指派外國人從事許可以外之工作", "warning")
+
+    def _check_wage(self, idx: int, clause: str) -> Optional[Finding]:
+        amounts: Dict[str, List[float]] = {"hourly": [], "monthly": []}
+        for match in _WAGE_AMOUNT_RE.finditer(clause):
+            keyword, gap = match.group(1), match.group(2)
+            if _NOT_WAGE_RE.search(gap):
+                continue
+            amount = float(match.group(3).replace(",", "")) * (10000 if match.group(4) else 1)
+            if keyword == "時薪" or "小時" in gap:
+                amounts["hourly"].append(amount)
+            elif keyword in ("月薪", "底薪") or (keyword != "日薪" and "月" in clause):
+                if amount >= 1000:             # 小於 1000 多半是其他費用
+                    amounts["monthly"].append(amount)
+        # 同一條款有多個工資金額時（例如本薪與總額），只要有一個達到基本工資就不判定違法
+        hourly = [amount for amount in amounts["hourly"] if amount > 0]
+        if hourly and max(hourly) < self.min_hourly_wage:
+            return Finding("wage_below_minimum", idx, clause, "勞動基準法第21條",
+                           f"時薪 {max(hourly):g} 元低於基本工資 {self.min_hourly_wage} 元", "violation")
+        monthly = amounts["monthly"]
+        if monthly and max(monthly) < self.min_monthly_wage:
+            return Finding("wage_below_minimum", idx, clause, "勞動基準法第21條",
+                           f"月薪 {max(monthly):g} 元低於基本工資 {self.min_monthly_wage:,} 元", "violation")
+        return None
+
+    def _check_hours(self, idx: int, clause: str, mentions_overtime: bool) -> Iterator[Finding]:
+        for match in _DAILY_HOURS_RE.finditer(clause):
+            hours = float(match.group(1))
+            if hours > self.max_daily_hours:
+                yield Finding("excessive_hours", idx, clause, "勞動基準法第30條、第32條",
+                              f"每日工時 {hours:g} 小時，連同延長工時不得超過 {self.max_daily_hours:g} 小時", "violation")
+                return
+            if hours > self.normal_daily_hours and not mentions_overtime:
+                yield Finding("long_hours", idx, clause, "勞動基準法第30條、第24條",
+                              f"每日工時 {hours:g} 小時超過 {self.normal_daily_hours:g} 小時，需確認是否依法給付加班費", "warning")
+                return
+        for match in _WEEKLY_HOURS_RE.finditer(clause):
+            hours = float(match.group(1))
+            if hours > self.normal_weekly_hours and not mentions_overtime:
+                yield Finding("long_hours", idx, clause, "勞動基準法第30條",
+                              f"每週工時 {hours:g} 小時超過 {self.normal_weekly_hours:g} 小時", "warning")
+                return
@@ -0,0 +1,183 @@
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List
+
+from near_duplicate import split_violations
+
+_FIELD_RE = re.compile(r"([1-4])\s*[.．、]\s*(違法條款原文|違反法規|違法原因|修改建議)\s*[:：]?")
+_FIELD_NAMES = {
+    "違法條款原文": "original_text",
+    "違反法規": "violated_laws",
+    "違法原因": "reason",
+    "修改建議": "suggestion",
+}
+_LAW_SPLIT_RE = re.compile(r"[；;\n]")
+_PENALTY_RE = re.compile(r"罰則[:：]\s*(.*?)(?:\n【|$)", re.DOTALL)
+
+
+class ViolationFormatError(ValueError):         # 違規項目缺少必要欄位或型別不對
+    pass
+
+
+def _require_str(data: Dict[str, Any], key: str) -> str:
+    value = data.get(key, "")
+    if not isinstance(value, str):
+        raise ViolationFormatError(f"{key} 必須是字串")
+    return value.strip()
+
+
+@dataclass
+class Violation:
+    original_text: str
+    violated_laws: List[str]
+    reason: str
+    suggestion: str
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Violation":
+        if not isinstance(data, dict):
+            raise ViolationFormatError("違規項目必須是物件")
+        laws = data.get("violated_laws", [])
+        if isinstance(laws, str):
+            laws = _LAW_SPLIT_RE.split(laws)
+        if not isinstance(laws, list) or not all(isinstance(law, str) for law in laws):
+            raise ViolationFormatError("violated_laws 必須是字串陣列")
+        violation = cls(
+            original_text=_require_str(data, "original_text"),
+            violated_laws=[law.strip() for law in laws if law.strip()],
+            reason=_require_str(data, "reason"),
+            suggestion=_require_str(data, "suggestion"),
+        )
+        if not violation.original_text and not violation.reason:
+            raise ViolationFormatError("違規項目缺少條款原文與違法原因")
+        return violation
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def to_text(self) -> str:                  # 與提示詞要求的條列格式相同
+        return "\n".join([
+            f"1.違法條款原文：{self.original_text}",
+            f"2.違反法規：{'；'.join(self.violated_laws)}",
+            f"3.違法原因：{self.reason}",
+            f"4.修改建議：{self.suggestion}",
+        ])
+
+
+@dataclass
+class CitedLaw:
+    content: str
+    source: str
+    question: str = ""
+    law_basis: str = ""
+    penalty: str = ""
+    explanation: str = ""
+
+    @classmethod
+    def from_source(cls, content: str, source: str, metadata: Dict[str, Any]) -> "CitedLaw":
+        penalty = _PENALTY_RE.search(content)
+        return cls(
+            content=content,
+            source=source,
+            question=str(metadata.get("instruction", "")),
+            law_basis=str(metadata.get("input", "")),
+            penalty=penalty.group(1).strip() if penalty else "",
+            explanation=str(metadata.get("output", "")),
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CitedLaw":
+        return cls(**{key: str(data.get(key, "")) for key in cls.__dataclass_fields__})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class ReviewResult:                            # 單一契約的審查結果，報告與 API 回應都由此產生
+    contract_path: str
+    contract_length: int = 0
+    violations: List[Violation] = field(default_factory=list)
+    related_laws: List[CitedLaw] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    processing_time: float = 0.0
+    review_date: str = field(default_factory=lambda: time.strftime("%Y-%m-%d"))
+
+    @property
+    def failed(self) -> bool:                  # 所有審查角度都失敗
+        return bool(self.errors) and not self.violations and not self.related_laws
+
+    @classmethod
+    def from_reviews(cls, results: Dict[str, Any]) -> "ReviewResult":
+        # 把 review_contract 內部的各角度回答轉成已驗證的結構
+        result = cls(contract_path=results.get("contract_path", ""),
+                     contract_length=results.get("contract_length", 0))
+        for review in results.get("reviews", []):
+            if "error" in review:
+                result.errors.append(f"{review['question_type']} 分析失敗: {review['error']}")
+                continue
+            result.violations.extend(parse_answer(review.get("answer", "")))
+            result.processing_time += review.get("processing_time", 0.0)
+        result.related_laws = [CitedLaw.from_source(law["content"], law["source"], law.get("metadata", {}))
+                               for law in results.get("related_laws", [])]
+        return result
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ReviewResult":
+        return cls(
+            contract_path=data.get("contract_path", ""),
+            contract_length=int(data.get("contract_length", 0)),
+            violations=[Violation.from_dict(item) for item in data.get("violations", [])],
+            related_laws=[CitedLaw.from_dict(item) for item in data.get("related_laws", [])],
+            errors=[str(error) for error in data.get("errors", [])],
+            processing_time=float(data.get("processing_time", 0.0)),
+            review_date=data.get("review_date") or time.strftime("%Y-%m-%d"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _parse_text_block(block: str) -> Violation:
+    fields: Dict[str, str] = {}
+    matches = list(_FIELD_RE.finditer(block))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(block)
+        fields[_FIELD_NAMES[match.group(2)]] = block[match.end():end].strip().strip("-").strip()
+    return Violation.from_dict(fields)
+
+
+def parse_answer(answer: str) -> List[Violation]:
+    # 把一個審查角度的【違規項目】條列回答轉成違規項目，缺少欄位的項目略過
+    violations = []
+    for block in split_violations(answer):
+        try:
+            violations.append(_parse_text_block(block))
+        except ViolationFormatError as e:
+            print(f"略過無法解析的違規項目: {e}")
+    return violations
+
+
+def render_text_report(results: List[ReviewResult]) -> str:  # 由結構化結果產生文字報告
+    lines = ["=" * 80, "外籍勞工聘僱契約審查報告", f"審查日期：{time.strftime('%Y年%m月%d日')}", "=" * 80, ""]
+    for contract_idx, result in enumerate(results, 1):
+        if result.failed:
+            lines += [f"契約 {contract_idx} 分析失敗: {'；'.join(result.errors)}", ""]
+            continue
+        lines += [f"契約檔案：{result.contract_path or '未知'}", f"契約字數：{result.contract_length} 字", "-" * 80, ""]
+        lines += [*result.errors, ""] if result.errors else []
+        if not result.violations:
+            lines += ["本合約符合現行法規", ""]
+        for idx, violation in enumerate(result.violations, 1):
+            lines += [f"【違規項目 {idx}】", violation.to_text(), ""]
+        if result.related_laws:
+            lines += ["", "=" * 80, "本次審查參考法規條文", "=" * 80, ""]
+            for law_idx, law in enumerate(result.related_laws[:10], 1):  # 顯示前10條
+                content = law.content if len(law.content) <= 300 else law.content[:300] + "..."
+                lines += [f"{law_idx}.{content}", f"來源: {law.source}", ""]
+    return "\n".join(lines) + "\n"
+
+
+def review_payload(result: ReviewResult) -> Dict[str, Any]:  # 回傳給後端的內容：結構化結果 + 文字報告
+    return {"review": result.to_dict(), "report_text": render_text_report([result])}
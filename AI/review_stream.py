@@ -0,0 +1,37 @@
+from typing import Any, Callable, Dict
+
+from near_duplicate import VIOLATION_HEAD_RE, split_violations
+
+
+def chunk_text(chunk: Any) -> str:             # llm.stream 對聊天模型回傳 message chunk，對一般 LLM 回傳字串
+    if isinstance(chunk, str):
+        return chunk
+    return chunk.text or ""
+
+
+class ViolationStream:                         # 累積串流輸出，每完成一個【違規項目】就送出事件
+    def __init__(self, on_event: Callable[[Dict[str, Any]], None]):
+        self.on_event = on_event
+        self.parts = []
+        self.emitted = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def _emit(self, blocks):
+        for block in blocks[self.emitted:]:
+            self.emitted += 1
+            self.on_event({"stage": "violation", "index": self.emitted, "text": block})
+
+    def feed(self, token: str):
+        self.parts.append(token)
+        if "】" in token:                      # 出現下一個標題，代表前一個項目已完整
+            text = self.text
+            completed = len(VIOLATION_HEAD_RE.findall(text)) - 1
+            if completed > self.emitted:
+                self._emit(split_violations(text)[:completed])
+
+    def close(self) -> str:
+        self._emit(split_violations(self.text))
+        return self.text
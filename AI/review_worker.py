@@ -0,0 +1,144 @@
+import json
+import os
+import socketserver
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from law_main import Config, LaborContractReviewSystem
+from review_schema import review_payload
+from startup_profile import profiler
+
+
+class ReviewWorker:                            # 常駐審查服務：模型與向量庫只載入一次
+    def __init__(self, config: Config, system: Optional[LaborContractReviewSystem] = None):
+        self.config = config
+        started = time.time()
+        self.system = system or LaborContractReviewSystem(config)
+        if system is None and not self.system.load_existing_knowledge_base():
+            self.system.build_law_knowledge_base()
+        self.startup_time = time.time() - started
+        profiler.report()
+        self.started_at = time.time()
+        self._lock = threading.Lock()          # 保護 stats
+        self._review_lock = threading.Lock()   # 審查流程（向量庫、快取、LLM 鏈）不是執行緒安全的，一次只審一份
+        self.stats = {
+            "requests": 0,
+            "failures": 0,
+            "total_review_time": 0.0,
+        }
+        self.methods: Dict[str, Callable[..., Dict[str, Any]]] = {
+            "ping": self._ping,
+            "review": self._review,
+            "stats": self._stats,
+        }
+        print(f"審查服務已就緒 (啟動耗時 {self.startup_time:.2f}s)\n")
+
+    def handle(self, method: str, params: Dict[str, Any],
+               on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        if method not in self.methods:
+            raise ValueError(f"未知的方法: {method}")
+        return self.methods[method](params or {}, on_event)
+
+    def _ping(self, params: Dict[str, Any], on_event=None) -> Dict[str, Any]:
+        return {"status": "ok", "uptime": time.time() - self.started_at}
+
+    def _stats(self, params: Dict[str, Any], on_event=None) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        completed = stats["requests"] - stats["failures"]
+        stats["avg_review_time"] = stats["total_review_time"] / completed if completed else 0.0
+        stats["startup_time"] = self.startup_time
+        stats["startup_profile"] = profiler.stats()
+        stats["uptime"] = time.time() - self.started_at
+        stats["embedding_cache"] = self.system.embedding_cache_stats()
+        stats["clause_cache"] = self.system.clause_cache.stats()
+        stats["response_cache"] = self.system.response_cache_stats()
+        stats["context_packing"] = dict(self.system.context_stats)
+        return stats
+
+    def _review(self, params: Dict[str, Any], on_event=None) -> Dict[str, Any]:
+        contract_path = params.get("contract_path")
+        if not contract_path or not os.path.exists(contract_path):
+            raise FileNotFoundError(f"找不到契約檔案: {contract_path}")
+        # 審查結果一律是中文，報告的多語言由後端處理，所以這裡不接收語言參數
+        output_path = params.get("output_path")             # 選填：另外寫出文字報告
+        print(f"處理單一契約: {contract_path}")
+
+        try:
+            if on_event:
+                on_event({"stage": "kb_loaded"})             # 常駐服務的知識庫已載入
+            if self._review_lock.locked():
+                print("另一份契約審查中，排隊等待")
+            with self._review_lock:                          # ping、stats 不受影響，審查依序執行
+                start_time = time.time()                     # 不含排隊時間
+                result = self.system.review_contract(contract_path, on_event=on_event)
+                if output_path:
+                    self.system.generate_review_report([result], output_path)
+            if on_event:
+                on_event({"stage": "report_written"})
+        except Exception:
+            with self._lock:
+                self.stats["requests"] += 1
+                self.stats["failures"] += 1
+            raise
+        elapsed = time.time() - start_time
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["total_review_time"] += elapsed
+        return {
+            **review_payload(result),                        # 結構化結果直接回傳，不經過報告檔
+            "processing_time": elapsed,
+        }
+
+
+class _ReviewRequestHandler(socketserver.StreamRequestHandler):
+    # 協定：每行一個 JSON，{"id", "method", "params", "events"} ->
+    #       零或多個 {"id", "event"}，最後是 {"id", "result"} 或 {"id", "error"}
+    def handle(self):
+        worker: ReviewWorker = self.server.worker
+        write_lock = threading.Lock()
+
+        def send(message: Dict[str, Any]):
+            with write_lock:
+                self.wfile.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+                self.wfile.flush()
+
+        for raw in self.rfile:
+            line = raw.decode("utf-8").strip()
+            if not line:
+                continue
+            request_id = None
+            try:
+                request = json.loads(line)
+                request_id = request.get("id")
+                on_event = None
+                if request.get("events"):
+                    on_event = lambda event, rid=request_id: send({"id": rid, "event": event})
+                result = worker.handle(request.get("method", ""), request.get("params"), on_event)
+                response = {"id": request_id, "result": result}
+            except Exception as e:
+                print(f"Failed: {e}")
+                response = {"id": request_id, "error": str(e)}
+            send(response)
+
+
+class ReviewWorkerServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, worker: ReviewWorker):
+        self.worker = worker
+        super().__init__(address, _ReviewRequestHandler)
+
+
+def serve(config: Config, host: str = None, port: int = None):
+    host = host or config.WORKER_HOST
+    port = port or config.WORKER_PORT
+    worker = ReviewWorker(config)
+    with ReviewWorkerServer((host, port), worker) as server:
+        print(f"審查服務監聽於 {host}:{port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("審查服務已停止")
@@ -0,0 +1,54 @@
+import importlib
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Tuple
+
+_PROCESS_START = time.perf_counter()           # 約略是直譯器載入本模組的時間
+
+
+class StartupProfiler:                         # 記錄冷啟動時各個 import 與初始化步驟的耗時
+    def __init__(self):
+        self.steps: List[Tuple[str, float, int]] = []  # (步驟, 秒數, 巢狀深度)
+        self._depth = 0
+
+    @contextmanager
+    def timed(self, label: str):
+        index = len(self.steps)
+        self.steps.append((label, 0.0, self._depth))  # 先佔位，巢狀步驟會排在後面
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self.steps[index] = (label, time.perf_counter() - start, self._depth)
+
+    def lazy_import(self, module: str, attr: str = None) -> Any:
+        # 需要時才 import；第一次 import 的耗時記為「import 模組名稱」
+        if module in sys.modules:              # 已載入過的模組不列入報告
+            loaded = sys.modules[module]
+        else:
+            with self.timed(f"import {module}"):
+                loaded = importlib.import_module(module)
+        return getattr(loaded, attr) if attr else loaded
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "steps": [{"step": label, "seconds": round(seconds, 4), "depth": depth}
+                      for label, seconds, depth in self.steps],
+            "total": round(sum(seconds for _, seconds, depth in self.steps if depth == 0), 4),
+            "since_process_start": round(time.perf_counter() - _PROCESS_START, 4),
+        }
+
+    def report(self):
+        if not self.steps:
+            return
+        print("啟動耗時")
+        for label, seconds, depth in self.steps:
+            print(f"  {seconds:8.3f}s  {'  ' * depth}{label}")
+        stats = self.stats()
+        print(f"  合計 {stats['total']:.3f}s（程式啟動至今 {stats['since_process_start']:.3f}s）\n")
+
+
+profiler = StartupProfiler()
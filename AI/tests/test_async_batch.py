@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+import pytest
+
+import async_batch
+from async_batch import TokenBucket, run_ordered
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.mark.parametrize("rpm, burst", [(10, 4), (10, None), (60, 8), (600, None), (3, 8)])
+def test_bucket_never_exceeds_quota_in_a_minute(rpm, burst):
+    bucket = TokenBucket(rpm, burst=burst)
+    assert bucket.capacity >= 1
+    assert bucket.capacity + bucket.rate * 60 <= rpm
+
+
+@pytest.mark.parametrize("rpm, burst", [(1, None), (2, None), (2, 8), (10, 4)])
+def test_admits_within_any_minute(monkeypatch, rpm, burst):
+    clock = FakeClock()
+    monkeypatch.setattr(async_batch.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(async_batch.asyncio, "sleep", clock.sleep)
+
+    async def admit_times():
+        bucket = TokenBucket(rpm, burst=burst)
+        times = []
+        for _ in range(rpm * 3 + 2):
+            await bucket.acquire()
+            times.append(clock.now)
+        return times
+
+    times = asyncio.run(admit_times())
+    for start in times:                       # 以每次放行的時間為起點，往後 60 秒內的次數
+        assert sum(start <= t < start + 60 for t in times) <= rpm
+    assert times[-1] - times[0] <= 60 * (len(times) - 1)       # 仍持續放行，每分鐘至少一次
+
+
+def test_burst_is_available_immediately():
+    async def take():
+        bucket = TokenBucket(10, burst=4)
+        start = time.perf_counter()
+        for _ in range(4):
+            await bucket.acquire()
+        return time.perf_counter() - start
+
+    assert asyncio.run(take()) < 0.1
+
+
+def test_run_ordered_keeps_input_order():
+    async def worker(idx, item):
+        await asyncio.sleep(0.01 * (5 - idx))
+        return item * 2
+
+    assert asyncio.run(run_ordered([1, 2, 3, 4, 5], worker, concurrency=3)) == [2, 4, 6, 8, 10]
@@ -0,0 +1,28 @@
+from langchain_core.documents import Document
+
+from context_packer import pack_context
+
+ARTICLE = ("第五十七條 雇主聘僱外國人不得有下列情事：一、聘僱未經許可、許可失效或他人所申請聘僱之外國人。"
+           "二、以本人名義聘僱外國人為他人工作。三、指派所聘僱之外國人從事許可以外之工作。"
+           "八、對所聘僱之外國人以強暴脅迫、拘禁或其他非法之方法，強制其從事勞動或扣留其護照、居留證件或財物。")
+
+
+def _hit(text: str, chunk_id: str, score: float, **metadata) -> Document:
+    # 與 NumpyRetriever 回傳的文件相同：切塊的 metadata 再加上這次檢索的 score
+    return Document(page_content=text, metadata={"source": "new_law.json", "type": "labor_law",
+                                                 "chunk_id": chunk_id, "score": score, **metadata})
+
+
+def test_merges_adjacent_chunks_with_retriever_scores():
+    first, second = ARTICLE[:80], ARTICLE[50:]         # 兩個切塊重疊 30 字
+    packed, stats = pack_context([_hit(first, "a", 0.91), _hit(second, "b", 0.87)], 10_000, 60)
+    assert stats["merged"] == 1
+    assert [doc.page_content for doc in packed] == [ARTICLE]
+    assert packed[0].metadata["chunk_id"] == "a+b"
+
+
+def test_keeps_chunks_from_different_articles_apart():
+    first, second = ARTICLE[:80], ARTICLE[50:]
+    packed, stats = pack_context([_hit(first, "a", 0.91, input="就業服務法第57條"),
+                                  _hit(second, "b", 0.87, input="就業服務法第54條")], 10_000, 60)
+    assert stats["merged"] == 0 and len(packed) == 2
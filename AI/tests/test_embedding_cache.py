@@ -0,0 +1,72 @@
+import multiprocessing
+import zlib
+
+import numpy as np
+import pytest
+
+from embedding_cache import EmbeddingCache
+
+
+def _vector(key: str, dimension: int = 8):
+    return np.random.default_rng(zlib.crc32(key.encode())).random(dimension).tolist()
+
+
+def _fill(cache_dir: str, prefix: str, count: int):
+    cache = EmbeddingCache(cache_dir, dtype="float32")
+    for start in range(0, count, 10):
+        cache.put_many({f"{prefix}{idx}": _vector(f"{prefix}{idx}") for idx in range(start, start + 10)})
+    cache.flush()
+
+
+def test_round_trip_and_reopen(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dtype="float32")
+    items = {f"k{idx}": _vector(f"k{idx}") for idx in range(20)}
+    cache.put_many(items)
+    cache.flush()
+
+    reopened = EmbeddingCache(str(tmp_path), dtype="float32")
+    found = reopened.get_many(list(items) + ["missing"])
+    assert set(found) == set(items)
+    for key, vector in items.items():
+        np.testing.assert_allclose(found[key], vector)
+    assert reopened.stats()["hits"] == 20 and reopened.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), max_entries=4, dtype="float32")
+    cache.put_many({key: _vector(key) for key in ("a", "b", "c", "d")})
+    cache.get_many(["a"])                     # a 變成最近使用
+    cache.put_many({"e": _vector("e")})
+    assert set(cache.get_many(["a", "b", "c", "d", "e"])) == {"a", "c", "d", "e"}
+    np.testing.assert_allclose(cache.get_many(["e"])["e"], _vector("e"))
+
+
+def test_instances_do_not_share_rows(tmp_path):
+    first = EmbeddingCache(str(tmp_path), dtype="float32")
+    second = EmbeddingCache(str(tmp_path), dtype="float32")
+    first.put_many({"a": _vector("a")})
+    second.put_many({"b": _vector("b")})
+    first.put_many({"c": _vector("c")})
+    for cache in (first, second):
+        found = cache.get_many(["a", "b", "c"])
+        for key in ("a", "b", "c"):
+            np.testing.assert_allclose(found[key], _vector(key))
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="需要 fork")
+def test_concurrent_processes_keep_every_vector(tmp_path):
+    # 兩個 law_main.py 同時寫入時，各自的向量不能寫進同一列
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_fill, args=(str(tmp_path), prefix, 700)) for prefix in ("x", "y")]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    cache = EmbeddingCache(str(tmp_path), dtype="float32")
+    keys = [f"{prefix}{idx}" for prefix in ("x", "y") for idx in range(700)]
+    found = cache.get_many(keys)
+    assert set(found) == set(keys)
+    for key in keys:
+        np.testing.assert_allclose(found[key], _vector(key))
@@ -0,0 +1,73 @@
+import pytest
+
+from near_duplicate import MinHasher, NearDuplicateIndex
+
+TEMPLATE = [
+    "第一條 雇主{employer}聘僱外國人{name}從事家庭看護工作，契約期間自{start}起三年。",
+    "第二條 勞工每月工資為新臺幣{wage}元，雇主應於每月十日前全額直接給付。",
+    "第三條 勞工每日正常工作時間不得超過八小時，每七日中應有二日之休息，其中一日為例假。",
+    "第四條 雇主應依法為勞工投保勞工保險及全民健康保險，保險費依法令規定分擔。",
+    "第五條 雇主不得扣留勞工之護照、居留證件或財物。",
+    "第六條 勞工之膳宿費用每月不得超過新臺幣五千元，並應經勞工書面同意。",
+    "第七條 本契約未盡事宜，依勞動基準法、就業服務法及相關法令辦理。",
+]
+
+
+def _contract(clauses=TEMPLATE, **fields):
+    values = {"employer": "王大明", "name": "Siti", "start": "2024年1月1日", "wage": "28,590", **fields}
+    return "\n".join(clause.format(**values) for clause in clauses)
+
+
+def _jaccard(hasher: MinHasher, a: str, b: str) -> float:
+    shingles_a, shingles_b = hasher.shingles(a), hasher.shingles(b)
+    return len(shingles_a & shingles_b) / len(shingles_a | shingles_b)
+
+
+@pytest.mark.parametrize("other", [
+    _contract(name="Maria", wage="30,000"),                                 # 只差姓名與薪資
+    _contract(employer="陳小華", name="Nguyen", start="2025年3月1日"),
+    _contract(TEMPLATE[:4] + ["第五條 雇主得代為保管勞工之護照及居留證。"] + TEMPLATE[5:]),
+    _contract(TEMPLATE[:3]),                                                # 少了一半條款
+    "第一條 勞工應遵守公司規定。\n第二條 工資依公司規定發給。",              # 完全不同
+])
+def test_estimate_tracks_exact_jaccard(other):
+    hasher = MinHasher()
+    base = _contract()
+    exact = _jaccard(hasher, base, other)
+    estimate = MinHasher.similarity(hasher.signature(base), hasher.signature(other))
+    assert abs(estimate - exact) < 0.15, (exact, estimate)
+
+
+def test_short_contract_differing_in_name_and_wage():
+    hasher = MinHasher(num_perm=256)
+    a = "甲方王大明聘僱乙方Siti，月薪新臺幣28,590元，每月十日發給。"
+    b = "甲方王大明聘僱乙方Maria，月薪新臺幣30,000元，每月十日發給。"
+    exact = _jaccard(hasher, a, b)
+    estimate = MinHasher.similarity(hasher.signature(a), hasher.signature(b))
+    assert abs(estimate - exact) < 0.1, (exact, estimate)
+
+
+def test_index_shares_entries_between_instances(tmp_path):
+    # 模擬兩個同時執行的 law_main.py：各自的紀錄都不能遺失
+    path = str(tmp_path / "review_history.jsonl")
+    hasher = MinHasher()
+    first = NearDuplicateIndex(path, hasher)
+    second = NearDuplicateIndex(path, hasher)
+    base, variant = _contract(), _contract(name="Maria", wage="30,000")
+    first.add("a", hasher.signature(base), {"clauses": [], "answers": []})
+    second.add("b", hasher.signature(variant), {"clauses": [], "answers": []})
+
+    assert set(NearDuplicateIndex(path, hasher).entries) == {"a", "b"}
+    match = first.query(hasher.signature(variant), threshold=0.9)
+    assert match is not None and match[0] == "b"
+
+
+def test_index_compacts_and_evicts_oldest(tmp_path):
+    path = str(tmp_path / "review_history.jsonl")
+    hasher = MinHasher()
+    index = NearDuplicateIndex(path, hasher, max_entries=3)
+    for idx in range(10):
+        index.add(str(idx), hasher.signature(_contract(name=f"worker{idx}")), {"clauses": [], "answers": []})
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) <= 2 * 3 + 1
+    assert set(NearDuplicateIndex(path, hasher, max_entries=3).entries) == {"7", "8", "9"}
@@ -0,0 +1,39 @@
+import pytest
+
+from prescreen import Prescreener
+
+
+def _rules(clause: str):
+    return [finding.rule for finding in Prescreener().screen(clause).findings]
+
+
+@pytest.mark.parametrize("clause", [
+    "勞工每月工資為新台幣 20,000 元，於次月十日發給。",
+    "月薪 2.5 萬元，每月十日發給。",
+    "時薪 150 元，依實際工作時數計算。",
+    "工資按每小時 150 元計算。",
+    "底薪新臺幣25,000元，另發給全勤獎金2,000元。",
+])
+def test_wage_below_minimum(clause):
+    assert "wage_below_minimum" in _rules(clause)
+
+
+@pytest.mark.parametrize("clause", [
+    # 其他費用的金額不是工資
+    "月薪新臺幣30,000元，每月膳宿費2,500元由工資中扣除。",
+    "每月工資新臺幣28,590元，工資中扣除膳宿費5,000元。",
+    "月薪新臺幣30,000元，每月伙食津貼2,400元。",
+    "雇主每月支付膳宿費5,000元，另給付工資新臺幣30,000元。",
+    # 有一個工資金額達到基本工資就不判定
+    "底薪新臺幣20,000元，月薪合計新臺幣30,000元。",
+    "時薪 200 元，每月工資依實際工時計算。",
+    "勞工每月工資為新台幣 28,590 元。",
+])
+def test_wage_not_flagged(clause):
+    assert "wage_below_minimum" not in _rules(clause)
+
+
+def test_reports_wage_amount():
+    findings = Prescreener().screen("月薪新臺幣20,000元，每月膳宿費2,500元由工資中扣除。").findings
+    wage = [finding for finding in findings if finding.rule == "wage_below_minimum"]
+    assert len(wage) == 1 and "20000" in wage[0].reason
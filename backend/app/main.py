@@ -36,6 +36,22 @@ app.mount("/reports", StaticFiles(directory="reports"), name="reports")
 # 註冊路由
 app.include_router(contract.router, prefix="/api/contracts", tags=["contracts"])
 
+@app.on_event("startup")
+async def startup():
+    # 啟動背景分析佇列
+    await contract.job_queue.start()
+    # 定期清除過期工作並復原中斷的工作
+    contract.start_job_maintenance()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await contract.stop_job_maintenance()
+    await contract.job_queue.stop()
+    # 關閉由後端自動啟動的常駐審查服務
+    await contract.analysis_service.shutdown_worker()
+    # 關閉掃描版 PDF 的 OCR 工作行程
+    contract.ocr_service.shutdown()
+
 @app.get("/")
 async def root():
     return {
@@ -1,32 +1,57 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pathlib import Path
-import shutil
+import os
 import time
 import asyncio
-from typing import Dict
+from typing import Dict, Optional
 
 from app.services.ocr_service import OCRService
 from app.services.analysis_service import AnalysisService
+from app.services.job_queue import JobQueue, JobQueueFullError
+from app.services.job_store import AsyncJobStore, FINISHED_STATUSES, create_job_store, new_job_id, new_owner_id
+from app.services.progress_events import ProgressBroker, format_sse
+from app.services.report_parser import IncrementalViolationParser, parse_violations
+from app.services.text_normalizer import normalize_contract_text
+from app.utils.file_handler import FileTooLargeError, save_stream
 
 router = APIRouter()
 
 # 初始化服務
 ocr_service = OCRService()
 analysis_service = AnalysisService()
+job_queue = JobQueue(
+    workers=int(os.getenv('ANALYSIS_QUEUE_WORKERS', '2')),
+    max_size=int(os.getenv('ANALYSIS_QUEUE_MAX_SIZE', '100'))
+)
 
 # 允許的檔案類型
 ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.pdf'}
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_FILE_SIZE = int(os.getenv('MAX_FILE_SIZE') or 10 * 1024 * 1024)  # 位元組，預設 10MB
 
-# 進度追蹤
-progress_store:  Dict[str, Dict] = {}
+# 進度追蹤（JOB_STORE_BACKEND=sqlite 時可由多個 uvicorn worker 共用，讀寫在執行緒中進行）
+job_store = AsyncJobStore(create_job_store())
+WORKER_OWNER_ID = new_owner_id()
+JOB_TTL_SECONDS = int(os.getenv('JOB_TTL_SECONDS', '3600'))             # 結束的工作保留多久
+JOB_STALE_SECONDS = int(os.getenv('JOB_STALE_SECONDS', '120'))          # 多久沒有心跳視為失聯
+JOB_MAINTENANCE_INTERVAL = int(os.getenv('JOB_MAINTENANCE_INTERVAL', '30'))
+_maintenance_task = None
 
+# 即時進度事件（SSE）
+progress_broker = ProgressBroker()
+SSE_REFRESH_SECONDS = float(os.getenv('SSE_REFRESH_SECONDS', '5'))
 
-def _update_progress(session_id: str, step_index: int, status: str):
-    """更新進度"""
-    if session_id in progress_store:
-        progress_data = progress_store[session_id]
+# 不回傳給 /progress 的內部欄位
+_INTERNAL_FIELDS = ('result', 'job', 'owner')
+
+
+def _public_progress(progress_data: Dict) -> Dict:
+    return {k: v for k, v in progress_data.items() if k not in _INTERNAL_FIELDS}
+
+
+async def _update_progress(session_id: str, step_index: int, status: str, detail: str = None):
+    """更新進度並推送給 SSE 訂閱者"""
+    def mutate(progress_data: Dict):
         if step_index < len(progress_data['steps']):
             # 標記前面的步驟為完成
             for i in range(step_index):
@@ -34,13 +59,248 @@ def _update_progress(session_id: str, step_index: int, status: str):
                     progress_data['steps'][i]['status'] = 'complete'
             
             progress_data['steps'][step_index]['status'] = status
+            if detail is not None:
+                progress_data['steps'][step_index]['detail'] = detail
             progress_data['current_step'] = step_index
+    
+    progress_data = await job_store.update(session_id, mutate)
+    if progress_data is not None:
+        progress_broker.publish(session_id, 'progress', _public_progress(progress_data))
+
+
+async def _set_job_status(session_id: str, status: str, **fields):
+    """更新工作狀態與附加欄位"""
+    def mutate(job: Dict):
+        job['status'] = status
+        job.update(fields)
+    
+    await job_store.update(session_id, mutate)
+    if status in FINISHED_STATUSES:
+        progress_broker.publish(session_id, 'done', {'status': status, 'error': fields.get('error')})
+
+
+def _make_stage_handler(session_id: str):
+    """把 OCR / AI 回報的階段事件轉為步驟進度，並轉送給 SSE 訂閱者"""
+    parser = IncrementalViolationParser()
+    state = {'streamed': False, 'violations': 0}
+
+    async def publish_violations(violations):
+        # 每完成一個違規項目就推送結構化結果，不必等整份報告
+        for violation in violations:
+            state['violations'] += 1
+            violation['id'] = state['violations']
+            progress_broker.publish(session_id, 'violation', {'index': violation['id'], 'violation': violation})
+        if violations:
+            await _update_progress(session_id, 4, 'active', detail=f"已找到 {state['violations']} 項違規")
+
+    async def on_stage(event: Dict):
+        stage = event.get('stage')
+        if stage == 'llm_token':
+            # LLM 串流輸出：轉送原文給前端，同時逐段解析違規項目
+            state['streamed'] = True
+            text = event.get('text', '')
+            progress_broker.publish(session_id, 'token', {'text': text})
+            await publish_violations(parser.feed(text))
+            return
+        if stage == 'violation':
+            # AI 端切好的違規項目；有 token 串流時已由解析器處理
+            if not state['streamed']:
+                await publish_violations(parse_violations(f"【違規項目 {event.get('index')}】\n{event.get('text', '')}"))
+            return
+        if stage == 'prescreen':
+            # 規則初篩的結果在 LLM 開始前就送出，作為初步結果顯示
+            findings = event.get('findings', [])
+            progress_broker.publish(session_id, 'prescreen', {'findings': findings, 'elapsed_ms': event.get('elapsed_ms')})
+            if findings:
+                await _update_progress(session_id, 3, 'active', detail=f"初步檢查發現 {len(findings)} 項疑似違規")
+            return
+        if stage == 'llm_done':
+            await publish_violations(parser.close())
+        elif stage == 'ocr_page':
+            await _update_progress(session_id, 0, 'active', detail=f"{event.get('page')}/{event.get('total')}")
+        elif stage == 'ocr_done':
+            detail = f"文字層 {event.get('text_pages')} 頁、OCR {event.get('ocr_pages')} 頁"
+            if event.get('cached_pages'):
+                detail += f"、快取 {event.get('cached_pages')} 頁"
+            await _update_progress(session_id, 0, 'active', detail=detail)
+        elif stage == 'kb_loaded':
+            await _update_progress(session_id, 3, 'active')        # 法規資料庫已載入，開始檢索
+        elif stage == 'retrieval_done':
+            await _update_progress(session_id, 4, 'active')        # 檢索完成，LLM 分析中
+        progress_broker.publish(session_id, 'stage', event)
+    
+    return on_stage
+
+
+async def _run_analysis_pipeline(session_id: str, upload_path: Path, language: str, report_token: str,
+                                 file_hash: Optional[str] = None) -> Dict:
+    """執行 OCR → AI 分析 → 產生報告，回傳結構化報告"""
+    try:
+        # 開始進度追蹤 - 步驟 1:  OCR 提取文字
+        print(f"🔍 開始 OCR 提取...")
+        on_stage = _make_stage_handler(session_id)
+        await _update_progress(session_id, 0, 'active')
+        extracted_text = await ocr_service.extract_text(str(upload_path), on_stage, file_hash)
+        
+        # 清理頁首頁尾、空白、斷行與數字寫法，減少送進 LLM 的 token
+        contract_text = normalize_contract_text(extracted_text)
+        stats = contract_text.stats()
+        print(f"🧹 文字正規化：{stats['chars_before']} → {stats['chars_after']} 字元，"
+              f"約省下 {stats['tokens_saved']} tokens ({stats['tokens_before']} → {stats['tokens_after']})")
+        
+        if len(contract_text.text) < 50:
+            await _update_progress(session_id, 0, 'complete')
+            raise HTTPException(
+                status_code=400,
+                detail="無法提取足夠的文字內容，請確認檔案清晰度"
+            )
+        await _update_progress(session_id, 0, 'complete')
+        print(f"✅ OCR 完成，已提取 {len(extracted_text)} 字符")
+        
+        # 步驟 2: 儲存提取的文字
+        print(f"💾 儲存契約文本...")
+        await _update_progress(session_id, 1, 'active')
+        contract_filename = f"contract-{report_token}.txt"
+        contract_path = Path("contracts") / contract_filename
+        await ocr_service.save_text_to_file(contract_text.text, str(contract_path))
+        # 原始 OCR 文字：違規項目的 sourceOffset 指向這份檔案
+        await ocr_service.save_text_to_file(extracted_text, str(contract_path.with_suffix('.ocr.txt')))
+        await _update_progress(session_id, 1, 'complete')
+        print(f"✅ 契約文本已儲存")
+        
+        # 步驟 3-5: 載入法規向量資料庫 → 搜尋相關法條 → AI 分析（由 AI 模組回報實際進度）
+        print(f"🤖 執行 AI 分析...")
+        await _update_progress(session_id, 2, 'active')
+        analysis = await analysis_service.analyze_contract(
+            str(contract_path),
+            language,
+            job_id=session_id,
+            on_event=on_stage
+        )
+        await _update_progress(session_id, 4, 'complete')
+        print(f"✅ AI 分析完成")
+        
+        # 步驟 6: 儲存文字報告（由 AI 依結構化結果產生，供下載）
+        print(f"📋 處理報告...")
+        await _update_progress(session_id, 5, 'active')
+        final_report_filename = f"report-{report_token}.txt"
+        final_report_path = Path("reports") / final_report_filename
+        final_report_path.write_text(analysis['report_text'], encoding='utf-8')
+        await _update_progress(session_id, 5, 'complete')
+        print(f"✅ 報告已處理")
+        
+        # 步驟 7: 產生結構化報告
+        print(f"📊 產生結構化報告...")
+        await _update_progress(session_id, 6, 'active')
+        structured_report = analysis_service.build_structured_report(
+            analysis['review'],
+            language,
+            report_token,
+            contract_text,
+            contract_filename
+        )
+        await _update_progress(session_id, 6, 'complete')
+        print(f"✅ 結構化報告完成")
+        
+        return structured_report
+    finally:
+        # 清理
+        analysis_service.cleanup_job(session_id)
+        if upload_path.exists():
+            upload_path.unlink()
+
+
+async def _run_queued_job(session_id: str, upload_path: Path, language: str, report_token: str,
+                          file_hash: Optional[str] = None) -> None:
+    """背景執行排隊中的分析工作，結果存入工作儲存"""
+    if await job_store.get(session_id) is None:
+        return
+    await _set_job_status(session_id, 'running')
+    try:
+        structured_report = await _run_analysis_pipeline(session_id, upload_path, language, report_token, file_hash)
+        await _set_job_status(session_id, 'complete', result=structured_report)
+        print(f"✅ 工作完成: {session_id}")
+    except HTTPException as e:
+        await _set_job_status(session_id, 'failed', error=e.detail)
+    except Exception as e:
+        print(f"❌ 錯誤:  {str(e)}")
+        await _set_job_status(session_id, 'failed', error=f"處理失敗: {str(e)}")
+
+
+async def _enqueue_job(session_id: str, upload_path: Path, language: str, report_token: str,
+                       file_hash: Optional[str] = None) -> int:
+    return await job_queue.enqueue(
+        session_id,
+        lambda: _run_queued_job(session_id, upload_path, language, report_token, file_hash)
+    )
+
+
+async def recover_stale_jobs() -> None:
+    """接手失聯（process 重啟或當機）的 async 工作，重新排入佇列"""
+    for job in await job_store.claim_stale(WORKER_OWNER_ID, JOB_STALE_SECONDS):
+        session_id = job['id']
+        params = job.get('job') or {}
+        upload_path = Path(params.get('upload_path', ''))
+        if not params.get('async'):
+            # 同步上傳的請求已隨 process 中斷，重新執行也沒有人會取回結果
+            await _set_job_status(session_id, 'failed', error="伺服器重新啟動，分析已中斷，請重新上傳")
+            if upload_path.is_file():
+                upload_path.unlink()
+            print(f"⚠️ 同步工作已中斷，不復原: {session_id}")
+            continue
+        if not upload_path.is_file():
+            await _set_job_status(session_id, 'failed', error="伺服器重新啟動，上傳檔案已遺失，請重新上傳")
+            print(f"⚠️ 無法復原工作: {session_id}")
+            continue
+        
+        def reset(progress_data: Dict):
+            progress_data['status'] = 'queued'
+            progress_data['current_step'] = 0
+            for step in progress_data['steps']:
+                step['status'] = 'pending'
+        
+        await job_store.update(session_id, reset)
+        try:
+            await _enqueue_job(session_id, upload_path, params['language'], params['report_token'],
+                               params.get('file_hash'))
+            print(f"♻️ 已復原工作: {session_id}")
+        except JobQueueFullError as e:
+            await _set_job_status(session_id, 'failed', error=str(e))
+
+
+async def _job_maintenance_loop() -> None:
+    """定期更新心跳、清除過期工作並接手失聯的工作"""
+    while True:
+        try:
+            await job_store.heartbeat(WORKER_OWNER_ID)
+            removed = await job_store.cleanup_expired(JOB_TTL_SECONDS)
+            if removed:
+                print(f"🧹 已清除 {removed} 筆過期工作")
+            await recover_stale_jobs()
+        except Exception as e:
+            print(f"❌ 工作維護失敗: {e}")
+        await asyncio.sleep(JOB_MAINTENANCE_INTERVAL)
+
+
+def start_job_maintenance() -> None:
+    global _maintenance_task
+    if _maintenance_task is None:
+        _maintenance_task = asyncio.create_task(_job_maintenance_loop())
+
+
+async def stop_job_maintenance() -> None:
+    global _maintenance_task
+    if _maintenance_task is not None:
+        _maintenance_task.cancel()
+        await asyncio.gather(_maintenance_task, return_exceptions=True)
+        _maintenance_task = None
 
 
 @router.post("/upload")
 async def upload_contract(
     file: UploadFile = File(...),
-    language: str = Query('zh-TW')
+    language: str = Query('zh-TW'),
+    async_mode: bool = Query(False, alias='async')
 ) -> Dict:
     """
     上傳契約檔案並進行分析（多語言版本）
@@ -48,6 +308,7 @@ async def upload_contract(
     - 支援格式:  JPG, PNG, PDF
     - 檔案大小上限: 10MB
     - 支援語言: zh-TW, en, vi, id, tl, th
+    - async=true 時立即回傳 202 與 sessionId，結果由 /result/{session_id} 取得
     """
     
     # 驗證語言參數
@@ -65,11 +326,22 @@ async def upload_contract(
     
     print(f"📥 收到檔案: {file.filename}, 語言: {language}")
     
-    timestamp = int(time.time())
-    session_id = f"session-{timestamp}"
+    session_id = new_job_id()
+    report_token = f"{int(time.time())}-{session_id[-8:]}"   # 檔名用，避免同一秒上傳互相覆蓋
+    upload_filename = f"{report_token}_{Path(file.filename).name}"
+    upload_path = Path("uploads") / upload_filename
+    
+    # 步驟 1: 儲存檔案（邊寫入邊計算雜湊，作為 OCR 快取的鍵）
+    try:
+        file_hash, file_size = await asyncio.to_thread(save_stream, file.file, upload_path, MAX_FILE_SIZE)
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    print(f"📁 檔案已儲存（{file_size} bytes, sha256 {file_hash[:12]}）")
     
     # 初始化進度
-    progress_store[session_id] = {
+    await job_store.create(session_id, {
+        'id': session_id,
+        'status': 'queued' if async_mode else 'running',
         'current_step': 0,
         'total_steps': 7,
         'steps': [
@@ -80,126 +352,150 @@ async def upload_contract(
             {'id': '5', 'message': 'AI 分析契約內容...', 'status': 'pending'},
             {'id':  '6', 'message': '生成違規項目列表...', 'status': 'pending'},
             {'id':  '7', 'message': '生成最終報告...', 'status': 'pending'},
-        ]
-    }
+        ],
+        'job': {
+            'upload_path': str(upload_path),
+            'language': language,
+            'report_token': report_token,
+            'file_hash': file_hash,
+            'async': async_mode,        # 只有 async 的工作有人來取結果，重啟後才需要復原
+        },
+    }, owner=WORKER_OWNER_ID)
     
     print(f"✅ 創建 session: {session_id}")
     
-    upload_filename = f"{timestamp}_{file.filename}"
-    upload_path = Path("uploads") / upload_filename
+    if async_mode:
+        try:
+            queued = await _enqueue_job(session_id, upload_path, language, report_token, file_hash)
+        except JobQueueFullError as e:
+            upload_path.unlink()
+            await job_store.delete(session_id)
+            raise HTTPException(status_code=503, detail=str(e))
+        print(f"📬 已排入分析佇列: {session_id}（排隊中 {queued} 件）")
+        return JSONResponse(
+            status_code=202,
+            content={
+                "success": True,
+                "message": "契約已排入分析佇列",
+                "sessionId": session_id,
+                "status": "queued",
+                "progress_url": f"/api/contracts/progress/{session_id}",
+                "result_url": f"/api/contracts/result/{session_id}",
+            }
+        )
     
     try:
-        # 步驟 1: 儲存檔案
-        with upload_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        print(f"📁 檔案已儲存")
-        
-        # 開始進度追蹤 - 步驟 1:  OCR 提取文字
-        print(f"🔍 開始 OCR 提取...")
-        _update_progress(session_id, 0, 'active')
-        extracted_text = await ocr_service.extract_text(str(upload_path))
-        
-        if not extracted_text or len(extracted_text.strip()) < 50:
-            _update_progress(session_id, 0, 'complete')
-            if session_id in progress_store: 
-                del progress_store[session_id]
-            raise HTTPException(
-                status_code=400,
-                detail="無法提取足夠的文字內容，請確認檔案清晰度"
-            )
-        _update_progress(session_id, 0, 'complete')
-        print(f"✅ OCR 完成，已提取 {len(extracted_text)} 字符")
-        
-        # 步驟 2: 儲存提取的文字
-        print(f"💾 儲存契約文本...")
-        _update_progress(session_id, 1, 'active')
-        contract_filename = f"contract-{timestamp}.txt"
-        contract_path = Path("contracts") / contract_filename
-        await ocr_service.save_text_to_file(extracted_text, str(contract_path))
-        _update_progress(session_id, 1, 'complete')
-        print(f"✅ 契約文本已儲存")
-        
-        # 步驟 3: 載入法規向量資料庫
-        print(f"📚 載入法規向量資料庫...")
-        _update_progress(session_id, 2, 'active')
-        await asyncio.sleep(1.5)
-        _update_progress(session_id, 2, 'complete')
-        print(f"✅ 法規資料庫已載入")
-        
-        # 步驟 4: 搜尋相關法條
-        print(f"🔎 搜尋相關法條...")
-        _update_progress(session_id, 3, 'active')
-        await asyncio.sleep(1)
-        _update_progress(session_id, 3, 'complete')
-        print(f"✅ 找到相關法條")
-        
-        # 步驟 5: AI 分析
-        print(f"🤖 執行 AI 分析...")
-        _update_progress(session_id, 4, 'active')
-        report_path = await analysis_service.analyze_contract(str(contract_path), language)
-        report_content = await analysis_service.get_report_content(report_path)
-        _update_progress(session_id, 4, 'complete')
-        print(f"✅ AI 分析完成")
-        
-        # 步驟 6: 處理報告
-        print(f"📋 處理報告...")
-        _update_progress(session_id, 5, 'active')
-        final_report_filename = f"report-{timestamp}.txt"
-        final_report_path = Path("reports") / final_report_filename
-        shutil.copy2(report_path, final_report_path)
-        _update_progress(session_id, 5, 'complete')
-        print(f"✅ 報告已處理")
-        
-        # 步驟 7: 解析報告
-        print(f"📊 解析報告為 JSON...")
-        _update_progress(session_id, 6, 'active')
-        structured_report = await analysis_service.parse_report_to_json(
-            report_content,
-            language,
-            timestamp,
-            extracted_text,
-            contract_filename
-        )
-        _update_progress(session_id, 6, 'complete')
-        print(f"✅ 報告解析完成")
-        
-        # 清理
-        upload_path.unlink()
+        structured_report = await _run_analysis_pipeline(session_id, upload_path, language, report_token, file_hash)
+        progress_broker.publish(session_id, 'done', {'status': 'complete', 'error': None})
         
         # 返回結果和 sessionId
-        result = {
+        return {
             "success": True,
             "message": "契約分析完成",
             "sessionId": session_id,
             "data": structured_report
         }
         
-        # 清除進度紀錄
-        if session_id in progress_store:
-            del progress_store[session_id]
-        
-        return result
-        
-    except HTTPException:
-        if session_id in progress_store: 
-            del progress_store[session_id]
+    except HTTPException as e:
+        progress_broker.publish(session_id, 'done', {'status': 'failed', 'error': e.detail})
         raise
     except Exception as e:
-        if upload_path.exists():
-            upload_path.unlink()
-        if session_id in progress_store: 
-            del progress_store[session_id]
         print(f"❌ 錯誤:  {str(e)}")
+        progress_broker.publish(session_id, 'done', {'status': 'failed', 'error': f"處理失敗: {str(e)}"})
         raise HTTPException(status_code=500, detail=f"處理失敗: {str(e)}")
+    finally:
+        # 清除進度紀錄
+        await job_store.delete(session_id)
+
+
+@router.get("/result/{session_id}")
+async def get_result(session_id: str):
+    """取得非同步分析結果"""
+    progress_data = await job_store.get(session_id)
+    if progress_data is None:
+        raise HTTPException(status_code=404, detail="找不到分析工作")
+    
+    status = progress_data.get('status')
+    if status == 'complete':
+        return {
+            "success": True,
+            "message": "契約分析完成",
+            "sessionId": session_id,
+            "data": progress_data.get('result')
+        }
+    if status == 'failed':
+        raise HTTPException(status_code=500, detail=progress_data.get('error', '處理失敗'))
+    
+    return JSONResponse(
+        status_code=202,
+        content={
+            "success": True,
+            "message": "契約分析中",
+            "sessionId": session_id,
+            "status": status,
+            "current_step": progress_data['current_step'],
+        }
+    )
 
 
 @router.get("/progress/{session_id}")
 async def get_progress(session_id:  str):
     """獲取分析進度"""
-    if session_id not in progress_store: 
+    progress_data = await job_store.get(session_id)
+    if progress_data is None: 
         return {"status": "not_found"}
     
-    return progress_store[session_id]
+    return _public_progress(progress_data)
+
+
+@router.get("/progress/{session_id}/stream")
+async def stream_progress(session_id: str):
+    """以 Server-Sent Events 即時推送分析進度（progress / stage / token / violation / done 事件）"""
+    async def event_stream():
+        queue = progress_broker.subscribe(session_id)
+        try:
+            progress_data = await job_store.get(session_id)
+            if progress_data is None:
+                yield format_sse('done', {'status': 'not_found', 'error': None})
+                return
+            yield format_sse('progress', _public_progress(progress_data))
+            if progress_data.get('status') in FINISHED_STATUSES:
+                yield format_sse('done', {'status': progress_data['status'], 'error': progress_data.get('error')})
+                return
+            
+            last_updated = progress_data.get('updated_at')
+            while True:
+                try:
+                    event_type, data = await asyncio.wait_for(queue.get(), timeout=SSE_REFRESH_SECONDS)
+                except asyncio.TimeoutError:
+                    # 事件可能由其他 uvicorn worker 處理，改從工作儲存讀取最新狀態
+                    progress_data = await job_store.get(session_id)
+                    if progress_data is None:
+                        yield format_sse('done', {'status': 'not_found', 'error': None})
+                        return
+                    if progress_data.get('updated_at') != last_updated:
+                        last_updated = progress_data.get('updated_at')
+                        yield format_sse('progress', _public_progress(progress_data))
+                    else:
+                        yield ": keep-alive\n\n"
+                    if progress_data.get('status') in FINISHED_STATUSES:
+                        yield format_sse('done', {'status': progress_data['status'], 'error': progress_data.get('error')})
+                        return
+                    continue
+                
+                if event_type == 'progress':
+                    last_updated = data.get('updated_at')
+                yield format_sse(event_type, data)
+                if event_type == 'done':
+                    return
+        finally:
+            progress_broker.unsubscribe(session_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 
 @router.get("/download/{filename}")
@@ -1,12 +1,21 @@
-import subprocess
+import asyncio
+import json
 import sys
 import os
+import uuid
 from pathlib import Path
 import shutil
 import platform
 import time
-import re
 from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.services.review_worker_client import ReviewWorkerClient
+from app.services.text_normalizer import NormalizedText
+
+# law_main.py 以此前綴在 stdout 輸出進度事件（單行 JSON）
+EVENT_PREFIX = "@@FLAS_EVENT "
+EventCallback = Callable[[Dict[str, Any]], Awaitable[None]]
 
 class AnalysisService:
     """契約分析服務 - 呼叫 AI 模組"""
@@ -15,14 +24,31 @@ class AnalysisService:
         self.ai_dir = Path(__file__).parent.parent.parent.parent / "AI"
         self.law_main_path = self.ai_dir / "law_main.py"
         self.python_executable = self._get_ai_python()
-        self.ai_contracts_dir = self.ai_dir / "contracts"
-        self.ai_contracts_dir.mkdir(exist_ok=True)
+        self.jobs_dir = self.ai_dir / "jobs"
+        self.jobs_dir.mkdir(exist_ok=True)
         
         if not self.law_main_path.exists():
             raise Exception(f"找不到 AI 模組:  {self.law_main_path}")
         
+        # 執行模式：subprocess（每次啟動 law_main.py）或 worker（常駐審查服務）
+        self.execution_mode = os.getenv('AI_EXECUTION_MODE', 'subprocess')
+        self.worker_client = ReviewWorkerClient(
+            host=os.getenv('REVIEW_WORKER_HOST', '127.0.0.1'),
+            port=int(os.getenv('REVIEW_WORKER_PORT', '8765'))
+        )
+        self.worker_autostart = os.getenv('AI_WORKER_AUTOSTART', 'true').lower() == 'true'
+        self.worker_startup_timeout = int(os.getenv('AI_WORKER_STARTUP_TIMEOUT', '300'))
+        self._worker_process = None
+        self._worker_lock = asyncio.Lock()
+        
+        # 同時執行的分析數量上限與單次分析逾時
+        self.max_concurrency = max(1, int(os.getenv('AI_MAX_CONCURRENCY', '2')))
+        self.timeout = int(os.getenv('AI_ANALYSIS_TIMEOUT', '600'))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        
         print(f"✅ AI 模組路徑: {self.ai_dir}")
         print(f"✅ Python 執行檔: {self.python_executable}")
+        print(f"✅ AI 執行模式: {self.execution_mode} (同時分析上限: {self.max_concurrency})")
     
     def _get_ai_python(self) -> str:
         """取得 AI venv 的 Python 執行檔路徑"""
@@ -40,143 +66,188 @@ class AnalysisService:
             print(f"⚠️ 找不到 AI venv，使用系統 Python")
             return sys.executable
     
-    async def analyze_contract(self, contract_text_path: str, language: str = 'zh-TW') -> str:
-        """執行契約分析（支援多語言）"""
-        print(f"🔍 開始分析契約: {contract_text_path}, 語言: {language}")
-        
-        try:
-            # 步驟 1: 複製契約到 AI 資料夾
-            contract_filename = Path(contract_text_path).name
-            ai_contract_path = self.ai_contracts_dir / contract_filename
-            shutil.copy2(contract_text_path, ai_contract_path)
-            print(f"📋 契約已複製到:  {ai_contract_path}")
-            
-            # 步驟 2: 執行 AI 分析（傳遞語言參數）
-            cmd = [
-                self.python_executable,      # Python 執行檔
-                str(self.law_main_path),     # law_main.py
-                str(ai_contract_path),       # 契約檔案路徑
-                language                     # 🎯 語言參數
-            ]
-            
-            print(f"🚀 執行命令: {' '.join(cmd)}")
-            
-            result = subprocess.run(
-                cmd,
-                cwd=str(self.ai_dir),
-                capture_output=False,
-                timeout=600,
-                stdout=None,
-                stderr=None
-            )
+    async def ensure_worker(self) -> None:
+        """確認常駐審查服務可用，必要時自動啟動"""
+        async with self._worker_lock:
+            if await self.worker_client.ping():
+                return
+            if not self.worker_autostart:
+                raise Exception(f"無法連線到審查服務 {self.worker_client.host}:{self.worker_client.port}")
             
-            # 檢查執行狀態
-            if result.returncode != 0:
-                print(f"❌ AI 分析失敗，返回碼: {result.returncode}")
-                raise Exception(f"AI 分析失敗，返回碼: {result.returncode}")
+            if self._worker_process is None or self._worker_process.returncode is not None:
+                print(f"🚀 啟動常駐審查服務 (port {self.worker_client.port})...")
+                self._worker_process = await asyncio.create_subprocess_exec(
+                    self.python_executable,
+                    str(self.law_main_path),
+                    '--serve',
+                    str(self.worker_client.port),
+                    cwd=str(self.ai_dir)
+                )
             
-            print(f"✅ AI 執行完成")
-            
-            # 步驟 3: 等待並檢查報告
-            report_path = self.ai_dir / "report.txt"
-            
-            for i in range(10):
-                if report_path.exists():
-                    file_size = report_path.stat().st_size
-                    print(f"📄 找到報告: {report_path} (大小: {file_size} bytes)")
-                    
-                    if file_size > 100:  # 確保報告有內容
-                        break
-                    else:
-                        print(f"⚠️ 報告檔案過小，繼續等待...")
-                
-                print(f"⏳ 等待報告生成...({i+1}/10)")
-                time.sleep(1)
-            
-            if not report_path.exists():
-                raise Exception("找不到分析報告檔案 report.txt")
-            
-            if report_path.stat().st_size < 100:
-                raise Exception("報告檔案過小或為空")
+            # 等待模型與向量庫載入完成
+            deadline = time.monotonic() + self.worker_startup_timeout
+            while time.monotonic() < deadline:
+                if self._worker_process.returncode is not None:
+                    raise Exception(f"審查服務啟動失敗，返回碼: {self._worker_process.returncode}")
+                if await self.worker_client.ping():
+                    print(f"✅ 審查服務已就緒")
+                    return
+                await asyncio.sleep(1)
+            raise Exception("審查服務啟動逾時")
+    
+    async def shutdown_worker(self) -> None:
+        """關閉由本服務啟動的審查服務"""
+        if self._worker_process is not None and self._worker_process.returncode is None:
+            self._worker_process.terminate()
+            await self._worker_process.wait()
+        self._worker_process = None
+    
+    def _create_job_dir(self, job_id: str) -> Path:
+        """建立單一分析工作的獨立資料夾"""
+        job_dir = self.jobs_dir / job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
+        return job_dir
+    
+    def cleanup_job(self, job_id: str) -> None:
+        """刪除分析工作的暫存資料夾"""
+        shutil.rmtree(self.jobs_dir / job_id, ignore_errors=True)
+    
+    async def _analyze_with_worker(self, contract_path: Path,
+                                   on_event: Optional[EventCallback] = None) -> Dict[str, Any]:
+        """透過常駐審查服務執行分析，審查結果直接由 RPC 回傳（審查內容為中文，語言只用於報告）"""
+        await self.ensure_worker()
+        result = await self.worker_client.call(
+            'review',
+            {
+                'contract_path': str(contract_path),
+            },
+            timeout=self.timeout,
+            on_event=on_event
+        )
+        print(f"✅ AI 執行完成 (審查耗時 {result.get('processing_time', 0):.2f}s)")
+        return result
+    
+    async def _forward_output(self, stream: asyncio.StreamReader, on_event: Optional[EventCallback]) -> None:
+        """轉送 law_main.py 的輸出，並把進度事件交給 on_event"""
+        while True:
+            line = await stream.readline()
+            if not line:
+                break
+            text = line.decode('utf-8', errors='replace').rstrip()
+            if text.startswith(EVENT_PREFIX):
+                if on_event is not None:
+                    try:
+                        await on_event(json.loads(text[len(EVENT_PREFIX):]))
+                    except ValueError:
+                        pass
+                continue
+            print(text)
+    
+    async def _analyze_with_subprocess(self, contract_path: Path, language: str, result_path: Path,
+                                       on_event: Optional[EventCallback] = None) -> Dict[str, Any]:
+        """啟動 law_main.py 執行分析（不阻塞事件迴圈），讀回結構化審查結果"""
+        cmd = [
+            self.python_executable,      # Python 執行檔
+            str(self.law_main_path),     # law_main.py
+            str(contract_path),          # 契約檔案路徑
+            language,                    # 🎯 語言參數
+            str(result_path)             # 審查結果輸出路徑（.json）
+        ]
+        
+        print(f"🚀 執行命令: {' '.join(cmd)}")
+        
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=str(self.ai_dir),
+            stdout=asyncio.subprocess.PIPE,
+            limit=1024 * 1024,
+            env={**os.environ, 'FLAS_EVENTS': '1', 'PYTHONUNBUFFERED': '1'}
+        )
+        try:
+            await asyncio.wait_for(self._forward_output(process.stdout, on_event), timeout=self.timeout)
+            returncode = await process.wait()
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+        
+        # 檢查執行狀態
+        if returncode != 0:
+            print(f"❌ AI 分析失敗，返回碼: {returncode}")
+            raise Exception(f"AI 分析失敗，返回碼: {returncode}")
+        
+        if not result_path.exists():
+            raise Exception("找不到審查結果檔案")
+        with open(result_path, 'r', encoding='utf-8') as f:
+            result = json.load(f)
+        print(f"✅ AI 執行完成")
+        return result
+    
+    async def analyze_contract(self, contract_text_path: str, language: str = 'zh-TW', job_id: str = None,
+                               on_event: Optional[EventCallback] = None) -> Dict[str, Any]:
+        """執行契約分析（支援多語言），回傳 {'review': 結構化結果, 'report_text': 文字報告}；on_event 接收 AI 各階段事件"""
+        job_id = job_id or f"job-{int(time.time())}-{uuid.uuid4().hex[:8]}"
+        print(f"🔍 開始分析契約: {contract_text_path}, 語言: {language}, 工作: {job_id}")
+        contract_path = Path(contract_text_path).resolve()
+        
+        try:
+            # 執行 AI 分析（限制同時執行數量）
+            if self._semaphore.locked():
+                print(f"⏳ 已達同時分析上限 ({self.max_concurrency})，排隊中...")
+            async with self._semaphore:
+                if self.execution_mode == 'worker':
+                    result = await self._analyze_with_worker(contract_path, on_event)
+                else:
+                    # 子程序只能透過檔案回傳結果，放在工作專屬資料夾
+                    result_path = self._create_job_dir(job_id) / "review.json"
+                    result = await self._analyze_with_subprocess(contract_path, language, result_path.resolve(), on_event)
             
-            return str(report_path)
+            # 檢查審查結果
+            review = result.get('review')
+            if not isinstance(review, dict) or not isinstance(review.get('violations'), list):
+                raise Exception("審查結果格式錯誤")
+            if review.get('errors') and not review['violations'] and not review.get('related_laws'):
+                raise Exception('；'.join(review['errors']))
+            print(f"📄 審查結果: {len(review['violations'])} 個違規項目")
+            return result
             
-        except subprocess.TimeoutExpired:
-            print("❌ AI 分析超時（超過 10 分鐘）")
+        except asyncio.TimeoutError:
+            print(f"❌ AI 分析超時（超過 {self.timeout} 秒）")
             raise Exception("AI 分析超時")
         except Exception as e:
             print(f"❌ 分析過程失敗: {e}")
             raise Exception(f"契約分析失敗:  {str(e)}")
     
-    async def get_report_content(self, report_path: str) -> str:
-        """讀取報告內容"""
-        try: 
-            with open(report_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            if not content or len(content) < 100:
-                raise Exception("報告內容過短或為空")
-            
-            print(f"✅ 成功讀取報告，長度: {len(content)} 字元")
-            return content
-        except Exception as e:
-            raise Exception(f"無法讀取報告: {str(e)}")
-    
-    async def parse_report_to_json(self, report_content: str, language: str, timestamp: int, extracted_text: str, contract_filename: str) -> dict:
-        """解析報告為結構化 JSON（支援多語言）"""
-        print(f"📊 解析報告為 JSON 格式...")
+    def build_structured_report(self, review: Dict[str, Any], language: str, report_token: str,
+                                contract_text: NormalizedText, contract_filename: str) -> dict:
+        """把 AI 回傳的結構化審查結果轉成前端使用的 JSON（支援多語言），並標出條款原文在 OCR 文字中的位置"""
+        print(f"📊 產生結構化報告...")
         
         try:
-            # 提取違規項目
-            violations = []
-            violation_pattern = r'【違規項目\s*(\d+)】(.*?)(?=【違規項目|\n=|$)'
-            matches = re.findall(violation_pattern, report_content, re.DOTALL)
-            
-            for idx, (violation_num, content) in enumerate(matches, 1):
-                # 提取各個部分
-                original_match = re.search(r'1\.\s*違法條款原文[: ：](.*?)(?=2\.|$)', content, re.DOTALL)
-                laws_match = re.search(r'2\.\s*違反法規[: ：](.*?)(?=3\.|$)', content, re.DOTALL)
-                reason_match = re.search(r'3\.\s*違法原因[:：](.*?)(?=4\.|$)', content, re.DOTALL)
-                suggestion_match = re.search(r'4\.\s*修改建議[:：](.*?)(?=$|---)', content, re.DOTALL)
-                
-                original_text = original_match.group(1).strip() if original_match else ''
-                violated_laws_str = laws_match.group(1).strip() if laws_match else ''
-                
-                # 分割法規（用；或\n分割）
-                violated_laws = [l.strip() for l in re.split(r'[；\n]', violated_laws_str) if l.strip()]
-                
-                violation = {
+            violations = [
+                {
                     'id': idx,
-                    'originalText': original_text[: 200],  # 限制長度
-                    'violatedLaws': violated_laws[: 3],    # 最多 3 個法規
-                    'reason': reason_match.group(1).strip()[:300] if reason_match else '',
-                    'suggestion': suggestion_match.group(1).strip()[:300] if suggestion_match else '',
+                    'originalText': item['original_text'],
+                    'violatedLaws': item['violated_laws'],
+                    'reason': item['reason'],
+                    'suggestion': item['suggestion'],
+                    'sourceOffset': contract_text.locate(item['original_text']),
                 }
-                violations.append(violation)
-            
-            # 提取相關法條
-            related_laws = []
-            laws_section_match = re.search(r'本次審查參考法規條文.*?\n={10,}(.*?)$', report_content, re.DOTALL)
+                for idx, item in enumerate(review['violations'], 1)
+            ]
             
-            if laws_section_match: 
-                laws_content = laws_section_match.group(1)
-                law_pattern = r'(\d+)\.\s*【問題】(.*?)【法規依據】(.*?)(?:罰則|來源)(.*?)(?=\n\d+\.|$)'
-                law_matches = re.findall(law_pattern, laws_content, re.DOTALL)
-                
-                for idx, (num, question, basis, penalty_and_source) in enumerate(law_matches[: 5], 1):
-                    # 分離罰則和來源
-                    penalty_match = re.search(r'罰則[: ：](.*?)(?:來源|【|$)', penalty_and_source, re.DOTALL)
-                    source_match = re.search(r'來源[:：]\s*(\S+)', penalty_and_source)
-                    
-                    related_law = {
-                        'id':  idx,
-                        'question': question.strip()[:150],
-                        'lawBasis': basis.strip()[:200],
-                        'penalty': penalty_match.group(1).strip()[:200] if penalty_match else '',
-                        'explanation': '',
-                        'source': source_match.group(1).strip() if source_match else 'new_law.json',
-                    }
-                    related_laws.append(related_law)
+            # 相關法條取前 5 條
+            related_laws = [
+                {
+                    'id': idx,
+                    'question': law.get('question', ''),
+                    'lawBasis': law.get('law_basis') or law.get('content', ''),
+                    'penalty': law.get('penalty', ''),
+                    'explanation': law.get('explanation', ''),
+                    'source': law.get('source') or 'new_law.json',
+                }
+                for idx, law in enumerate(review.get('related_laws', [])[:5], 1)
+            ]
             
             # 判斷嚴重程度
             total_violations = len(violations)
@@ -201,13 +272,14 @@ class AnalysisService:
             }
             
             structured_report = {
-                'report_id': f'report-{timestamp}',
-                'extracted_text_length': len(extracted_text),
+                'report_id': f'report-{report_token}',
+                'extracted_text_length': len(contract_text.original),
                 'language': language,
                 'title': titles.get(language, titles['zh-TW']),
-                'review_date': datetime.now().strftime('%Y-%m-%d'),
+                'review_date': review.get('review_date') or datetime.now().strftime('%Y-%m-%d'),
                 'contract_file': contract_filename,
-                'contract_length': len(extracted_text),
+                'contract_length': len(contract_text.text),
+                'text_normalization': contract_text.stats(),
                 'violations': violations,
                 'related_laws': related_laws,
                 'summary': {
@@ -215,23 +287,23 @@ class AnalysisService:
                     'severity_level': severity,
                     'overall_status': overall_status,
                 },
-                'download_url': f'/api/contracts/download/report-{timestamp}.txt',
+                'download_url': f'/api/contracts/download/report-{report_token}.txt',
             }
             
-            print(f"✅ 報告解析完成：{total_violations} 個違規項目，{len(related_laws)} 條相關法規")
+            print(f"✅ 結構化報告完成：{total_violations} 個違規項目，{len(related_laws)} 條相關法規")
             return structured_report
             
         except Exception as e:
-            print(f"❌ 報告解析失敗: {e}")
+            print(f"❌ 結構化報告產生失敗: {e}")
             # 返回基本結構避免完全失敗
             return {
-                'report_id': f'report-{timestamp}',
-                'extracted_text_length':  len(extracted_text),
+                'report_id': f'report-{report_token}',
+                'extracted_text_length':  len(contract_text.original),
                 'language': language,
                 'title': '審查報告',
                 'review_date': datetime.now().strftime('%Y-%m-%d'),
                 'contract_file': contract_filename,
-                'contract_length': len(extracted_text),
+                'contract_length': len(contract_text.text),
                 'violations': [],
                 'related_laws': [],
                 'summary': {
@@ -239,5 +311,5 @@ class AnalysisService:
                     'severity_level': 'unknown',
                     'overall_status': 'error',
                 },
-                'download_url': f'/api/contracts/download/report-{timestamp}.txt',
+                'download_url': f'/api/contracts/download/report-{report_token}.txt',
             }
\ No newline at end of file
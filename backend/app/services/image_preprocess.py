@@ -0,0 +1,139 @@
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Tuple
+
+import numpy as np
+from PIL import Image, ImageFilter, ImageOps
+
+# 裁邊、校正歪斜與二值化都以灰階計算，只要啟用其中一項就會先轉灰階，因此灰階不是獨立的步驟
+PREPROCESS_STEPS = ('downscale', 'crop', 'deskew', 'binarize')
+
+
+@dataclass
+class PreprocessConfig:
+    """OCR 前的影像前處理設定（手機拍攝的契約：解析度過高、歪斜、光線不均）"""
+    downscale: bool = True
+    crop: bool = True
+    deskew: bool = True
+    binarize: bool = True
+    target_dpi: int = 300
+    page_inches: float = 11.69   # 假設長邊是 A4 的長邊，用來換算 DPI
+    max_skew: float = 5.0        # 只校正這個角度以內的歪斜
+    block_size: int = 31         # 自適應二值化的鄰域大小（像素）
+    offset: int = 10             # 比鄰域平均暗多少才算文字
+
+    @classmethod
+    def from_env(cls) -> 'PreprocessConfig':
+        """OCR_PREPROCESS 為逗號分隔的步驟（預設全部），none 表示不處理"""
+        value = os.getenv('OCR_PREPROCESS', ','.join(PREPROCESS_STEPS)).lower()
+        steps = {step.strip() for step in value.split(',')}
+        return cls(
+            **{step: step in steps for step in PREPROCESS_STEPS},
+            target_dpi=int(os.getenv('OCR_TARGET_DPI') or 300),
+        )
+
+    def without(self, step: str) -> 'PreprocessConfig':
+        return PreprocessConfig(**{**asdict(self), step: False})
+
+    @property
+    def grayscale(self) -> bool:
+        return self.crop or self.deskew or self.binarize
+
+    def signature(self) -> Dict[str, Any]:
+        """影響 OCR 結果的設定，作為 OCR 快取鍵的一部分"""
+        return asdict(self)
+
+
+def _target_long_edge(config: PreprocessConfig) -> int:
+    return int(config.target_dpi * config.page_inches)
+
+
+def _crop_dark_borders(gray: np.ndarray, dark_ratio: float = 0.6) -> Tuple[int, int, int, int]:
+    """裁掉紙張外的深色背景（桌面等），回傳 (left, top, right, bottom)"""
+    paper = float(np.median(gray[::8, ::8]))
+    cols = np.nonzero(gray.mean(axis=0) > paper * dark_ratio)[0]
+    if cols.size == 0:
+        return 0, 0, gray.shape[1], gray.shape[0]
+    left, right = int(cols[0]), int(cols[-1]) + 1
+    rows = np.nonzero(gray[:, left:right].mean(axis=1) > paper * dark_ratio)[0]
+    if rows.size == 0:
+        return left, 0, right, gray.shape[0]
+    return left, int(rows[0]), right, int(rows[-1]) + 1
+
+
+def _projection_score(ink: Image.Image, angle: float) -> float:
+    # 文字列水平時，每列的墨水量起伏最大
+    profile = np.asarray(ink.rotate(angle, resample=Image.NEAREST, fillcolor=0)).sum(axis=1, dtype=np.int64)
+    return float(np.square(np.diff(profile)).sum())
+
+
+def estimate_skew(gray: Image.Image, max_skew: float = 5.0) -> float:
+    """以投影法在縮小的影像上估計歪斜，回傳校正用的旋轉角度（PIL rotate，逆時針為正）"""
+    small = gray.copy()
+    small.thumbnail((800, 800))
+    pixels = np.asarray(small)
+    ink = Image.fromarray((pixels < pixels.mean() - 2 * pixels.std() / 3).view(np.uint8))  # 文字為 1
+    best = max(np.arange(-max_skew, max_skew + 0.25, 0.5), key=lambda angle: _projection_score(ink, angle))
+    return max(np.arange(best - 0.4, best + 0.45, 0.1), key=lambda angle: _projection_score(ink, angle))
+
+
+def adaptive_binarize(gray: Image.Image, block_size: int = 31, offset: int = 10) -> Image.Image:
+    """以鄰域平均做自適應二值化，光線不均的照片也能分開文字與背景"""
+    # 鄰域平均與減去 offset 都在 PIL 的 C 實作中完成，NumPy 只做一次比較
+    local = gray.filter(ImageFilter.BoxBlur(block_size // 2)).point(lambda v: max(v - offset, 0))
+    mask = np.asarray(gray) >= np.asarray(local)
+    binary = mask.view(np.uint8)            # 與 mask 共用記憶體
+    binary *= 255
+    return Image.fromarray(binary)
+
+
+def preprocess_image(image: Image.Image, config: PreprocessConfig) -> Tuple[Image.Image, Dict[str, Any]]:
+    """依設定做縮小、裁邊、校正歪斜與二值化（後三者會先轉灰階），回傳處理後的影像與各步驟耗時"""
+    stats: Dict[str, Any] = {'size_in': image.size, 'seconds': {}}
+
+    def timed(step: str, start: float):
+        stats['seconds'][step] = round(time.perf_counter() - start, 4)
+
+    start = time.perf_counter()
+    target = _target_long_edge(config)
+    scale = target / max(image.size)
+    if config.downscale and scale < 1 and image.format == 'JPEG':
+        # JPEG 解碼時直接以 1/2、1/4、1/8 縮小（並轉灰階），不必先解出整張大圖
+        image.draft('L' if config.grayscale else image.mode, (int(image.width * scale), int(image.height * scale)))
+    image = ImageOps.exif_transpose(image)  # 手機照片的旋轉資訊
+    if config.grayscale:
+        image = image.convert('L')
+    timed('load', start)
+
+    if config.downscale:
+        start = time.perf_counter()
+        scale = target / max(image.size)
+        if scale < 1:
+            image = image.resize((round(image.width * scale), round(image.height * scale)),
+                                 Image.LANCZOS, reducing_gap=2.0)
+        timed('downscale', start)
+
+    if config.crop:
+        start = time.perf_counter()
+        box = _crop_dark_borders(np.asarray(image))
+        if box != (0, 0, image.width, image.height):
+            image = image.crop(box)
+        stats['crop_box'] = box
+        timed('crop', start)
+
+    if config.deskew:
+        start = time.perf_counter()
+        angle = float(estimate_skew(image, config.max_skew))
+        if abs(angle) >= 0.1:
+            image = image.rotate(angle, resample=Image.BILINEAR, expand=True, fillcolor=255)
+        stats['skew'] = round(angle, 2)
+        timed('deskew', start)
+
+    if config.binarize:
+        start = time.perf_counter()
+        image = adaptive_binarize(image, config.block_size, config.offset)
+        timed('binarize', start)
+
+    stats['size_out'] = image.size
+    return image, stats
@@ -0,0 +1,65 @@
+import asyncio
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+
+class JobQueueFullError(Exception):
+    """分析佇列已滿"""
+
+
+class JobQueue:
+    """背景分析工作佇列 - 固定數量的 worker 依序取出工作執行"""
+
+    def __init__(self, workers: int = 2, max_size: int = 100):
+        self.workers = max(1, workers)
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def start(self) -> None:
+        """啟動 worker（需在事件迴圈中呼叫）"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(i + 1))
+            for i in range(self.workers)
+        ]
+        print(f"✅ 分析佇列已啟動 ({self.workers} 個 worker)")
+
+    async def stop(self) -> None:
+        """停止所有 worker，尚未執行的工作會被捨棄"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, job_id: str, handler: Callable[[], Awaitable[None]]) -> int:
+        """加入工作，回傳目前排隊數量"""
+        if not self.running:
+            await self.start()
+        try:
+            self._queue.put_nowait((job_id, handler))
+        except asyncio.QueueFull:
+            raise JobQueueFullError(f"分析佇列已滿（上限 {self.max_size}）")
+        return self._queue.qsize()
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            item: Tuple[str, Callable[[], Awaitable[None]]] = await self._queue.get()
+            job_id, handler = item
+            try:
+                print(f"🛠️ worker {worker_id} 開始處理: {job_id}")
+                await handler()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ 工作 {job_id} 執行失敗: {e}")
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,307 @@
+import asyncio
+import copy
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import closing
+from typing import Callable, Dict, List, Optional
+
+# 尚未結束的工作狀態
+ACTIVE_STATUSES = ('queued', 'running')
+# 已結束的工作狀態（TTL 到期後清除）
+FINISHED_STATUSES = ('complete', 'failed')
+
+
+def new_job_id() -> str:
+    """產生不會碰撞的工作 ID"""
+    return f"session-{uuid.uuid4().hex}"
+
+
+def new_owner_id() -> str:
+    """產生目前 process 的擁有者 ID（用於多 worker 部署與重啟復原）"""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class JobStore(ABC):
+    """分析工作與進度的儲存介面"""
+
+    @abstractmethod
+    def create(self, job_id: str, data: Dict, owner: str) -> None:
+        ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def update(self, job_id: str, mutator: Callable[[Dict], None]) -> Optional[Dict]:
+        """以 mutator 修改工作內容（單一交易內完成），回傳修改後的資料"""
+
+    @abstractmethod
+    def delete(self, job_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def heartbeat(self, owner: str) -> int:
+        """更新此擁有者所有進行中工作的時間戳記"""
+
+    @abstractmethod
+    def cleanup_expired(self, ttl: float) -> int:
+        """刪除結束超過 ttl 秒的工作，回傳刪除數量"""
+
+    @abstractmethod
+    def claim_stale(self, owner: str, stale_after: float) -> List[Dict]:
+        """接手超過 stale_after 秒沒有心跳的進行中工作"""
+
+
+class MemoryJobStore(JobStore):
+    """單一 process 使用的記憶體儲存（預設）"""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id: str, data: Dict, owner: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._jobs[job_id] = {
+                **copy.deepcopy(data),
+                'owner': owner,
+                'created_at': now,
+                'updated_at': now,
+            }
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return copy.deepcopy(job) if job is not None else None
+
+    def update(self, job_id: str, mutator: Callable[[Dict], None]) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            mutator(job)
+            job['updated_at'] = time.time()
+            if job.get('status') in FINISHED_STATUSES:
+                job.setdefault('finished_at', job['updated_at'])
+            return copy.deepcopy(job)
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def heartbeat(self, owner: str) -> int:
+        now = time.time()
+        count = 0
+        with self._lock:
+            for job in self._jobs.values():
+                if job.get('owner') == owner and job.get('status') in ACTIVE_STATUSES:
+                    job['updated_at'] = now
+                    count += 1
+        return count
+
+    def cleanup_expired(self, ttl: float) -> int:
+        deadline = time.time() - ttl
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.get('status') in FINISHED_STATUSES and job.get('finished_at', 0) < deadline
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+    def claim_stale(self, owner: str, stale_after: float) -> List[Dict]:
+        deadline = time.time() - stale_after
+        claimed = []
+        with self._lock:
+            for job in self._jobs.values():
+                if job.get('status') in ACTIVE_STATUSES and job.get('owner') != owner and job['updated_at'] < deadline:
+                    job['owner'] = owner
+                    job['updated_at'] = time.time()
+                    claimed.append(copy.deepcopy(job))
+        return claimed
+
+
+class SQLiteJobStore(JobStore):
+    """以 SQLite 檔案儲存，多個 uvicorn worker 可共用"""
+
+    def __init__(self, db_path: str = 'jobs.db'):
+        self.db_path = db_path
+        with closing(self._connect()) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    owner TEXT,
+                    data TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    finished_at REAL
+                )
+                '''
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, updated_at)')
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict:
+        job = json.loads(row['data'])
+        job['owner'] = row['owner']
+        job['created_at'] = row['created_at']
+        job['updated_at'] = row['updated_at']
+        if row['finished_at'] is not None:
+            job['finished_at'] = row['finished_at']
+        return job
+
+    def create(self, job_id: str, data: Dict, owner: str) -> None:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO jobs (id, status, owner, data, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, data.get('status', 'queued'), owner, json.dumps(data, ensure_ascii=False), now, now)
+            )
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def update(self, job_id: str, mutator: Callable[[Dict], None]) -> Optional[Dict]:
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is None:
+                conn.execute('ROLLBACK')
+                return None
+            job = self._row_to_job(row)
+            mutator(job)
+            now = time.time()
+            status = job.get('status', row['status'])
+            finished_at = row['finished_at']
+            if status in FINISHED_STATUSES and finished_at is None:
+                finished_at = now
+            data = {k: v for k, v in job.items() if k not in ('owner', 'created_at', 'updated_at', 'finished_at')}
+            conn.execute(
+                'UPDATE jobs SET status = ?, owner = ?, data = ?, updated_at = ?, finished_at = ? WHERE id = ?',
+                (status, job.get('owner'), json.dumps(data, ensure_ascii=False), now, finished_at, job_id)
+            )
+            conn.execute('COMMIT')
+            job['updated_at'] = now
+            if finished_at is not None:
+                job['finished_at'] = finished_at
+            return job
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def delete(self, job_id: str) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+
+    def heartbeat(self, owner: str) -> int:
+        placeholders = ','.join('?' * len(ACTIVE_STATUSES))
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                f'UPDATE jobs SET updated_at = ? WHERE owner = ? AND status IN ({placeholders})',
+                (time.time(), owner, *ACTIVE_STATUSES)
+            )
+        return cursor.rowcount
+
+    def cleanup_expired(self, ttl: float) -> int:
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                'DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?',
+                (time.time() - ttl,)
+            )
+        return cursor.rowcount
+
+    def claim_stale(self, owner: str, stale_after: float) -> List[Dict]:
+        placeholders = ','.join('?' * len(ACTIVE_STATUSES))
+        now = time.time()
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE 確保同一時間只有一個 process 能接手
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute(
+                f'SELECT * FROM jobs WHERE status IN ({placeholders}) AND owner != ? AND updated_at < ?',
+                (*ACTIVE_STATUSES, owner, now - stale_after)
+            ).fetchall()
+            for row in rows:
+                conn.execute('UPDATE jobs SET owner = ?, updated_at = ? WHERE id = ?', (owner, now, row['id']))
+            conn.execute('COMMIT')
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+        claimed = []
+        for row in rows:
+            job = self._row_to_job(row)
+            job['owner'] = owner
+            job['updated_at'] = now
+            claimed.append(job)
+        return claimed
+
+
+class AsyncJobStore:
+    """在執行緒中呼叫工作儲存，SQLite 的讀寫不會卡住事件迴圈（記憶體儲存直接呼叫）"""
+
+    def __init__(self, store: JobStore):
+        self.store = store
+        self._offload = not isinstance(store, MemoryJobStore)
+
+    async def _call(self, method: Callable, *args):
+        if self._offload:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def create(self, job_id: str, data: Dict, owner: str) -> None:
+        await self._call(self.store.create, job_id, data, owner)
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        return await self._call(self.store.get, job_id)
+
+    async def update(self, job_id: str, mutator: Callable[[Dict], None]) -> Optional[Dict]:
+        return await self._call(self.store.update, job_id, mutator)
+
+    async def delete(self, job_id: str) -> None:
+        await self._call(self.store.delete, job_id)
+
+    async def heartbeat(self, owner: str) -> int:
+        return await self._call(self.store.heartbeat, owner)
+
+    async def cleanup_expired(self, ttl: float) -> int:
+        return await self._call(self.store.cleanup_expired, ttl)
+
+    async def claim_stale(self, owner: str, stale_after: float) -> List[Dict]:
+        return await self._call(self.store.claim_stale, owner, stale_after)
+
+
+def create_job_store() -> JobStore:
+    """依環境變數 JOB_STORE_BACKEND 建立工作儲存（memory 或 sqlite）"""
+    backend = os.getenv('JOB_STORE_BACKEND', 'memory').lower()
+    if backend == 'sqlite':
+        db_path = os.getenv('JOB_STORE_PATH', 'jobs.db')
+        print(f"✅ 工作儲存: SQLite ({db_path})")
+        return SQLiteJobStore(db_path)
+    if backend != 'memory':
+        print(f"⚠️ 未知的 JOB_STORE_BACKEND: {backend}，改用記憶體儲存")
+    return MemoryJobStore()
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Any, Dict, Optional, Tuple
+
+
+def make_ocr_cache_key(file_hash: str, settings: Dict[str, Any]) -> str:
+    """以檔案內容雜湊與 OCR 設定（引擎版本、語言包、psm、DPI 等）組成快取鍵"""
+    payload = json.dumps({'file': file_hash, **settings}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class CachedDocument:
+    """快取中某份文件已完成的頁面；pages 為 {頁碼: (方式, 文字)}"""
+
+    def __init__(self, total_pages: int, pages: Dict[int, Tuple[str, str]]):
+        self.total_pages = total_pages
+        self.pages = pages
+
+    @property
+    def complete(self) -> bool:
+        return self.total_pages > 0 and len(self.pages) >= self.total_pages
+
+
+class OCRCache:
+    """OCR 結果的 SQLite 快取：逐頁儲存，超過容量時以整份文件為單位刪除最久未使用的"""
+
+    def __init__(self, db_path: str = 'ocr_cache.db', max_bytes: int = 256 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS ocr_pages (
+                    key TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    total_pages INTEGER NOT NULL,
+                    method TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (key, page)
+                )
+                '''
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_ocr_pages_access ON ocr_pages (last_access)')
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def _count(self, field: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def get(self, key: str) -> Optional[CachedDocument]:
+        """取得文件已快取的頁面，沒有任何頁面時回傳 None"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT page, total_pages, method, text FROM ocr_pages WHERE key = ?', (key,)
+            ).fetchall()
+            if rows:
+                conn.execute('UPDATE ocr_pages SET last_access = ? WHERE key = ?', (time.time(), key))
+        if not rows:
+            self._count('misses')
+            return None
+        document = CachedDocument(rows[0][1], {page: (method, text) for page, _, method, text in rows})
+        self._count('hits' if document.complete else 'misses')
+        return document
+
+    def put_page(self, key: str, page: int, total_pages: int, method: str, text: str) -> None:
+        """每完成一頁就寫入，中途失敗的多頁 PDF 重試時可沿用已完成的頁面"""
+        size = len(text.encode('utf-8'))
+        with closing(self._connect()) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute(
+                    'INSERT OR REPLACE INTO ocr_pages (key, page, total_pages, method, text, size, last_access) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (key, page, total_pages, method, text, size, time.time())
+                )
+                removed = self._evict(conn, keep=key)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        if removed:
+            self._count('evictions', removed)
+
+    def _evict(self, conn: sqlite3.Connection, keep: str) -> int:
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM ocr_pages').fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        victims = []
+        documents = conn.execute(
+            'SELECT key, SUM(size) FROM ocr_pages WHERE key != ? GROUP BY key ORDER BY MAX(last_access)', (keep,)
+        )
+        for key, size in documents:
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        conn.executemany('DELETE FROM ocr_pages WHERE key = ?', victims)
+        return len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        with closing(self._connect()) as conn:
+            documents, pages, total = conn.execute(
+                'SELECT COUNT(DISTINCT key), COUNT(*), COALESCE(SUM(size), 0) FROM ocr_pages'
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'documents': documents,
+            'pages': pages,
+            'bytes': total,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
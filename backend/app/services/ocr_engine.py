@@ -0,0 +1,92 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+import pytesseract
+from PIL import Image
+
+try:
+    import tesserocr
+except ImportError:  # 選用套件：沒有安裝時改用 pytesseract
+    tesserocr = None
+
+OCR_LANG = 'chi_tra+eng'  # 繁體中文 + 英文
+OCR_PSM = 6               # 假設文字是統一的區塊
+OCR_CONFIG = f'--psm {OCR_PSM}'
+
+
+class OCREngine(ABC):
+    """OCR 引擎介面：image_to_string 可重複呼叫，引擎只初始化一次"""
+
+    name = ''
+
+    @abstractmethod
+    def image_to_string(self, image: Image.Image) -> str:
+        ...
+
+
+class TesserocrEngine(OCREngine):
+    """以 tesserocr 在行程內呼叫 Tesseract，語言資料只載入一次"""
+
+    name = 'tesserocr'
+
+    def __init__(self, lang: str = OCR_LANG, psm: int = OCR_PSM):
+        self._api = tesserocr.PyTessBaseAPI(lang=lang, psm=psm)  # tesserocr.PSM 只是常數集合，直接傳整數
+        self._lock = threading.Lock()  # PyTessBaseAPI 不能同時處理兩張圖片
+
+    def image_to_string(self, image: Image.Image) -> str:
+        with self._lock:
+            self._api.SetImage(image)
+            return self._api.GetUTF8Text()
+
+
+class PytesseractEngine(OCREngine):
+    """每頁啟動一次 tesseract 執行檔（沒有安裝 tesserocr 時的備援）"""
+
+    name = 'pytesseract'
+
+    def __init__(self, lang: str = OCR_LANG, config: str = OCR_CONFIG):
+        self.lang = lang
+        self.config = config
+
+    def image_to_string(self, image: Image.Image) -> str:
+        return pytesseract.image_to_string(image, lang=self.lang, config=self.config)
+
+
+def resolve_engine_name(kind: Optional[str] = None) -> str:
+    """OCR_ENGINE=auto（預設）時，有安裝 tesserocr 就使用，否則使用 pytesseract"""
+    kind = (kind or os.getenv('OCR_ENGINE') or 'auto').lower()
+    if kind == 'auto':
+        return TesserocrEngine.name if tesserocr is not None else PytesseractEngine.name
+    if kind == TesserocrEngine.name and tesserocr is None:
+        raise RuntimeError("OCR_ENGINE=tesserocr 但尚未安裝 tesserocr")
+    if kind not in (TesserocrEngine.name, PytesseractEngine.name):
+        raise ValueError(f"不支援的 OCR 引擎: {kind}")
+    return kind
+
+
+def engine_version(kind: Optional[str] = None) -> str:
+    """引擎名稱與 Tesseract 版本（不必初始化引擎），作為 OCR 快取鍵的一部分"""
+    name = resolve_engine_name(kind)
+    try:
+        if name == TesserocrEngine.name:
+            version = tesserocr.tesseract_version().split()[1]
+        else:
+            version = str(pytesseract.get_tesseract_version())
+    except Exception:
+        version = 'unknown'
+    return f"{name} {version}"
+
+
+# 每個行程各自保留已初始化的引擎（OCR 工作行程處理多頁時重複使用）
+_engines: Dict[str, OCREngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(kind: Optional[str] = None) -> OCREngine:
+    name = resolve_engine_name(kind)
+    with _engines_lock:
+        if name not in _engines:
+            _engines[name] = TesserocrEngine() if name == TesserocrEngine.name else PytesseractEngine()
+        return _engines[name]
@@ -1,10 +1,45 @@
-import pytesseract
 from PIL import Image
 from PyPDF2 import PdfReader
 from pdf2image import convert_from_path
+import asyncio
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.services.image_preprocess import PreprocessConfig, preprocess_image
+from app.services.ocr_cache import CachedDocument, OCRCache, make_ocr_cache_key
+from app.services.ocr_engine import OCR_CONFIG, OCR_LANG, engine_version, get_engine, resolve_engine_name
+from app.services.text_normalizer import PAGE_SEPARATOR
+from app.utils.file_handler import hash_file
+
+# 進度回呼：接收 {'stage': 'ocr_page', 'page': n, 'total': m} 等事件
+ProgressCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# 文字層抽出的亂碼：替代字元、私用區字元（字型沒有對應表）與控制字元
+_GARBLED_CHARS = re.compile(r'[\ufffd\ue000-\uf8ff\x00-\x08\x0b\x0e-\x1f]')
+
+
+def page_needs_ocr(page_text: str, min_chars: int = 30, max_garbled_ratio: float = 0.1) -> bool:
+    """判斷單一頁的文字層是否堪用：文字太少（掃描頁、簽名頁）或亂碼太多時改用 OCR"""
+    text = re.sub(r'\s+', '', page_text or '')
+    if len(text) < min_chars:
+        return True
+    return len(_GARBLED_CHARS.findall(text)) / len(text) > max_garbled_ratio
+
+
+def _ocr_pdf_page(pdf_path: str, page: int, dpi: int, engine: str) -> str:
+    """在 OCR 工作行程中點陣化並辨識單一頁（只回傳文字，圖片不跨行程傳遞；引擎在行程內重複使用）"""
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page, last_page=page)
+    try:
+        if not images:
+            return ''
+        return get_engine(engine).image_to_string(images[0])
+    finally:
+        for image in images:
+            image.close()
+
 
 class OCRService:
     """OCR 文字辨識服務"""
@@ -12,23 +47,105 @@ class OCRService:
     def __init__(self):
         # 如果是 Windows，需要指定 Tesseract 路徑
         # pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-        pass
+        
+        # OCR 引擎：tesserocr（行程內，語言資料只載入一次）或 pytesseract（每頁啟動執行檔）
+        self.engine = resolve_engine_name()
+        print(f"✅ OCR 引擎: {self.engine}")
+        
+        # 掃描版 PDF 逐頁交給工作行程：行程數、同時處理的頁數上限（控制記憶體）與點陣化解析度
+        self.ocr_workers = max(1, int(os.getenv('OCR_WORKERS') or os.cpu_count() or 1))
+        self.max_inflight_pages = max(1, int(os.getenv('OCR_MAX_INFLIGHT_PAGES') or self.ocr_workers * 2))
+        self.ocr_dpi = int(os.getenv('OCR_DPI') or 200)
+        # 文字層少於這個字數的頁面改用 OCR
+        self.min_page_chars = int(os.getenv('OCR_MIN_PAGE_CHARS') or 30)
+        # 上傳圖片（多為手機照片）OCR 前的縮小、灰階、裁邊、校正歪斜與二值化
+        self.preprocess = PreprocessConfig.from_env()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        
+        # 重新上傳同一個檔案時直接使用先前的 OCR 結果
+        self.cache: Optional[OCRCache] = None
+        if os.getenv('OCR_CACHE', 'true').lower() == 'true':
+            self.cache = OCRCache(
+                os.getenv('OCR_CACHE_PATH', 'ocr_cache.db'),
+                max_bytes=int(os.getenv('OCR_CACHE_MAX_MB') or 256) * 1024 * 1024
+            )
+        self._engine_version: Optional[str] = None
+    
+    def _cache_settings(self) -> Dict[str, Any]:
+        """會影響 OCR 結果的設定，任一項改變就不沿用快取"""
+        if self._engine_version is None:
+            self._engine_version = engine_version(self.engine)
+        return {
+            'engine': self._engine_version,
+            'lang': OCR_LANG,
+            'config': OCR_CONFIG,
+            'dpi': self.ocr_dpi,
+            'min_page_chars': self.min_page_chars,
+            'preprocess': self.preprocess.signature(),
+        }
+    
+    def _cache_page(self, cache_key: Optional[str], page: int, total_pages: int, method: str, text: str) -> None:
+        if self.cache is not None and cache_key is not None:
+            self.cache.put_page(cache_key, page, total_pages, method, text)
     
-    async def extract_text_from_image(self, image_path: str) -> str:
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """第一次遇到掃描版 PDF 時才建立工作行程"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.ocr_workers)
+            print(f"✅ OCR 工作行程: {self.ocr_workers} 個（同時處理上限 {self.max_inflight_pages} 頁）")
+        return self._executor
+    
+    def shutdown(self) -> None:
+        """關閉 OCR 工作行程"""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+    
+    def _ocr_image(self, image_path: str, cache_key: Optional[str]) -> str:
+        """前處理並辨識單張圖片（CPU 密集，在執行緒中執行）"""
+        image, stats = preprocess_image(Image.open(image_path), self.preprocess)
+        print(f"🖼️ 影像前處理: {stats['size_in']} → {stats['size_out']}，"
+              f"歪斜 {stats.get('skew', 0)}°，耗時 {sum(stats['seconds'].values()):.2f}s")
+        
+        # 使用繁體中文 + 英文辨識
+        text = get_engine(self.engine).image_to_string(image)
+        self._cache_page(cache_key, 1, 1, 'ocr', text)
+        return text
+    
+    def _read_text_layer(self, pdf_path: str, cached_pages: Dict[int, Tuple[str, str]],
+                         cache_key: Optional[str]) -> Tuple[List[str], List[int]]:
+        """讀取每一頁的文字層（解析 PDF 與寫入快取都會阻塞，在執行緒中執行），回傳 (各頁文字, 需要 OCR 的頁碼)"""
+        reader = PdfReader(pdf_path)
+        total_pages = len(reader.pages)
+        texts: List[str] = [''] * total_pages
+        ocr_pages: List[int] = []
+        
+        for i, page in enumerate(reader.pages):
+            if i + 1 in cached_pages:
+                texts[i] = cached_pages[i + 1][1]
+                continue
+            page_text = page.extract_text() or ''
+            if page_needs_ocr(page_text, self.min_page_chars):
+                ocr_pages.append(i + 1)
+            else:
+                texts[i] = page_text
+                self._cache_page(cache_key, i + 1, total_pages, 'text', page_text)
+        return texts, ocr_pages
+    
+    async def _report(self, on_progress: Optional[ProgressCallback], page: int, total: int, method: str) -> None:
+        if on_progress is not None:
+            await on_progress({'stage': 'ocr_page', 'page': page, 'total': total, 'method': method})
+    
+    async def extract_text_from_image(self, image_path: str, on_progress: Optional[ProgressCallback] = None,
+                                      cache_key: Optional[str] = None) -> str:
         """從圖片提取文字"""
         print(f"📷 開始 OCR 處理圖片: {image_path}")
         
         try:
-            # 開啟圖片
-            image = Image.open(image_path)
-            
-            # 使用繁體中文 + 英文辨識
-            text = pytesseract.image_to_string(
-                image,
-                lang='chi_tra+eng',  # 繁體中文 + 英文
-                config='--psm 6'      # 假設文字是統一的區塊
-            )
+            # 前處理與辨識都會占住 CPU，放到執行緒裡，其他請求的進度推送才不會被卡住
+            text = await asyncio.to_thread(self._ocr_image, image_path, cache_key)
             
+            await self._report(on_progress, 1, 1, 'ocr')
             print(f"✅ OCR 完成，提取 {len(text)} 個字元")
             return text. strip()
             
@@ -36,25 +153,32 @@ class OCRService:
             print(f"❌ OCR 失敗: {e}")
             raise Exception(f"圖片文字辨識失敗: {str(e)}")
     
-    async def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """從 PDF 提取文字"""
+    async def extract_text_from_pdf(self, pdf_path: str, on_progress: Optional[ProgressCallback] = None,
+                                    cache_key: Optional[str] = None, cached: Optional[CachedDocument] = None) -> str:
+        """從 PDF 提取文字：逐頁判斷，文字層堪用就直接使用，其餘頁面才做 OCR（已快取的頁面直接沿用）"""
         print(f"📄 開始處理 PDF: {pdf_path}")
         
         try:
-            reader = PdfReader(pdf_path)
-            text = ""
-            
-            # 先嘗試直接提取文字（如果 PDF 有文字層）
-            for page in reader. pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
+            cached_pages = cached.pages if cached else {}
+            texts, ocr_pages = await asyncio.to_thread(self._read_text_layer, pdf_path, cached_pages, cache_key)
+            total_pages = len(texts)
             
-            # 如果提取的文字太少，可能是掃描版 PDF，需要 OCR
-            if len(text. strip()) < 100:
-                print("📷 PDF 可能是掃描版，使用 OCR 處理...")
-                text = await self._ocr_pdf_images(pdf_path)
+            done_pages = total_pages - len(ocr_pages)
+            text_pages = done_pages - len(cached_pages)
+            for page in range(1, text_pages + 1):
+                await self._report(on_progress, page, total_pages, 'text')
+            print(f"📊 文字層 {text_pages} 頁、OCR {len(ocr_pages)} 頁、快取 {len(cached_pages)} 頁（共 {total_pages} 頁）")
+            if ocr_pages:
+                print(f"📷 OCR 處理第 {', '.join(map(str, ocr_pages))} 頁...")
+                ocr_texts = await self._ocr_pdf_pages(pdf_path, ocr_pages, on_progress, done_pages, total_pages, cache_key)
+                for page_number, page_text in ocr_texts.items():
+                    texts[page_number - 1] = page_text
+            if on_progress is not None:
+                await on_progress({'stage': 'ocr_done', 'text_pages': text_pages, 'ocr_pages': len(ocr_pages),
+                                   'cached_pages': len(cached_pages), 'total': total_pages})
             
+            # 保留分頁，正規化時辨識頁首頁尾
+            text = ''.join(page_text + PAGE_SEPARATOR for page_text in texts)
             print(f"✅ PDF 處理完成，提取 {len(text)} 個字元")
             return text.strip()
             
@@ -62,37 +186,65 @@ class OCRService:
             print(f"❌ PDF 處理失敗: {e}")
             raise Exception(f"PDF 文字提取失敗: {str(e)}")
     
-    async def _ocr_pdf_images(self, pdf_path: str) -> str:
-        """對掃描版 PDF 進行 OCR"""
+    async def _ocr_pdf_pages(self, pdf_path: str, pages: List[int], on_progress: Optional[ProgressCallback] = None,
+                             finished_before: int = 0, total_pages: Optional[int] = None,
+                             cache_key: Optional[str] = None) -> Dict[int, str]:
+        """對指定頁碼做 OCR：逐頁點陣化並分散到多個行程，回傳 {頁碼: 文字}"""
+        total_pages = total_pages or len(pages)
+        pending: Dict[asyncio.Future, int] = {}
+        texts: Dict[int, str] = {}
         try:
-            # 將 PDF 轉換為圖片
-            images = convert_from_path(pdf_path)
-            text = ""
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor()
+            queue = list(pages)
             
-            for i, image in enumerate(images):
-                print(f"  處理第 {i+1}/{len(images)} 頁...")
-                page_text = pytesseract. image_to_string(
-                    image,
-                    lang='chi_tra+eng',
-                    config='--psm 6'
-                )
-                text += page_text + "\n"
+            while queue or pending:
+                # 同時在處理中的頁數有上限，記憶體用量不隨頁數增加
+                while queue and len(pending) < self.max_inflight_pages:
+                    page = queue.pop(0)
+                    future = loop.run_in_executor(executor, _ocr_pdf_page, pdf_path, page, self.ocr_dpi, self.engine)
+                    pending[future] = page
+                
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    page = pending.pop(future)
+                    texts[page] = future.result()
+                    await asyncio.to_thread(self._cache_page, cache_key, page, total_pages, 'ocr', texts[page])
+                    print(f"  第 {page} 頁完成（{len(texts)}/{len(pages)}）")
+                    await self._report(on_progress, finished_before + len(texts), total_pages, 'ocr')
             
-            return text
+            return texts
             
         except Exception as e:
             raise Exception(f"PDF OCR 失敗: {str(e)}")
+        finally:
+            for future in pending:              # 失敗時取消尚未開始的頁面
+                future.cancel()
     
-    async def extract_text(self, file_path: str) -> str:
-        """自動判斷檔案類型並提取文字"""
+    async def extract_text(self, file_path: str, on_progress: Optional[ProgressCallback] = None,
+                           file_hash: Optional[str] = None) -> str:
+        """自動判斷檔案類型並提取文字（on_progress 接收逐頁進度；file_hash 為上傳時算好的 SHA-256）"""
         ext = Path(file_path).suffix.lower()
-        
-        if ext in ['.jpg', '.jpeg', '.png', '. bmp', '.tiff', '.webp']:
-            return await self. extract_text_from_image(file_path)
-        elif ext == '.pdf':
-            return await self.extract_text_from_pdf(file_path)
-        else:
+        is_image = ext in ['.jpg', '.jpeg', '.png', '. bmp', '.tiff', '.webp']
+        if not is_image and ext != '.pdf':
             raise Exception(f"不支援的檔案格式: {ext}")
+        
+        cache_key, cached = None, None
+        if self.cache is not None:
+            file_hash = file_hash or await asyncio.to_thread(hash_file, file_path)
+            cache_key = make_ocr_cache_key(file_hash, await asyncio.to_thread(self._cache_settings))
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None and cached.complete:
+                print(f"⚡ 使用 OCR 快取（{cached.total_pages} 頁），略過文字辨識")
+                if on_progress is not None:
+                    await on_progress({'stage': 'ocr_done', 'text_pages': 0, 'ocr_pages': 0,
+                                       'cached_pages': cached.total_pages, 'total': cached.total_pages})
+                pages = [cached.pages[page][1] for page in range(1, cached.total_pages + 1)]
+                return ''.join(text + PAGE_SEPARATOR for text in pages).strip()
+        
+        if is_image:
+            return await self.extract_text_from_image(file_path, on_progress, cache_key)
+        return await self.extract_text_from_pdf(file_path, on_progress, cache_key, cached)
     
     async def save_text_to_file(self, text: str, output_path: str) -> None:
         """儲存文字到檔案"""
@@ -0,0 +1,41 @@
+import asyncio
+import json
+from typing import Any, Dict, Set
+
+
+class ProgressBroker:
+    """進度事件的發布／訂閱，供 SSE 串流使用（單一 process 內）"""
+
+    def __init__(self, max_queue_size: int = 1000):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def subscribe(self, session_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._subscribers.setdefault(session_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, session_id: str, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(session_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[session_id]
+
+    def has_subscribers(self, session_id: str) -> bool:
+        return bool(self._subscribers.get(session_id))
+
+    def publish(self, session_id: str, event_type: str, data: Dict[str, Any]) -> None:
+        """發布事件；訂閱者來不及消化時丟棄該事件，不阻塞分析流程"""
+        for queue in self._subscribers.get(session_id, ()):
+            try:
+                queue.put_nowait((event_type, data))
+            except asyncio.QueueFull:
+                pass
+
+
+def format_sse(event_type: str, data: Dict[str, Any]) -> str:
+    """格式化為 Server-Sent Events 訊息"""
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event_type}\ndata: {payload}\n\n"
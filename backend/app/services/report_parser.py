@@ -0,0 +1,108 @@
+import re
+from typing import Dict, List, Optional
+
+# 違規項目標題，例如「【違規項目 1】」
+VIOLATION_HEADER = re.compile(r'【違規項目\s*(\d+)】')
+# 四個欄位的開頭，例如「1.違法條款原文：」、「1、違法條款原文：」（同一行可能有多個欄位）
+# 欄位與法規分隔的寫法須與 AI/review_schema.py 的 _FIELD_RE、_LAW_SPLIT_RE 相同，串流預覽才會和最終結果一致
+FIELD_START = re.compile(r'([1-4])\s*[.．、]\s*(違法條款原文|違反法規|違法原因|修改建議)\s*[:：]?')
+LAW_SPLIT = re.compile(r'[；;\n]')
+FIELD_KEYS = {
+    '違法條款原文': 'original',
+    '違反法規': 'laws',
+    '違法原因': 'reason',
+    '修改建議': 'suggestion',
+}
+
+
+def build_violation(violation_id: int, fields: Dict[str, str]) -> Dict:
+    """由解析出的欄位組成前端使用的違規項目"""
+    violated_laws = [l.strip() for l in LAW_SPLIT.split(fields.get('laws', '')) if l.strip()]
+    return {
+        'id': violation_id,
+        'originalText': fields.get('original', '').strip(),
+        'violatedLaws': violated_laws,
+        'reason': fields.get('reason', '').strip(),
+        'suggestion': fields.get('suggestion', '').strip(),
+    }
+
+
+class IncrementalViolationParser:
+    """逐段讀入報告文字（可為 LLM 串流輸出），每完成一個違規項目就回傳
+
+    只處理完整的行，未完成的最後一行留到下一次 feed；每個字元只掃描一次。
+    違規項目在下一個標題、以「=」開頭的分隔行或 close() 時視為完成。
+    欄位到下一個欄位標題或行首的「---」為止，內文中的「2.5」、「---」不會截斷欄位。
+    """
+
+    def __init__(self):
+        self._pending: List[str] = []                   # 還沒遇到換行的片段，湊滿一行才合併
+        self._fields: Optional[Dict[str, str]] = None   # 目前違規項目的欄位，None 表示不在項目內
+        self._field: Optional[str] = None               # 目前正在累積的欄位
+        self._count = 0
+
+    def feed(self, chunk: str) -> List[Dict]:
+        completed = []
+        newline = chunk.rfind('\n')                    # 只在新片段裡找換行，舊片段不重新掃描
+        if newline == -1:
+            if chunk:
+                self._pending.append(chunk)
+            return completed
+        self._pending.append(chunk[:newline])
+        lines = ''.join(self._pending)
+        self._pending = [chunk[newline + 1:]]
+        for line in lines.split('\n'):
+            self._parse_line(line, completed)
+        return completed
+
+    def close(self) -> List[Dict]:
+        completed = []
+        line = ''.join(self._pending)
+        self._pending = []
+        if line:
+            self._parse_line(line, completed)
+        self._finish(completed)
+        return completed
+
+    def _finish(self, completed: List[Dict]) -> None:
+        if self._fields is not None:
+            self._count += 1
+            completed.append(build_violation(self._count, self._fields))
+        self._fields = None
+        self._field = None
+
+    def _parse_line(self, line: str, completed: List[Dict]) -> None:
+        header = VIOLATION_HEADER.search(line)
+        if header:
+            self._finish(completed)
+            self._fields = {}
+            line = line[header.end():]
+        elif line.startswith('='):
+            # 報告的區段分隔線，後面是參考法規，不屬於違規項目
+            self._finish(completed)
+            return
+        if self._fields is None:
+            return
+        if line.strip().startswith('---'):
+            self._field = None              # 修改建議到分隔線為止
+            return
+
+        position = 0
+        for match in FIELD_START.finditer(line):
+            self._append(line[position:match.start()])
+            self._field = FIELD_KEYS[match.group(2)]
+            self._fields[self._field] = ''
+            position = match.end()
+        self._append(line[position:], newline=position == 0)
+
+    def _append(self, text: str, newline: bool = False) -> None:
+        if self._field is None or not text.strip():
+            return
+        current = self._fields[self._field]
+        self._fields[self._field] = f"{current}\n{text}" if newline and current else current + text
+
+
+def parse_violations(report_content: str) -> List[Dict]:
+    """一次解析完整報告的違規項目"""
+    parser = IncrementalViolationParser()
+    return parser.feed(report_content) + parser.close()
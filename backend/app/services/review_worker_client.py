@@ -0,0 +1,61 @@
+import asyncio
+import itertools
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class ReviewWorkerError(Exception):
+    """審查服務回傳的錯誤"""
+
+
+class ReviewWorkerClient:
+    """常駐 AI 審查服務的 RPC 客戶端（每行一個 JSON）"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765):
+        self.host = host
+        self.port = port
+        self._ids = itertools.count(1)
+
+    async def call(self, method: str, params: Optional[Dict[str, Any]] = None, timeout: float = 600,
+                   on_event: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """送出一次請求並等待結果；on_event 會收到服務端推送的進度事件"""
+        request_id = next(self._ids)
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, limit=16 * 1024 * 1024),
+            timeout=10
+        )
+        try:
+            payload = {'id': request_id, 'method': method, 'params': params or {}, 'events': on_event is not None}
+            writer.write((json.dumps(payload, ensure_ascii=False) + '\n').encode('utf-8'))
+            await writer.drain()
+
+            deadline = asyncio.get_running_loop().time() + timeout
+            while True:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                line = await asyncio.wait_for(reader.readline(), timeout=remaining)
+                if not line:
+                    raise ReviewWorkerError("審查服務中斷連線")
+                response = json.loads(line.decode('utf-8'))
+                if 'event' in response:
+                    if on_event is not None:
+                        await on_event(response['event'])
+                    continue
+                if 'error' in response:
+                    raise ReviewWorkerError(response['error'])
+                return response.get('result', {})
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def ping(self) -> bool:
+        """檢查審查服務是否存活"""
+        try:
+            await self.call('ping', timeout=5)
+            return True
+        except (OSError, asyncio.TimeoutError, ReviewWorkerError):
+            return False
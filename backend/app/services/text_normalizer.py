@@ -0,0 +1,200 @@
+import math
+import re
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+# OCR 服務以換頁字元分隔各頁，用來辨識重複的頁首頁尾
+PAGE_SEPARATOR = '\f'
+
+CJK = r'\u3400-\u9fff\uf900-\ufaff'
+_CJK_CHAR = re.compile(f'[{CJK}]')
+# 估算 token 時一併計入全形標點與全形字母（範圍與 AI/context_packer.py 的 _CJK_RE 相同）
+_CJK_TOKEN = re.compile(r'[\u3001-\u9fff\uf900-\ufaff\uff00-\uffef]')
+_FULLWIDTH_ALNUM = re.compile(r'[\uff10-\uff19\uff21-\uff3a\uff41-\uff5a\u3000]')
+# 中文字之間、中文字與數字之間的空白（OCR 常在每個字之間插入空白）
+_CJK_GAP = re.compile(
+    f'(?<=[{CJK}，。；：、！？（）「」]) +(?=[{CJK}，。；：、！？（）「」\\d])|(?<=\\d) +(?=[{CJK}，。；：、！？（）「」])'
+)
+_SPACE_RUN = re.compile(r'[ \t\u00a0]+')
+_LINE_EDGE = re.compile(r' *\n *')
+# 斷行：上一行沒有以句末標點結尾，下一行也不是新條款的開頭
+_BROKEN_LINE = re.compile(
+    r'(?<=[^。；：！？.;:\n])\n'
+    r'(?!\n|第[一二三四五六七八九十百零〇\d]+條|[一二三四五六七八九十]+[、.]|[（(][一二三四五六七八九十\d]+[)）]|\d+[.、)）]'
+    r'|[^\n，。]{1,8}[：:])'
+)
+# 條款標題行（「第一條 工資」）：條號後只有簡短、沒有標點的標題，不與下一行的內文接起來
+_CLAUSE_HEADING = re.compile(r'第[一二三四五六七八九十百零〇\d]+條 ?[^\s，。；：、！？,.;:]{0,10}$')
+_BLANK_LINES = re.compile(r'\n{3,}')
+# 千分位與小數點：「28 ，590」→「28,590」、「8．5」→「8.5」
+_DIGIT_SEPARATOR = re.compile(r'(?<=\d) ?[,，] ?(?=\d{3}(?!\d))|(?<=\d)．(?=\d)')
+# 前面是阿拉伯數字或小數點時（「3萬元」、「2.8萬元」）保留原文，避免把「萬」當成數字本身
+_CHINESE_NUMBER = re.compile(
+    r'(?<![\d.．])[零〇一二兩三四五六七八九十百千萬]+(?=元|塊|小時|分鐘|天|日|週|周|個月|年|倍|次|%)'
+)
+_PAGE_NUMBER_LINE = re.compile(r'^(?:第\s*\d+\s*頁.*|-?\s*\d+\s*-?|\d+\s*/\s*\d+|page\s*\d+.*)$', re.IGNORECASE)
+
+_DIGITS = {'零': 0, '〇': 0, '一': 1, '二': 2, '兩': 2, '三': 3, '四': 4, '五': 5, '六': 6, '七': 7, '八': 8, '九': 9}
+_UNITS = {'十': 10, '百': 100, '千': 1000}
+
+
+def estimate_tokens(text: str) -> int:
+    """粗估 token 數：中文字約 1 token，其餘約 4 個字元 1 token（與 AI 模組的估算方式相同）"""
+    cjk = len(_CJK_TOKEN.findall(text))
+    rest = len(re.sub(r'\s+', '', text)) - cjk
+    return cjk + math.ceil(rest / 4)
+
+
+def chinese_to_int(text: str) -> Optional[int]:
+    """把「二萬八千五百九十」這類中文數字轉成整數，無法解析時回傳 None"""
+    # 只有單位（「萬」）或以百、千、萬開頭（「萬一」）都不是數字
+    if not text or text[0] in '百千萬':
+        return None
+    total, section, number = 0, 0, None
+    for char in text:
+        if char in _DIGITS:
+            number = _DIGITS[char]
+        elif char in _UNITS:
+            section += (1 if number is None else number) * _UNITS[char]
+            number = None
+        elif char == '萬':
+            total += (section + (number or 0)) * 10000
+            section, number = 0, None
+        else:
+            return None
+    return total + section + (number or 0)
+
+
+class NormalizedText:
+    """正規化後的契約文字，offsets[i] 是 text[i] 在原始 OCR 文字中的位置"""
+
+    def __init__(self, original: str, text: str, offsets: List[int]):
+        self.original = original
+        self.text = text
+        self.offsets = offsets
+
+    def original_span(self, start: int, end: int) -> Tuple[int, int]:
+        """正規化文字中的 [start, end) 對應到原始文字的範圍"""
+        return self.offsets[start], self.offsets[end - 1] + 1
+
+    def locate(self, quote: str) -> Optional[Tuple[int, int]]:
+        """找出引用的條款原文在原始 OCR 文字中的位置"""
+        quote = quote.strip()
+        start = self.text.find(quote) if quote else -1
+        if start == -1:
+            return None
+        return self.original_span(start, start + len(quote))
+
+    def stats(self) -> Dict[str, int]:
+        chars_before, chars_after = len(self.original), len(self.text)
+        tokens_before, tokens_after = estimate_tokens(self.original), estimate_tokens(self.text)
+        return {
+            'chars_before': chars_before,
+            'chars_after': chars_after,
+            'chars_saved': chars_before - chars_after,
+            'tokens_before': tokens_before,
+            'tokens_after': tokens_after,
+            'tokens_saved': tokens_before - tokens_after,
+        }
+
+
+def _substitute(pattern: re.Pattern, replace: Callable[[re.Match], str],
+                text: str, offsets: List[int]) -> Tuple[str, List[int]]:
+    """re.sub 並維持位置對照：替換後的字元對應到被替換範圍的頭尾"""
+    chars: List[str] = []
+    new_offsets: List[int] = []
+    position = 0
+    for match in pattern.finditer(text):
+        start, end = match.span()
+        chars.append(text[position:start])
+        new_offsets.extend(offsets[position:start])
+        replacement = replace(match)
+        if replacement:
+            if end > start:
+                first, last = offsets[start], offsets[end - 1]
+            else:                                   # 零寬度比對：沿用後一個字元的位置
+                first = last = offsets[start] if start < len(offsets) else (offsets[-1] if offsets else 0)
+            chars.append(replacement)
+            new_offsets.extend([first] * (len(replacement) - 1) + [last])
+        position = end
+    chars.append(text[position:])
+    new_offsets.extend(offsets[position:])
+    return ''.join(chars), new_offsets
+
+
+def _furniture_key(line: str) -> str:
+    return re.sub(r'\d+', '#', re.sub(r'\s+', '', line))
+
+
+def _remove_page_furniture(text: str, offsets: List[int], edge_lines: int = 3) -> Tuple[str, List[int]]:
+    """刪除多頁文件中每頁重複出現的頁首、頁尾與頁碼，並把換頁改成換行"""
+    pages = text.split(PAGE_SEPARATOR)
+    page_lines = [page.split('\n') for page in pages]
+    counts: Counter = Counter()
+    for lines in page_lines:
+        edges = {_furniture_key(line) for line in lines[:edge_lines] + lines[-edge_lines:] if line.strip()}
+        counts.update(edges)
+    min_pages = max(2, math.ceil(len(pages) / 2))
+    repeated = {key for key, count in counts.items() if count >= min_pages} if len(pages) > 1 else set()
+
+    chars: List[str] = []
+    new_offsets: List[int] = []
+    position = 0
+    for page_idx, lines in enumerate(page_lines):
+        for line_idx, line in enumerate(lines):
+            at_edge = line_idx < edge_lines or line_idx >= len(lines) - edge_lines
+            stripped = line.strip()
+            furniture = at_edge and stripped and (
+                _furniture_key(line) in repeated or (len(pages) > 1 and _PAGE_NUMBER_LINE.match(stripped))
+            )
+            if not furniture:
+                chars.append(line)
+                new_offsets.extend(offsets[position:position + len(line)])
+            position += len(line)
+            if line_idx < len(lines) - 1 or page_idx < len(pages) - 1:
+                if not furniture:                  # 換行或換頁字元都變成換行
+                    chars.append('\n')
+                    new_offsets.append(offsets[position])
+                position += 1
+    return ''.join(chars), new_offsets
+
+
+def _join_broken_line(match: re.Match) -> str:
+    text = match.string
+    if _CLAUSE_HEADING.match(text, text.rfind('\n', 0, match.start()) + 1, match.start()):
+        return match.group(0)
+    before = text[match.start() - 1]
+    after = text[match.end()] if match.end() < len(text) else ''
+    # 中文斷行直接接起來，英數字之間補一個空白
+    return '' if _CJK_CHAR.match(before) or _CJK_CHAR.match(after or ' ') else ' '
+
+
+def _canonical_number(match: re.Match) -> str:
+    # 單獨的「一」多半是詞的一部分（統一、一次性），維持原文
+    if match.group(0) == '一':
+        return match.group(0)
+    value = chinese_to_int(match.group(0))
+    return str(value) if value is not None else match.group(0)
+
+
+def normalize_contract_text(original: str) -> NormalizedText:
+    """清理 OCR 文字：頁首頁尾、全形英數、多餘空白、斷行與數字寫法，保留回到原文的位置對照"""
+    text, offsets = original, list(range(len(original)))
+    text, offsets = _remove_page_furniture(text, offsets)
+    steps = [
+        (_FULLWIDTH_ALNUM, lambda m: ' ' if m.group(0) == '\u3000' else chr(ord(m.group(0)) - 0xFEE0)),
+        (_SPACE_RUN, lambda m: ' '),
+        (_CJK_GAP, lambda m: ''),
+        (_LINE_EDGE, lambda m: '\n'),
+        (_BROKEN_LINE, _join_broken_line),
+        (_BLANK_LINES, lambda m: '\n\n'),
+        (_DIGIT_SEPARATOR, lambda m: '.' if m.group(0) == '．' else ','),
+        (_CHINESE_NUMBER, _canonical_number),
+    ]
+    for pattern, replace in steps:
+        text, offsets = _substitute(pattern, replace, text, offsets)
+
+    # 去掉頭尾空白
+    start = len(text) - len(text.lstrip())
+    end = len(text.rstrip())
+    return NormalizedText(original, text[start:end], offsets[start:end])
@@ -0,0 +1,43 @@
+import hashlib
+from pathlib import Path
+from typing import BinaryIO, Tuple
+
+CHUNK_SIZE = 1024 * 1024  # 每次讀寫 1MB，大檔案不必整個載入記憶體
+
+
+class FileTooLargeError(ValueError):
+    """上傳檔案超過大小上限"""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"檔案超過 {max_size // (1024 * 1024)}MB 上限")
+        self.max_size = max_size
+
+
+def save_stream(source: BinaryIO, dest: Path, max_size: int, chunk_size: int = CHUNK_SIZE) -> Tuple[str, int]:
+    """邊寫入檔案邊計算 SHA-256，回傳 (雜湊, 位元組數)；超過上限時刪除已寫入的部分"""
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with dest.open('wb') as buffer:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise FileTooLargeError(max_size)
+                digest.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
+    return digest.hexdigest(), size
+
+
+def hash_file(path: str, chunk_size: int = CHUNK_SIZE) -> str:
+    """計算既有檔案的 SHA-256（復原的工作沒有上傳時算好的雜湊）"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
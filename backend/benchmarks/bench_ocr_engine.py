@@ -0,0 +1,89 @@
+"""比較 tesserocr（行程內重複使用引擎）與 pytesseract（每頁啟動 tesseract）的每頁延遲
+
+    cd backend
+    python benchmarks/bench_ocr_engine.py --pages 20                    # 以合成的文字圖片測試
+    python benchmarks/bench_ocr_engine.py --image contract.png --pages 10
+    python benchmarks/bench_ocr_engine.py --pdf scanned.pdf --pages 10
+
+合成圖片需要可顯示中文的字型（--font），沒有時只畫英數字。
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.ocr_engine import PytesseractEngine, TesserocrEngine, tesserocr  # noqa: E402
+
+SAMPLE_LINES = [
+    "第一條 雇主應於每月十日前給付工資新台幣 28,590 元。",
+    "第二條 勞工每日正常工作時間不得超過八小時。",
+    "第三條 雇主不得扣留勞工之護照及居留證。",
+    "Article 4. Overtime pay shall be calculated under the Labor Standards Act.",
+]
+
+
+def _synthetic_page(font_path: str, lines: int = 40) -> Image.Image:
+    font = ImageFont.truetype(font_path, 28) if font_path else ImageFont.load_default()
+    image = Image.new('L', (1654, 2339), 255)      # A4 @ 200 DPI
+    draw = ImageDraw.Draw(image)
+    for idx in range(lines):
+        text = SAMPLE_LINES[idx % len(SAMPLE_LINES)]
+        if not font_path:
+            text = text.encode('ascii', 'ignore').decode()
+        draw.text((80, 80 + idx * 54), text, fill=0, font=font)
+    return image
+
+
+def _load_pages(args) -> List[Image.Image]:
+    if args.pdf:
+        from pdf2image import convert_from_path
+        pages = convert_from_path(args.pdf, dpi=200, first_page=1, last_page=args.pages)
+    elif args.image:
+        pages = [Image.open(args.image)]
+    else:
+        pages = [_synthetic_page(args.font)]
+    return [pages[idx % len(pages)] for idx in range(args.pages)]
+
+
+def _bench(engine_factory, pages: List[Image.Image]):
+    start = time.perf_counter()
+    engine = engine_factory()
+    init = time.perf_counter() - start
+    times = []
+    for page in pages:
+        start = time.perf_counter()
+        engine.image_to_string(page)
+        times.append((time.perf_counter() - start) * 1000)
+    return init * 1000, times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--image', help='使用指定的圖片')
+    parser.add_argument('--pdf', help='使用指定 PDF 的前幾頁')
+    parser.add_argument('--font', default='', help='繪製合成圖片用的中文字型（.ttf/.otf）')
+    args = parser.parse_args()
+
+    pages = _load_pages(args)
+    engines = [('pytesseract', PytesseractEngine)]
+    if tesserocr is not None:
+        engines.insert(0, ('tesserocr', TesserocrEngine))
+    else:
+        print("⚠️ 尚未安裝 tesserocr，只測試 pytesseract")
+
+    print(f"{len(pages)} 頁，{pages[0].size[0]}x{pages[0].size[1]}")
+    for name, factory in engines:
+        init, times = _bench(factory, pages)
+        print(f"  {name:<12} 初始化 {init:8.1f} ms  每頁中位數 {statistics.median(times):8.1f} ms  "
+              f"第一頁 {times[0]:8.1f} ms  合計 {sum(times) / 1000:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
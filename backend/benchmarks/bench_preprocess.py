@@ -0,0 +1,132 @@
+"""比較影像前處理各步驟對 OCR 耗時與字元正確率的影響
+
+    cd backend
+    python benchmarks/bench_preprocess.py                      # 合成的手機照片（歪斜、光線不均、深色背景）
+    python benchmarks/bench_preprocess.py --fixtures photos/   # 圖片與同名 .txt 正確文字
+    python benchmarks/bench_preprocess.py --no-ocr             # 只測前處理耗時（不需要 tesseract）
+
+依序測試：不處理、全部步驟、以及全部步驟各拿掉一項。
+"""
+import argparse
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.image_preprocess import PREPROCESS_STEPS, PreprocessConfig, preprocess_image  # noqa: E402
+from app.services.ocr_engine import get_engine  # noqa: E402
+
+SAMPLE_LINES = [
+    "第一條 雇主應於每月十日前給付工資新台幣 28,590 元。",
+    "第二條 勞工每日正常工作時間不得超過八小時。",
+    "第三條 雇主不得扣留勞工之護照及居留證。",
+    "Article 4. Overtime pay shall be calculated under the Labor Standards Act.",
+]
+
+
+def _render_photo(lines: List[str], font_path: str, angle: float, path: Path) -> None:
+    """畫出 A4 頁面，再模擬手機拍攝：放大、歪斜、左右光線不均、四周是深色桌面"""
+    font = ImageFont.truetype(font_path, 40) if font_path else ImageFont.load_default(size=40)
+    page = Image.new('L', (2480, 3508), 245)
+    draw = ImageDraw.Draw(page)
+    for idx, line in enumerate(lines):
+        draw.text((160, 200 + idx * 70), line, fill=25, font=font)
+    photo = page.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=50).resize((3200, 4400))
+    shade = np.linspace(0.55, 1.0, photo.width, dtype=np.float32)[None, :]
+    photo = Image.fromarray((np.asarray(photo) * shade).astype(np.uint8)).convert('RGB')
+    photo.save(path, 'JPEG', quality=90)
+
+
+def _synthetic_fixtures(workdir: Path, font_path: str, count: int) -> List[Tuple[Path, str]]:
+    fixtures = []
+    for idx in range(count):
+        lines = [SAMPLE_LINES[(idx + n) % len(SAMPLE_LINES)] for n in range(40)]
+        if not font_path:                       # 預設字型沒有中文字
+            lines = [line.encode('ascii', 'ignore').decode().strip() for line in lines]
+        path = workdir / f"photo-{idx}.jpg"
+        _render_photo(lines, font_path, angle=(-3.0, -1.5, 1.0, 2.5)[idx % 4], path=path)
+        fixtures.append((path, '\n'.join(lines)))
+    return fixtures
+
+
+def _load_fixtures(directory: Path) -> List[Tuple[Path, str]]:
+    fixtures = []
+    for path in sorted(directory.iterdir()):
+        truth = path.with_suffix('.txt')
+        if path.suffix.lower() in ('.jpg', '.jpeg', '.png') and truth.exists():
+            fixtures.append((path, truth.read_text(encoding='utf-8')))
+    return fixtures
+
+
+def _edit_distance(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def char_accuracy(text: str, truth: str) -> float:
+    """去掉空白後以編輯距離計算的字元正確率"""
+    text, truth = re.sub(r'\s+', '', text), re.sub(r'\s+', '', truth)
+    return max(0.0, 1 - _edit_distance(text, truth) / max(len(truth), 1))
+
+
+def _configs() -> List[Tuple[str, PreprocessConfig]]:
+    full = PreprocessConfig()
+    configs = [('不處理', PreprocessConfig(**{step: False for step in PREPROCESS_STEPS})), ('全部步驟', full)]
+    configs += [(f"拿掉 {step}", full.without(step)) for step in PREPROCESS_STEPS]
+    return configs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', help='圖片與同名 .txt 正確文字所在的資料夾')
+    parser.add_argument('--count', type=int, default=4, help='合成照片的數量')
+    parser.add_argument('--font', default='', help='繪製合成照片用的中文字型（.ttf/.otf）')
+    parser.add_argument('--no-ocr', action='store_true', help='只測前處理耗時')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.fixtures:
+            fixtures = _load_fixtures(Path(args.fixtures))
+        else:
+            fixtures = _synthetic_fixtures(Path(workdir), args.font, args.count)
+        if not fixtures:
+            print("⚠️ 找不到測試圖片")
+            return
+        engine = None if args.no_ocr else get_engine()
+        print(f"{len(fixtures)} 張圖片，OCR 引擎: {engine.name if engine else '（不執行）'}")
+
+        for label, config in _configs():
+            preprocess_times, ocr_times, accuracies = [], [], []
+            for path, truth in fixtures:
+                start = time.perf_counter()
+                image, _ = preprocess_image(Image.open(path), config)
+                preprocess_times.append(time.perf_counter() - start)
+                if engine is None:
+                    continue
+                start = time.perf_counter()
+                text = engine.image_to_string(image)
+                ocr_times.append(time.perf_counter() - start)
+                accuracies.append(char_accuracy(text, truth))
+            line = f"  {label:<14} 前處理 {statistics.median(preprocess_times):6.2f}s"
+            if engine is not None:
+                line += (f"  OCR {statistics.median(ocr_times):6.2f}s"
+                         f"  合計 {sum(preprocess_times) + sum(ocr_times):7.2f}s"
+                         f"  字元正確率 {statistics.mean(accuracies):6.1%}")
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""比較舊的 regex 解析與逐段解析器（IncrementalViolationParser）
+
+    cd backend
+    python benchmarks/bench_report_parser.py --violations 200 --repeat 20
+"""
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.report_parser import IncrementalViolationParser, parse_violations  # noqa: E402
+
+
+def regex_parse_violations(report_content: str):
+    """原本 parse_report_to_json 的 regex 寫法（對照組）
+
+    兩者的輸出並非完全相同：regex 版的欄位遇到任何「2.」、「3.」、「4.」就結束
+    （「月薪 2.5 萬元」只剩「月薪」），修改建議在行中的「---」就截斷；
+    逐段解析器只在下一個欄位標題、行首的「---」才結束欄位，也不再截斷欄位長度與法規數量。
+    make_report 產生的報告不含這些情況，只用來比較耗時。
+    """
+    violations = []
+    violation_pattern = r'【違規項目\s*(\d+)】(.*?)(?=【違規項目|\n=|$)'
+    matches = re.findall(violation_pattern, report_content, re.DOTALL)
+    for idx, (violation_num, content) in enumerate(matches, 1):
+        original_match = re.search(r'1\.\s*違法條款原文[: ：](.*?)(?=2\.|$)', content, re.DOTALL)
+        laws_match = re.search(r'2\.\s*違反法規[: ：](.*?)(?=3\.|$)', content, re.DOTALL)
+        reason_match = re.search(r'3\.\s*違法原因[:：](.*?)(?=4\.|$)', content, re.DOTALL)
+        suggestion_match = re.search(r'4\.\s*修改建議[:：](.*?)(?=$|---)', content, re.DOTALL)
+        original_text = original_match.group(1).strip() if original_match else ''
+        violated_laws_str = laws_match.group(1).strip() if laws_match else ''
+        violated_laws = [l.strip() for l in re.split(r'[；\n]', violated_laws_str) if l.strip()]
+        violations.append({
+            'id': idx,
+            'originalText': original_text[:200],
+            'violatedLaws': violated_laws[:3],
+            'reason': reason_match.group(1).strip()[:300] if reason_match else '',
+            'suggestion': suggestion_match.group(1).strip()[:300] if suggestion_match else '',
+        })
+    return violations
+
+
+def make_report(violations: int) -> str:
+    parts = ["=" * 80, "外籍勞工聘僱契約審查報告", "審查日期：2025年01月01日", "=" * 80, "",
+             "契約檔案：contracts/contract.txt", "契約字數：3000 字", "-" * 80, "", "---"]
+    for i in range(1, violations + 1):
+        parts += [
+            f"【違規項目 {i}】",
+            f"1.違法條款原文：雇主得保管勞工護照及居留證，第 {i} 項約定，期滿後返還。",
+            "2.違反法規：違反《就業服務法》第57條第8款；違反《勞動基準法》第22條",
+            "3.違法原因：雇主不得非法扣留受僱人之護照或居留證，" + "且不得以任何名義扣押勞工證件。" * 3,
+            "4.修改建議：應直接刪除，並改為「勞工之護照及居留證由勞工本人保管」。",
+            "",
+        ]
+    parts += ["---", "", "=" * 80, "本次審查參考法規條文", "=" * 80, "",
+              "1.【問題】雇主可否保管護照【法規依據】就業服務法第57條", "來源: new_law.json", ""]
+    return "\n".join(parts)
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def streamed(report: str, chunk_size: int):
+    parser = IncrementalViolationParser()
+    first_at = None
+    found = []
+    start = time.perf_counter()
+    for i in range(0, len(report), chunk_size):
+        found += parser.feed(report[i:i + chunk_size])
+        if found and first_at is None:
+            first_at = (time.perf_counter() - start) * 1000
+    found += parser.close()
+    return found, first_at
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--violations", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--chunk-size", type=int, default=8, help="模擬 LLM 串流每次送出的字元數")
+    args = parser.parse_args()
+
+    report = make_report(args.violations)
+    expected = regex_parse_violations(report)
+    # 只在這份合成報告上兩者一致（見 regex_parse_violations 的說明），確認比較的是同樣的工作量
+    assert parse_violations(report) == expected, "合成報告的解析結果與 regex 版本不同"
+    stream_result, first_at = streamed(report, args.chunk_size)
+    assert stream_result == expected, "合成報告的串流解析結果與 regex 版本不同"
+
+    print(f"報告 {len(report)} 字元，{len(expected)} 個違規項目")
+    print(f"regex 一次解析:      {timed(lambda: regex_parse_violations(report), args.repeat):.2f} ms")
+    print(f"逐段解析器一次解析:  {timed(lambda: parse_violations(report), args.repeat):.2f} ms")
+    print(f"逐段解析器串流 ({args.chunk_size} 字元/段): "
+          f"{timed(lambda: streamed(report, args.chunk_size), args.repeat):.2f} ms，"
+          f"第一個違規項目在 {first_at:.3f} ms 時產出")
+
+
+if __name__ == "__main__":
+    main()
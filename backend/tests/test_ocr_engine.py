@@ -0,0 +1,26 @@
+import pytest
+from PIL import Image
+
+from app.services.ocr_engine import OCREngine, PytesseractEngine
+
+
+def test_engine_interface_is_abstract():
+    with pytest.raises(TypeError):
+        OCREngine()
+
+    class Incomplete(OCREngine):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    assert PytesseractEngine().name == 'pytesseract'
+
+
+def test_tesserocr_engine_initializes():
+    tesserocr = pytest.importorskip('tesserocr')
+    if 'eng' not in tesserocr.get_languages()[1]:
+        pytest.skip('沒有 Tesseract 的 eng 語言資料')
+    from app.services.ocr_engine import TesserocrEngine
+
+    engine = TesserocrEngine(lang='eng')
+    assert isinstance(engine.image_to_string(Image.new('L', (200, 60), 255)), str)
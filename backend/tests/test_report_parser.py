@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import pytest
+
+from app.services.report_parser import FIELD_START, LAW_SPLIT, IncrementalViolationParser, parse_violations
+
+REPORT = '''審查結果
+---
+【違規項目 1】
+1.違法條款原文：月薪 2.5 萬元
+2.違反法規：違反《勞動基準法》第21條；違反《就業服務法》第57條
+3.違法原因：低於基本工資
+4.修改建議：改為月薪新臺幣 28,590 元---以上
+---
+【違規項目 2】
+1.違法條款原文：每日工作 12 小時
+2.違反法規：違反《勞動基準法》第32條
+3.違法原因：超過延長工時上限
+4.修改建議：改為每日 8 小時
+---
+備註：本段不是修改建議
+================================================================================
+本次審查參考法規條文
+1.【問題】雇主可否保管護照
+'''
+
+
+def test_parse_violations():
+    assert parse_violations(REPORT) == [
+        {
+            'id': 1,
+            'originalText': '月薪 2.5 萬元',              # 數字中的「2.」不是欄位標題
+            'violatedLaws': ['違反《勞動基準法》第21條', '違反《就業服務法》第57條'],
+            'reason': '低於基本工資',
+            'suggestion': '改為月薪新臺幣 28,590 元---以上',  # 只有行首的 --- 結束欄位
+        },
+        {
+            'id': 2,
+            'originalText': '每日工作 12 小時',
+            'violatedLaws': ['違反《勞動基準法》第32條'],
+            'reason': '超過延長工時上限',
+            'suggestion': '改為每日 8 小時',
+        },
+    ]
+
+
+def test_fields_on_one_line():
+    violations = parse_violations('【違規項目 1】1.違法條款原文：扣留護照 2.違反法規：就業服務法第57條 3.違法原因：不得扣留 4.修改建議：應直接刪除')
+    assert violations[0]['originalText'] == '扣留護照'
+    assert violations[0]['suggestion'] == '應直接刪除'
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 8, 64])
+def test_streaming_matches_whole_report(chunk_size):
+    parser = IncrementalViolationParser()
+    found = []
+    for start in range(0, len(REPORT), chunk_size):
+        found += parser.feed(REPORT[start:start + chunk_size])
+    found += parser.close()
+    assert found == parse_violations(REPORT)
+
+
+def test_full_width_numbering_and_no_truncation():
+    long_reason = '雇主不得扣留勞工證件。' * 40
+    laws = '；'.join(f'違反《就業服務法》第{n}條' for n in range(54, 59))
+    violations = parse_violations(f'【違規項目 1】\n1、違法條款原文：保管護照\n2．違反法規：{laws}\n3.違法原因：{long_reason}\n4.修改建議：應直接刪除')
+    assert violations[0]['originalText'] == '保管護照'
+    assert len(violations[0]['violatedLaws']) == 5
+    assert violations[0]['reason'] == long_reason
+
+
+def test_field_grammar_matches_review_schema(monkeypatch):
+    # AI 端解析最終結果、後端解析串流預覽，兩邊的欄位寫法必須相同
+    monkeypatch.syspath_prepend(str(Path(__file__).resolve().parents[2] / 'AI'))
+    review_schema = pytest.importorskip('review_schema')
+    assert FIELD_START.pattern == review_schema._FIELD_RE.pattern
+    assert LAW_SPLIT.pattern == review_schema._LAW_SPLIT_RE.pattern
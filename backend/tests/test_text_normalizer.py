@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import pytest
+
+from app.services.text_normalizer import chinese_to_int, estimate_tokens, normalize_contract_text
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('月薪二萬八千五百九十元', '月薪28590元'),
+    ('每日工作八小時', '每日工作8小時'),
+    ('十天', '10天'),
+    ('一萬元', '10000元'),
+    # 前面是阿拉伯數字或小數點時「萬」是倍數，保留原文
+    ('月薪3萬元', '月薪3萬元'),
+    ('月薪2.8萬元', '月薪2.8萬元'),
+    ('月薪新臺幣 3 萬 元', '月薪新臺幣3萬元'),
+    # 詞中的數字字不是數字
+    ('萬一日後', '萬一日後'),
+    ('統一年度', '統一年度'),
+    ('一次性給付', '一次性給付'),
+])
+def test_chinese_numbers(text, expected):
+    assert normalize_contract_text(text).text == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('二萬八千五百九十', 28590),
+    ('十', 10),
+    ('十萬', 100000),
+    ('兩萬', 20000),
+    ('萬', None),
+    ('萬一', None),
+    ('千', None),
+])
+def test_chinese_to_int(text, expected):
+    assert chinese_to_int(text) == expected
+
+
+def test_offsets_point_back_to_original():
+    original = '第一條　月薪 二萬八千五百九十 元'
+    normalized = normalize_contract_text(original)
+    start, end = normalized.locate('28590元')
+    assert original[start:end] == '二萬八千五百九十 元'
+
+
+@pytest.mark.parametrize('text, expected', [
+    # 條款標題不與下一行內文接起來
+    ('第一條 工資\n雇主每月十日前給付', '第一條工資\n雇主每月10日前給付'),
+    ('第三條工作時間\n每日八小時', '第三條工作時間\n每日8小時'),
+    # 條款內文斷行仍然接起來
+    ('第一條 雇主每月應給付工資新臺幣\n28,590元予勞工', '第一條雇主每月應給付工資新臺幣28,590元予勞工'),
+    ('雇主應依法為勞工投保\n勞工保險', '雇主應依法為勞工投保勞工保險'),
+])
+def test_broken_lines(text, expected):
+    assert normalize_contract_text(text).text == expected
+
+
+def test_token_estimate_matches_context_packer(monkeypatch):
+    # 後端顯示的省下 token 數與 AI 端裁切法規時用的是同一個估算
+    monkeypatch.syspath_prepend(str(Path(__file__).resolve().parents[2] / 'AI'))
+    context_packer = pytest.importorskip('context_packer')
+    for text in ('勞工每月工資為新臺幣２８，５９０元。', 'Article 57　雇主不得扣留護照（居留證）', 'ｱｲｳ かな　ＡＢＣ'):
+        assert estimate_tokens(text) == context_packer.estimate_tokens(text)
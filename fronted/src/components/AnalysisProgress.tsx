@@ -1,15 +1,25 @@
 import { useLanguage } from '@/contexts/LanguageContext';
 import { FileSearch, Search, CheckCircle2, Scale, FileText, Loader2 } from 'lucide-react';
 import { useEffect, useState } from 'react';
+import type { PrescreenFinding, ViolationItem } from '@/utils/api';
 
 interface ProgressStep {
   id: string;
   message: string;
   status: 'pending' | 'active' | 'complete';
+  detail?: string;
 }
 
 interface AnalysisProgressProps {
   isAnalyzing: boolean;
+  // 後端推送的實際進度；未提供時使用模擬進度
+  serverSteps?: ProgressStep[];
+  // AI 串流輸出的文字（邊生成邊顯示）
+  liveOutput?: string;
+  // 已解析完成的違規項目（逐項出現）
+  liveViolations?: ViolationItem[];
+  // 規則初篩的疑似違規（LLM 完成前先顯示）
+  prescreenFindings?: PrescreenFinding[];
 }
 
 const baseSteps: ProgressStep[] = [
@@ -22,13 +32,14 @@ const baseSteps: ProgressStep[] = [
   { id: '7', message: '生成最終報告...', status: 'pending' },
 ];
 
-const AnalysisProgress = ({ isAnalyzing }: AnalysisProgressProps) => {
+const AnalysisProgress = ({ isAnalyzing, serverSteps, liveOutput, liveViolations, prescreenFindings }: AnalysisProgressProps) => {
   const { language } = useLanguage();
   const [steps, setSteps] = useState<ProgressStep[]>([]);
   const [currentStepIndex, setCurrentStepIndex] = useState(0);
+  const useServerSteps = serverSteps !== undefined;
 
   useEffect(() => {
-    if (! isAnalyzing) {
+    if (! isAnalyzing || useServerSteps) {
       setSteps([]);
       setCurrentStepIndex(0);
       return;
@@ -69,9 +80,11 @@ const AnalysisProgress = ({ isAnalyzing }: AnalysisProgressProps) => {
     }, 2000); // 每 2 秒進度一步
 
     return () => clearInterval(interval);
-  }, [isAnalyzing]);
+  }, [isAnalyzing, useServerSteps]);
 
-  if (!isAnalyzing || steps.length === 0) {
+  const displaySteps = serverSteps ?? steps;
+
+  if (!isAnalyzing || displaySteps.length === 0) {
     return null;
   }
 
@@ -102,7 +115,7 @@ const AnalysisProgress = ({ isAnalyzing }: AnalysisProgressProps) => {
       className="min-h-screen flex flex-col items-center justify-start px-4 py-20"
     >
       <div className="w-full max-w-3xl space-y-4">
-        {steps.map((step, index) => (
+        {displaySteps.map((step, index) => (
           <div
             key={step.id}
             className={`
@@ -139,6 +152,9 @@ const AnalysisProgress = ({ isAnalyzing }: AnalysisProgressProps) => {
 
             <div className="flex-1">
               <p className="text-foreground font-medium">{step.message}</p>
+              {step.detail && step.status === 'active' && (
+                <p className="text-sm text-muted-foreground">{step.detail}</p>
+              )}
             </div>
 
             {step.status === 'active' && (
@@ -159,6 +175,42 @@ const AnalysisProgress = ({ isAnalyzing }: AnalysisProgressProps) => {
             )}
           </div>
         ))}
+
+        {prescreenFindings && prescreenFindings.length > 0 && (
+          <div className="glass-card rounded-xl p-4 space-y-2 animate-slide-up">
+            <p className="text-sm text-muted-foreground">初步檢查（待 AI 確認）</p>
+            {prescreenFindings.map((finding, idx) => (
+              <div key={`${finding.rule}-${finding.clause_index}-${idx}`}>
+                <p className={finding.severity === 'violation' ? 'text-destructive font-medium' : 'text-foreground font-medium'}>
+                  {finding.reason}
+                </p>
+                <p className="text-sm text-muted-foreground">「{finding.clause}」（{finding.law}）</p>
+              </div>
+            ))}
+          </div>
+        )}
+
+        {liveViolations && liveViolations.length > 0 && (
+          <div className="space-y-2">
+            {liveViolations.map((violation) => (
+              <div key={violation.id} className="glass-card rounded-xl p-4 border-destructive/40 animate-slide-up">
+                <p className="text-foreground font-medium">
+                  {violation.id}. {violation.originalText}
+                </p>
+                {violation.violatedLaws.length > 0 && (
+                  <p className="text-sm text-muted-foreground">{violation.violatedLaws.join('；')}</p>
+                )}
+              </div>
+            ))}
+          </div>
+        )}
+
+        {liveOutput && (
+          <div className="glass-card rounded-xl p-4 max-h-96 overflow-y-auto">
+            <p className="text-sm text-muted-foreground mb-2">AI 分析中（即時輸出）</p>
+            <pre className="whitespace-pre-wrap text-sm text-foreground font-sans">{liveOutput}</pre>
+          </div>
+        )}
       </div>
     </section>
   );
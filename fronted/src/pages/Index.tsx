@@ -5,7 +5,14 @@ import AnalysisProgress from '@/components/AnalysisProgress';
 import BeautifulReportSection from '@/components/BeautifulReportSection';
 import KnowledgeBase from '@/components/KnowledgeBase'; // 👈 添加這一行
 import ComplaintHotline from '@/components/ComplaintHotline'; // 👈 保留這一行
-import { uploadContract, type StructuredReport } from '@/utils/api';
+import {
+  uploadContractAsync,
+  waitForResult,
+  type ProgressStepData,
+  type ViolationItem,
+  type PrescreenFinding,
+  type StructuredReport,
+} from '@/utils/api';
 import { useToast } from '@/hooks/use-toast';
 import { useLanguage } from '@/contexts/LanguageContext';
 
@@ -13,6 +20,10 @@ const Index = () => {
   const [isAnalyzing, setIsAnalyzing] = useState(false);
   const [showReport, setShowReport] = useState(false);
   const [reportData, setReportData] = useState<StructuredReport | null>(null);
+  const [progressSteps, setProgressSteps] = useState<ProgressStepData[] | undefined>(undefined);
+  const [liveOutput, setLiveOutput] = useState('');
+  const [liveViolations, setLiveViolations] = useState<ViolationItem[]>([]);
+  const [prescreenFindings, setPrescreenFindings] = useState<PrescreenFinding[]>([]);
   const { toast } = useToast();
   const { language } = useLanguage();
 
@@ -20,6 +31,10 @@ const Index = () => {
     setIsAnalyzing(true);
     setShowReport(false);
     setReportData(null);
+    setProgressSteps([]);
+    setLiveOutput('');
+    setLiveViolations([]);
+    setPrescreenFindings([]);
     
     console.log('📊 設置 isAnalyzing = true');
     
@@ -33,7 +48,21 @@ const Index = () => {
     try {
       console.log('🚀 開始上傳檔案:', file.name);
       
-      const result = await uploadContract(file, language);
+      const { sessionId } = await uploadContractAsync(file, language);
+      const result = await waitForResult(
+        sessionId,
+        (progress) => setProgressSteps(progress.steps),
+        undefined,
+        (output) => {
+          if (output.type === 'token') {
+            setLiveOutput((prev) => prev + output.text);
+          } else if (output.type === 'prescreen') {
+            setPrescreenFindings(output.findings);
+          } else {
+            setLiveViolations((prev) => [...prev, output.violation]);
+          }
+        }
+      );
       
       console.log('✅ 上傳成功:', result);
       
@@ -80,6 +109,10 @@ const Index = () => {
       
       <AnalysisProgress 
         isAnalyzing={isAnalyzing}
+        serverSteps={progressSteps}
+        liveOutput={liveOutput}
+        liveViolations={liveViolations}
+        prescreenFindings={prescreenFindings}
       />
       
       <BeautifulReportSection 
@@ -6,6 +6,17 @@ export interface ViolationItem {
   violatedLaws: string[];
   reason: string;
   suggestion: string;
+  sourceOffset?: [number, number] | null;  // 條款原文在 OCR 原始文字中的位置
+}
+
+// 規則初篩找到的疑似違規（LLM 確認前的初步結果）
+export interface PrescreenFinding {
+  rule: string;
+  clause_index: number;
+  clause: string;
+  law: string;
+  reason: string;
+  severity: 'violation' | 'warning';
 }
 
 export interface RelatedLaw {
@@ -29,6 +40,14 @@ export interface StructuredReport {
     review_date: string;
     contract_file:  string;
     contract_length: number;
+    text_normalization?: {
+      chars_before: number;
+      chars_after: number;
+      chars_saved: number;
+      tokens_before: number;
+      tokens_after: number;
+      tokens_saved: number;
+    };
     violations:  ViolationItem[];
     related_laws: RelatedLaw[];
     summary: {
@@ -79,6 +98,143 @@ export async function uploadContract(file: File, language: string = 'zh-TW'): Pr
   return response.json();
 }
 
+export interface AsyncUploadResponse {
+  success: boolean;
+  message: string;
+  sessionId: string;
+  status: string;
+  progress_url: string;
+  result_url: string;
+}
+
+/**
+ * 上傳契約檔案並排入分析佇列（立即回傳 sessionId）
+ */
+export async function uploadContractAsync(file: File, language: string = 'zh-TW'): Promise<AsyncUploadResponse> {
+  const formData = new FormData();
+  formData.append('file', file);
+
+  const response = await fetch(
+    `${API_BASE_URL}/contracts/upload?async=true&language=${encodeURIComponent(language)}`,
+    {
+      method: 'POST',
+      body: formData,
+    }
+  );
+
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.detail || '上傳失敗');
+  }
+
+  return response.json();
+}
+
+/**
+ * 取得非同步分析結果，尚未完成時回傳 null
+ */
+export async function getResult(sessionId: string): Promise<StructuredReport | null> {
+  const response = await fetch(`${API_BASE_URL}/contracts/result/${sessionId}`);
+
+  if (response.status === 202) {
+    return null;
+  }
+
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.detail || '分析失敗');
+  }
+
+  return response.json();
+}
+
+export interface ProgressStepData {
+  id: string;
+  message: string;
+  status: 'pending' | 'active' | 'complete';
+  detail?: string;
+}
+
+export interface ProgressData {
+  status: string;
+  current_step: number;
+  total_steps: number;
+  steps: ProgressStepData[];
+}
+
+export interface StageEvent {
+  stage: string;
+  [key: string]: unknown;
+}
+
+export type OutputEvent =
+  | { type: 'token'; text: string }
+  | { type: 'violation'; violation: ViolationItem }
+  | { type: 'prescreen'; findings: PrescreenFinding[] };
+
+/**
+ * 以 SSE 訂閱分析進度，完成後取得結構化報告
+ */
+export function waitForResult(
+  sessionId: string,
+  onProgress?: (progress: ProgressData) => void,
+  onStage?: (event: StageEvent) => void,
+  onOutput?: (event: OutputEvent) => void
+): Promise<StructuredReport> {
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(`${API_BASE_URL}/contracts/progress/${sessionId}/stream`);
+
+    source.addEventListener('progress', (event) => {
+      onProgress?.(JSON.parse((event as MessageEvent).data));
+    });
+
+    source.addEventListener('stage', (event) => {
+      onStage?.(JSON.parse((event as MessageEvent).data));
+    });
+
+    // AI 邊生成邊推送的文字與已完成的違規項目
+    source.addEventListener('token', (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      onOutput?.({ type: 'token', text: data.text });
+    });
+
+    source.addEventListener('violation', (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      onOutput?.({ type: 'violation', violation: data.violation });
+    });
+
+    source.addEventListener('prescreen', (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      onOutput?.({ type: 'prescreen', findings: data.findings });
+    });
+
+    source.addEventListener('done', async (event) => {
+      source.close();
+      const data = JSON.parse((event as MessageEvent).data);
+      if (data.status !== 'complete') {
+        reject(new Error(data.error || '分析失敗'));
+        return;
+      }
+      try {
+        const result = await getResult(sessionId);
+        if (result) {
+          resolve(result);
+        } else {
+          reject(new Error('分析結果尚未就緒'));
+        }
+      } catch (error) {
+        reject(error);
+      }
+    });
+
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) {
+        reject(new Error('進度連線中斷'));
+      }
+    };
+  });
+}
+
 /**
  * 獲取分析進度
  */